@@ -0,0 +1,82 @@
+import argparse
+import asyncio
+import json
+import time
+
+from client.simulated_client import LoadStats
+from client.simulated_client import SimulatedClient
+from server.hangman_server import HangmanServer
+
+SRC = 'app_load_generator.py'
+
+
+async def generate_load(arguments):
+    """
+    Start arguments.clients simulated players, at most arguments.connect_rate new connections per second, and wait
+    until every one of them is done playing, or arguments.timeout seconds have passed. Players still waiting then,
+    e.g. for a lobby that never filled up, are disconnected and counted as unfinished.
+    Return: the JSON report, as a dict.
+    """
+    stats = LoadStats()
+    clients = [SimulatedClient(f'sim{index}', stats, preferred_players=arguments.players, rounds=arguments.rounds,
+                               think_time=arguments.think_time, max_tries=arguments.max_tries,
+                               binary=not arguments.text, pipeline=not arguments.paced,
+                               delta=not arguments.full_boards, fused=not arguments.separate_frames,
+                               early_record=not arguments.wait_for_welcome, seed=arguments.seed + index)
+               for index in range(arguments.clients)]
+
+    tasks = []
+    for index, client in enumerate(clients):
+        if arguments.connect_rate:
+            await asyncio.sleep(max(0.0, stats.started + index / arguments.connect_rate - time.perf_counter()))
+        tasks.append(asyncio.create_task(client.run(arguments.host, arguments.port)))
+
+    done, unfinished = await asyncio.wait(tasks, timeout=arguments.timeout or None)
+    for task in unfinished:
+        task.cancel()
+
+    report = stats.report(arguments.players)
+    report['clients'] = arguments.clients
+    report['unfinished'] = len(unfinished)
+    report['elapsed'] = round(time.perf_counter() - stats.started, 3)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test a hangman server with simulated players.')
+    parser.add_argument('--host', default='127.0.0.1', help='the server to connect to (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=5050, help='the port of the server (default: 5050)')
+    parser.add_argument('--clients', type=int, default=100, help='the number of simulated players (default: 100)')
+    parser.add_argument('--players', type=int, default=2, help='the lobby size the players ask for (default: 2)')
+    parser.add_argument('--rounds', type=int, default=1, help='the rounds every player plays (default: 1)')
+    parser.add_argument('--think-time', type=float, default=0.0, metavar='SECONDS',
+                        help='the mean time a player takes to answer a prompt (default: 0)')
+    parser.add_argument('--max-tries', type=int, default=10, help='the tries given when choosing a word (default: 10)')
+    parser.add_argument('--connect-rate', type=float, default=0.0, metavar='PER_SECOND',
+                        help='the most new connections per second (default: 0, all at once)')
+    parser.add_argument('--text', action='store_true', help='decline the binary codec')
+    parser.add_argument('--paced', action='store_true',
+                        help='decline pipelining, so the server paces messages as for a human player')
+    parser.add_argument('--full-boards', action='store_true',
+                        help='decline board deltas, so the server sends the whole board every turn')
+    parser.add_argument('--separate-frames', action='store_true',
+                        help='decline bundles, so the server sends every update of a turn in a frame of its own')
+    parser.add_argument('--wait-for-welcome', action='store_true',
+                        help='send the player record when asked for it, rather than as soon as connected')
+    parser.add_argument('--timeout', type=float, default=120.0, metavar='SECONDS',
+                        help='stop waiting for players after this long (default: 120, 0 waits forever)')
+    parser.add_argument('--seed', type=int, default=0, help='seed for secrets and guesses (default: 0)')
+    parser.add_argument('--output', help='also write the report to this file')
+    arguments = parser.parse_args()
+
+    HangmanServer.raise_file_limit()
+    report = json.dumps(asyncio.run(generate_load(arguments)), indent=2)
+    print(report)
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            file.write(report + '\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,76 @@
+import argparse
+
+import model.outbound as O
+import model.protocol as P
+from server.admission import AdmissionControl
+from server.deadlines import PromptDeadlines
+from server.executor import SessionExecutor
 from server.hangman_server import HangmanServer
 
 SRC = 'app.py'
 
 
 def main():
-    server = HangmanServer()
+    parser = argparse.ArgumentParser(description='Host a game of hangman.')
+    parser.add_argument('--mode', choices=HangmanServer.MODES, default=HangmanServer.THREADED,
+                        help='the server engine to run (default: threaded)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='the number of worker processes sharing the port (default: 1)')
+    parser.add_argument('--log-sampling', type=int, default=1, metavar='N',
+                        help='log 1 in every N messages sent or received (default: 1, log them all)')
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help='serve Prometheus metrics on this local port, at /metrics (default: none)')
+    parser.add_argument('--max-games', type=int, default=SessionExecutor.MAX_GAMES,
+                        help=f'threaded mode: the most games played at once (default: {SessionExecutor.MAX_GAMES})')
+    parser.add_argument('--max-queued-games', type=int, default=SessionExecutor.MAX_QUEUED_GAMES,
+                        help=f'threaded mode: the most games waiting to be played before lobbies are turned away '
+                             f'(default: {SessionExecutor.MAX_QUEUED_GAMES})')
+    parser.add_argument('--guess-timeout', type=float, default=PromptDeadlines.TIMEOUTS[PromptDeadlines.GUESS],
+                        metavar='SECONDS', help='the time a player has to guess (default: %(default)s)')
+    parser.add_argument('--choose-timeout', type=float, default=PromptDeadlines.TIMEOUTS[PromptDeadlines.SECRET],
+                        metavar='SECONDS',
+                        help='the time a player has to pick the max tries, then the word (default: %(default)s each)')
+    parser.add_argument('--continue-timeout', type=float,
+                        default=PromptDeadlines.TIMEOUTS[PromptDeadlines.CONTINUE], metavar='SECONDS',
+                        help='the time a player has to answer whether to play again (default: %(default)s)')
+    parser.add_argument('--prompt-retries', type=int, default=P.MAX_REQUEST_CORRECTIONS, metavar='N',
+                        help='the most times a prompt is sent when the answers are invalid (default: %(default)s)')
+    parser.add_argument('--on-expiry', choices=PromptDeadlines.POLICIES, default=PromptDeadlines.SKIP,
+                        help='what to do with a player who does not answer: skip or forfeit their turn, or evict '
+                             'them (default: %(default)s; the asyncio mode always ends the game)')
+    parser.add_argument('--backlog', type=int, default=HangmanServer.BACKLOG, metavar='N',
+                        help='the connections the kernel queues for the server to accept (default: %(default)s)')
+    parser.add_argument('--max-handshakes', type=int, default=AdmissionControl.MAX_HANDSHAKES, metavar='N',
+                        help='the most handshakes run at once (default: %(default)s)')
+    parser.add_argument('--max-queued-handshakes', type=int, default=AdmissionControl.MAX_QUEUED_HANDSHAKES,
+                        metavar='N', help='the most handshakes waiting to be run before new connections are sent '
+                                          'BUSY (default: %(default)s)')
+    parser.add_argument('--handshake-timeout', type=float, default=AdmissionControl.HANDSHAKE_TIMEOUT,
+                        metavar='SECONDS', help='the time a client has to be queued in a lobby (default: %(default)s)')
+    parser.add_argument('--accept-rate', type=float, metavar='PER_SECOND',
+                        help='the most connections accepted per second, the next sent BUSY (default: no limit)')
+    parser.add_argument('--accept-burst', type=int, metavar='N',
+                        help='the most connections accepted at once within --accept-rate (default: the rate)')
+    parser.add_argument('--max-outbound-bytes', type=int, default=O.MAX_BYTES, metavar='BYTES',
+                        help='the most bytes queued for a client that does not read fast enough (default: %(default)s)')
+    parser.add_argument('--on-overflow', choices=O.POLICIES, default=O.DISCONNECT,
+                        help='what to do with a client beyond --max-outbound-bytes: disconnect it, or drop the board '
+                             'updates a later one supersedes first (default: %(default)s; the asyncio mode always '
+                             'disconnects it)')
+    arguments = parser.parse_args()
+
+    timeouts = {PromptDeadlines.GUESS: arguments.guess_timeout, PromptDeadlines.MAX_TRIES: arguments.choose_timeout,
+                PromptDeadlines.SECRET: arguments.choose_timeout,
+                PromptDeadlines.CONTINUE: arguments.continue_timeout}
+    deadlines = PromptDeadlines(timeouts, arguments.prompt_retries, arguments.on_expiry)
+    admission = AdmissionControl(arguments.max_handshakes, arguments.max_queued_handshakes, arguments.accept_rate,
+                                 arguments.accept_burst, arguments.handshake_timeout)
+
+    server = HangmanServer(mode=arguments.mode, workers=arguments.workers, log_sampling=arguments.log_sampling,
+                           metrics_port=arguments.metrics_port, max_games=arguments.max_games,
+                           max_queued_games=arguments.max_queued_games, deadlines=deadlines,
+                           max_connections=arguments.backlog, admission=admission,
+                           max_outbound_bytes=arguments.max_outbound_bytes, on_overflow=arguments.on_overflow)
     server.start()
 
 
@@ -0,0 +1,62 @@
+import logging
+import socket
+import threading
+import time
+
+from model.player import Player
+from server.broadcast import broadcast
+
+logger = logging.getLogger("benchmark_broadcast")
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.StreamHandler())
+
+ROUNDS = 200
+MESSAGE = 'M=h,*,n,*,m,*,n'
+
+
+def run():
+    for size in [2, 4, 8, 16, 32]:
+        logger.info(f"{size:>2} players: tell per player {measure(size, tell_each):>7.1f} µs, "
+                    f"broadcast {measure(size, broadcast):>7.1f} µs")
+
+
+def tell_each(players: list, message: str):
+    """The fan-out Game.tell_all_players used before: encode, log and send once per player, in turn."""
+    for player in players:
+        player.tell(message)
+
+
+def measure(size: int, fan_out):
+    """
+    Send ROUNDS messages to a lobby of size players with fan_out, while each player drains its socket on a thread.
+    Return: the mean time per message until every player received it, in microseconds.
+    """
+    pairs = [socket.socketpair() for _ in range(size)]
+    players = [Player(connection=server, name=f'player{index}') for index, (server, _) in enumerate(pairs)]
+    expected = ROUNDS * len(players[0].codec.encode(MESSAGE))
+    receivers = [threading.Thread(target=drain, args=(client, expected)) for _, client in pairs]
+    [receiver.start() for receiver in receivers]
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fan_out(players, MESSAGE)
+    [receiver.join() for receiver in receivers]
+    elapsed = time.perf_counter() - start
+
+    for server, client in pairs:
+        server.close()
+        client.close()
+    return elapsed / ROUNDS * 1e6
+
+
+def drain(connection: socket.socket, expected: int):
+    received = 0
+    while received < expected:
+        chunk = connection.recv(65536)
+        if not chunk:
+            return
+        received += len(chunk)
+
+
+if __name__ == "__main__":
+    run()
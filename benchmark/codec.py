@@ -0,0 +1,44 @@
+import logging
+import timeit
+
+import model.protocol as P
+from model.codec import BinaryCodec, TextCodec
+
+logger = logging.getLogger("benchmark_codec")
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.StreamHandler())
+
+REPEAT = 20000
+MESSAGES = {
+    'WELCOME': P.construct_welcome([P.BINARY]),
+    'HEARTBEAT': P.HEARTBEAT,
+    'GAME_START': P.GAME_START,
+    'TURN': 'T;P=alina,2;10',
+    'MOVE_MADE': P.construct_move(['h', '*', 'n', '*', 'm', '*', 'n']),
+    'CORRECT': P.construct_correct(True),
+    'WIN': P.won([1, 0, 2]),
+}
+
+
+def run():
+    for codec in [TextCodec, BinaryCodec]:
+        for name, message in MESSAGES.items():
+            frame = bytearray(codec.encode(message))
+            view = memoryview(frame)
+
+            encode = measure(lambda: codec.encode(message))
+            decode = measure(lambda: codec.parse_frame(frame, view, 0, len(frame)))
+
+            logger.info(f"{codec.NAME:>4} {name:<10} {len(frame):>3} bytes, "
+                        f"encode {encode:>6.0f} ns, decode {decode:>6.0f} ns")
+
+
+def measure(function):
+    """
+    Return: the mean time per call of function, in nanoseconds.
+    """
+    return min(timeit.repeat(function, number=REPEAT, repeat=3)) / REPEAT * 1e9
+
+
+if __name__ == "__main__":
+    run()
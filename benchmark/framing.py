@@ -0,0 +1,66 @@
+import logging
+import socket
+import threading
+import time
+
+import model.protocol as P
+
+logger = logging.getLogger("benchmark_framing")
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.StreamHandler())
+
+MESSAGE = 'T;P=alina,2;10'  # a typical P.construct_turn message
+
+
+def run():
+    report('two writes + MESSAGE_DELAY (before)', measure(tell_legacy, 20))
+    report('single write (after)', measure(tell_single_write, 20000))
+
+
+def tell_legacy(connection: socket.socket, message: str):
+    """The framing Player.tell used before: header, pause, message."""
+    connection.sendall(P.write_header(message).encode())
+    time.sleep(P.MESSAGE_DELAY)
+    connection.sendall(message.encode())
+
+
+def tell_single_write(connection: socket.socket, message: str):
+    connection.sendall(P.write_frame(message))
+
+
+def measure(tell, messages: int):
+    """
+    Send a number of messages over a socket pair with the given tell function, while another thread drains them.
+    Return: the number of messages per second.
+    """
+    server, client = socket.socketpair()
+    expected = messages * len(P.write_frame(MESSAGE))
+    drained = threading.Thread(target=drain, args=(client, expected))
+    drained.start()
+
+    start = time.perf_counter()
+    for _ in range(messages):
+        tell(server, MESSAGE)
+    drained.join()
+    elapsed = time.perf_counter() - start
+
+    server.close()
+    client.close()
+    return messages / elapsed
+
+
+def drain(connection: socket.socket, expected: int):
+    received = 0
+    while received < expected:
+        chunk = connection.recv(65536)
+        if not chunk:
+            return
+        received += len(chunk)
+
+
+def report(name, messages_per_second):
+    logger.info(f"{name}: {messages_per_second:,.0f} messages/sec")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,76 @@
+import logging
+import socket
+import statistics
+import threading
+import time
+
+import model.protocol as P
+from model.player import Player
+from server.lobby_registry import LobbyRegistry
+from server.threads.new_connection_thread import ConnectionHandler
+from test.bots import ScriptedBot
+
+logger = logging.getLogger("benchmark_handshake")
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.StreamHandler())
+
+
+def run():
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(64)
+    lobbies = LobbyRegistry()
+    threading.Thread(target=accept, args=(listener, lobbies), daemon=True).start()
+
+    report('paced (before)', measure(listener.getsockname(), 20))
+    report('acknowledged, READY', measure(listener.getsockname(), 200, pipeline=True))
+    report('pipelined, early record', measure(listener.getsockname(), 200, early_record=True))
+    listener.close()
+
+
+def accept(listener: socket.socket, lobbies: LobbyRegistry):
+    while True:
+        try:
+            connection, _ = listener.accept()
+        except OSError:
+            return
+        threading.Thread(target=ConnectionHandler(Player(connection=connection), lobbies).run, daemon=True).start()
+
+
+def measure(address: tuple, handshakes: int, **bot_options):
+    """
+    Connect a number of ScriptedBots to the server one after the other, each handshake on its own.
+    Return: a list of the times from connecting to receiving ADDING_TO_QUEUE, in milliseconds.
+    """
+    latencies = []
+
+    for index in range(handshakes):
+        start = time.perf_counter()
+        bot = ScriptedBot(socket.create_connection(address), f'pascal{index}', **bot_options)
+        bot.start()
+
+        while queued_at(bot) is None:
+            time.sleep(0.0002)
+        latencies.append((queued_at(bot) - start) * 1000)
+        bot.connection.close()
+    return latencies
+
+
+def queued_at(bot: ScriptedBot):
+    """
+    Return: the time the bot received ADDING_TO_QUEUE, alone or in a BUNDLE. None if it has not yet.
+    """
+    for message, received in zip(list(bot.transcript), list(bot.received_at)):
+        if message == P.ADDING_TO_QUEUE or P.ADDING_TO_QUEUE in (P.decode_bundle(message) or []):
+            return received
+    return None
+
+
+def report(name: str, latencies: list):
+    p99 = statistics.quantiles(latencies, n=100)[98]
+    logger.info(f"{name:>26}: connect -> ADDING_TO_QUEUE median {statistics.median(latencies):.2f} ms, "
+                f"p99 {p99:.2f} ms over {len(latencies)} handshakes")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,81 @@
+import logging
+import string
+import time
+
+from server.hangman import Hangman
+
+logger = logging.getLogger("benchmark_hangman")
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.StreamHandler())
+
+ROUNDS = 2000
+SECRETS = ['hangman', 'concurrency', 'the quick brown fox jumps over the lazy dog', 'a' * 50]
+
+
+def run():
+    for secret in SECRETS:
+        per_game, per_guess = measure(Hangman, secret)
+        linear_per_game, linear_per_guess = measure(LinearHangman, secret)
+        logger.info(f"{len(secret):>2} characters: {per_guess:>5.2f} µs per guess, {per_game:>6.2f} µs per game | "
+                    f"with a masked copy per guess: {linear_per_guess:>5.2f} µs per guess, "
+                    f"{linear_per_game:>6.2f} µs per game")
+
+
+class LinearHangman:
+    """The engine server/hangman.py used before: every guess rebuilds guessed_letters from the whole secret."""
+    UNKNOWN = '*'
+
+    def __init__(self, secret, max_tries=10):
+        self.secret = secret
+        self.max_tries = max_tries
+        self.guessed_letters = [LinearHangman.UNKNOWN] * len(self.secret)
+        self.tries = 0
+
+    def guess(self, letter: str):
+        result = []
+        self.tries += 1
+
+        guessed = [x if x == letter else LinearHangman.UNKNOWN for x in self.secret]
+        guessed = zip(self.guessed_letters, guessed)
+
+        for x, y in guessed:
+            if x == LinearHangman.UNKNOWN and y != LinearHangman.UNKNOWN:
+                result.append(y)
+            else:
+                result.append(x)
+
+        self.guessed_letters = result
+        return letter in self.secret
+
+    @property
+    def has_winner(self):
+        return self.guessed_letters == self.secret
+
+
+def measure(engine, secret: str):
+    """
+    Play ROUNDS games on secret, guessing the alphabet in order and checking for a winner after every guess,
+    the way Game does.
+    Return: a tuple (the mean time per game including setting it up, the mean time per guess), in microseconds.
+    """
+    guesses = 0
+    guessing = 0
+    start = time.perf_counter()
+
+    for _ in range(ROUNDS):
+        hangman = engine(list(secret), max_tries=len(string.ascii_lowercase))
+        started_guessing = time.perf_counter()
+
+        for letter in string.ascii_lowercase:
+            hangman.guess(letter)
+            guesses += 1
+
+            if hangman.has_winner:
+                break
+        guessing += time.perf_counter() - started_guessing
+
+    return (time.perf_counter() - start) / ROUNDS * 1e6, guessing / guesses * 1e6
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,61 @@
+import logging
+import socket
+import statistics
+import time
+
+import model.protocol as P
+from model.player import Player
+from server.lobby_registry import LobbyRegistry
+from server.threads.group_manager_thread import GroupManager
+from test.bots import ScriptedBot
+
+logger = logging.getLogger("benchmark_lobby_start")
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.StreamHandler())
+
+LOBBIES = 20
+
+
+def run():
+    events = []
+    lobbies = LobbyRegistry()
+    manager = GroupManager(lobbies, events.append)
+    manager.start()
+
+    latencies = [measure(lobbies, index) for index in range(LOBBIES)]
+
+    for event in events:
+        event.set()
+    for game in manager.games:
+        game.join(10)
+
+    logger.info(f"last player joining -> GAME_START received: median {statistics.median(latencies):.2f} ms, "
+                f"max {max(latencies):.2f} ms over {LOBBIES} lobbies (the sweep runs every {P.CYCLE_TIMEOUT} s)")
+
+
+def measure(lobbies: LobbyRegistry, index: int):
+    """
+    Fill a lobby for 2 players, and play its game with scripted bots.
+    Return: the time from the last player joining to that player receiving GAME_START, in milliseconds.
+    """
+    bots = []
+    joined = None
+
+    for name in [f'pascal{index}', f'alina{index}']:
+        server_side, client_side = socket.socketpair()
+        bot = ScriptedBot(client_side, name)
+        bot.start()
+        bots.append(bot)
+
+        joined = time.perf_counter()
+        lobbies.place(Player(connection=server_side, name=name))
+
+    last = bots[-1]
+    while P.GAME_START not in last.transcript:
+        time.sleep(0.0005)
+
+    return (last.received_at[last.transcript.index(P.GAME_START)] - joined) * 1000
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,51 @@
+import logging
+import time
+from types import SimpleNamespace
+
+from server.lobby_registry import LobbyRegistry
+
+logger = logging.getLogger("benchmark_matchmaking")
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.StreamHandler())
+
+PLACEMENTS = 2000
+
+
+def run():
+    for open_lobbies in [100, 1000, 10000, 50000]:
+        logger.info(f"{open_lobbies:>6} open lobbies: {measure(open_lobbies):>6.2f} µs per placement, "
+                    f"{measure(open_lobbies, linear_scan):>8.2f} µs with a linear scan")
+
+
+def linear_scan(lobbies: LobbyRegistry, player):
+    """The placement ConnectionHandler._check_available_groups used before: the first group with room."""
+    for group in lobbies.snapshot():
+        if not group.in_game and group.count + 1 <= min(group.min_players, player.preferred_players):
+            return group
+    return None
+
+
+def measure(open_lobbies: int, scan=None):
+    """
+    Fill a registry with open lobbies for 4 players that each hold 1 player, then place PLACEMENTS pairs of players
+    who want to play with 2.
+    Return: the mean time per placement, in microseconds.
+    """
+    lobbies = LobbyRegistry()
+    for index in range(open_lobbies):
+        lobbies.place(SimpleNamespace(name=f'waiting{index}', preferred_players=4))
+
+    players = [SimpleNamespace(name=f'player{index}', preferred_players=2) for index in range(PLACEMENTS)]
+
+    start = time.perf_counter()
+    for player in players:
+        if scan is not None:
+            scan(lobbies, player)
+        lobbies.place(player)
+    elapsed = time.perf_counter() - start
+
+    return elapsed / PLACEMENTS * 1e6
+
+
+if __name__ == "__main__":
+    run()
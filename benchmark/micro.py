@@ -0,0 +1,218 @@
+import argparse
+import datetime
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import string
+import sys
+import timeit
+
+import model.protocol as P
+from model.player import Player
+from server.group import Group
+from server.hangman import Hangman
+
+logger = logging.getLogger("benchmark_micro")
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.StreamHandler())
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'micro.json')
+PROCESSES = 5
+REPEATS = 5
+RUN_TIME = 0.01  # in seconds, the least time a run of a case takes
+THRESHOLD = 0.5  # a case more than 50% slower than its baseline is a regression
+PHRASE = 'the quick brown fox jumps over the lazy dog'
+TURN_UPDATE = [P.construct_correct(True), P.construct_delta(7, 'o', [12, 17, 26, 41]), 'T;P=alina,3;7']
+
+
+class _HeaderSource:
+    """A connection that has the same header waiting every time it is read, for read_header."""
+
+    def __init__(self, message: str):
+        self.header = P.write_header(message).encode()
+
+    def recv(self, size: int, flags=0):
+        return self.header[:size]
+
+
+def cases():
+    """
+    Every microbenchmark, by name: a tuple (function, arguments, operations per call).
+    There is a case for every construct_* and decode_* function in model/protocol.py; add one with every new function.
+    Return: a dict, name -> case.
+    """
+    player = Player(name='pascal', preferred_players=3)
+    header_player = Player(connection=_HeaderSource(P.construct_move(list(PHRASE))))
+    group = Group(min_players=4)
+    group.add([Player(name=name) for name in ('pascal', 'alina', 'ada', 'grace')])
+    choosing, guessing = group.players[1], group.players[3]
+    solved = Hangman(list(PHRASE))
+    for letter in string.ascii_lowercase:
+        solved.guess(letter)
+
+    def guess_alphabet():
+        hangman = Hangman(PHRASE, max_tries=len(string.ascii_lowercase))
+        for letter in string.ascii_lowercase:
+            hangman.guess(letter)
+
+    selected = {
+        'won': (P.won, ([3, 1, 0, 2],), 1),
+        'lost': (P.lost, ([3, 1, 0, 2],), 1),
+        'construct_welcome': (P.construct_welcome, ([P.BINARY],), 1),
+        'construct_capabilities': (P.construct_capabilities, ([P.BINARY],), 1),
+        'construct_continue': (P.construct_continue, ('y',), 1),
+        'construct_max_tries': (P.construct_max_tries, (10,), 1),
+        'construct_choosing_player': (P.construct_choosing_player, (player,), 1),
+        'construct_secret_word': (P.construct_secret_word, ('hangman',), 1),
+        'construct_guess': (P.construct_guess, ('a',), 1),
+        'construct_correct': (P.construct_correct, (True,), 1),
+        'construct_score': (P.construct_score, ([3, 1, 0, 2],), 1),
+        'construct_move': (P.construct_move, (list(PHRASE),), 1),
+        'construct_board': (P.construct_board, (7, list(PHRASE)), 1),
+        'construct_delta': (P.construct_delta, (7, 'o', [12, 17, 26, 41]), 1),
+        'construct_bundle': (P.construct_bundle, (TURN_UPDATE,), 1),
+        'construct_turn': (P.construct_turn, (player, 7), 1),
+        'construct_player': (P.construct_player, (player,), 1),
+        'decode_turn': (P.decode_turn, (['P=pascal,3', '7'],), 1),
+        'decode_split_commands': (P.decode_split_commands, (P.won([3, 1, 0, 2]),), 1),
+        'decode_player': (P.decode_player, ('P=pascal,3',), 1),
+        'decode_capabilities': (P.decode_capabilities, ('CAP=bin',), 1),
+        'decode_guess': (P.decode_guess, ('G=a',), 1),
+        'decode_secret_word': (P.decode_secret_word, ('SEC=hangman',), 1),
+        'decode_max_tries': (P.decode_max_tries, ('MT=10',), 1),
+        'decode_move': (P.decode_move, (P.construct_move(list(PHRASE)),), 1),
+        'decode_board': (P.decode_board, (P.construct_board(7, list(PHRASE)),), 1),
+        'decode_delta': (P.decode_delta, (P.construct_delta(7, 'o', [12, 17, 26, 41]),), 1),
+        'decode_bundle': (P.decode_bundle, (P.construct_bundle(TURN_UPDATE),), 1),
+        'decode_correct': (P.decode_correct, ('C=1',), 1),
+        'decode_continue': (P.decode_continue, ('AR=1',), 1),
+        'decode_answer': (P.decode_answer, ('G=a', P.decode_guess), 1),
+        'write_header': (P.write_header, (P.construct_move(list(PHRASE)),), 1),
+        'read_header': (P.read_header, (header_player,), 1),
+        # includes setting up the engine, spread over the 26 guesses of a game
+        'Hangman.guess': (guess_alphabet, (), len(string.ascii_lowercase)),
+        'Hangman.has_winner': (lambda: solved.has_winner, (), 1),
+        'Group.next_player': (group.next_player, (choosing,), 1),
+        'Group.next_guessing_player': (group.next_guessing_player, (choosing, guessing), 1),
+        'Group.select_first_guessing_player': (group.select_first_guessing_player, (choosing,), 1),
+    }
+
+    missing = [name for name in dir(P) if name.startswith(('construct_', 'decode_')) and name not in selected]
+    if missing:
+        raise ValueError(f"No microbenchmark for {', '.join(missing)}")
+    return selected
+
+
+def measure(function, arguments: tuple, operations=1):
+    """
+    Time function(*arguments): the best of REPEATS runs of at least RUN_TIME each.
+    Return: the time per operation, in nanoseconds.
+    """
+    timer = timeit.Timer('function(*arguments)', globals={'function': function, 'arguments': arguments})
+    number = 1
+    while timer.timeit(number) < RUN_TIME:
+        number *= 2
+    return min(timer.repeat(REPEATS, number)) / number / operations * 1e9
+
+
+def measure_all():
+    """
+    Return: a dict, name -> the nanoseconds per operation of every case.
+    """
+    random.seed(0)  # Group.select_first_guessing_player
+    return {name: measure(*case) for name, case in cases().items()}
+
+
+def collect(processes=PROCESSES):
+    """
+    Run every case in each of a number of fresh interpreters, and keep the best time of each case.
+    A single interpreter is not enough: how fast a case runs depends on where its objects happen to end up in memory,
+    so the timings of one process can be off by half for a few cases, every time it measures them.
+    Return: a dict, ready to be written as JSON: the machine it ran on and the nanoseconds per operation by case.
+    """
+    with multiprocessing.get_context('spawn').Pool(1, maxtasksperchild=1) as pool:  # a new process per task
+        timings = [pool.apply(measure_all) for _ in range(processes)]
+
+    return {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': f'{platform.system()} {platform.machine()}',
+        'processes': processes,
+        'unit': 'ns/op',
+        'results': {name: round(min(timing[name] for timing in timings), 1) for name in timings[0]},
+    }
+
+
+def compare(baseline: dict, current: dict, threshold=THRESHOLD):
+    """
+    Key arguments: baseline and current, two reports of collect().
+                   threshold, the slowdown tolerated, as a fraction of the baseline.
+    Return: a list of tuples (name, baseline ns, current ns, change), one per case slower than the threshold allows.
+    """
+    regressions = []
+
+    for name, now in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            logger.info(f"{name:<36} {now:>9.1f} ns/op (not in the baseline)")
+            continue
+
+        change = now / before - 1
+        flag = 'REGRESSION' if change > threshold else ''
+        logger.info(f"{name:<36} {before:>9.1f} -> {now:>9.1f} ns/op {change:>+7.1%} {flag}")
+
+        if change > threshold:
+            regressions.append((name, before, now, change))
+    return regressions
+
+
+def run(processes=PROCESSES):
+    for name, value in collect(processes)['results'].items():
+        logger.info(f"{name:<36} {value:>9.1f} ns/op")
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Microbenchmarks of the protocol, the Hangman engine and Group.')
+    parser.add_argument('command', nargs='?', choices=['run', 'save', 'compare'], default='run',
+                        help='run: print the timings; save: write them as the baseline; '
+                             'compare: exit with status 1 if a case got slower than the baseline allows, '
+                             'or is not in it')
+    parser.add_argument('--baseline', default=BASELINE, help=f'the baseline file (default: {BASELINE})')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help=f'the slowdown tolerated, as a fraction (default: {THRESHOLD})')
+    parser.add_argument('--processes', type=int, default=PROCESSES,
+                        help=f'the interpreters to measure in, keeping the best time (default: {PROCESSES})')
+    arguments = parser.parse_args(arguments)
+
+    if arguments.command == 'run':
+        run(arguments.processes)
+    elif arguments.command == 'save':
+        report = collect(arguments.processes)
+        os.makedirs(os.path.dirname(os.path.abspath(arguments.baseline)), exist_ok=True)
+        with open(arguments.baseline, 'w') as file:
+            file.write(json.dumps(report, indent=2) + '\n')
+        logger.info(f"Saved {len(report['results'])} timings to {arguments.baseline}")
+    else:
+        with open(arguments.baseline) as file:
+            baseline = json.load(file)
+
+        current = collect(arguments.processes)
+        regressions = compare(baseline, current, arguments.threshold)
+        missing = [name for name in current['results'] if name not in baseline['results']]
+
+        if missing:
+            logger.info(f"{len(missing)} case(s) not in the baseline, save it again: {', '.join(missing)}")
+            return 1
+        if regressions:
+            logger.info(f"{len(regressions)} regression(s) beyond {arguments.threshold:.0%}: "
+                        f"{', '.join(name for name, *_ in regressions)}")
+            return 1
+        logger.info(f"No regressions beyond {arguments.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import cProfile
+import logging
+import pstats
+import sys
+import time
+
+from model.logger import Logger
+from test.harness import play_game
+
+logger = logging.getLogger("benchmark_simulation")
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.StreamHandler())
+
+GAMES = 2000
+SAMPLING = 100  # 1 in so many wire messages logged, as with app_server.py --log-sampling 100
+
+
+def run():
+    logger.info(f"in-process games, virtual clock: {measure():>7.0f} games/s with logging, "
+                f"{measure(sampling=SAMPLING):>7.0f} games/s sampling 1 in {SAMPLING} wire messages, "
+                f"{measure(quiet=True):>7.0f} games/s without")
+
+
+def measure(quiet=False, sampling=1):
+    """
+    Play GAMES two-player games of one round through the test harness: no sockets, no real pauses.
+    :param quiet: log nothing below warnings.
+    :param sampling: log 1 in so many wire messages, see Logger.set_sampling.
+    Return: the number of games played per second.
+    """
+    if quiet:
+        logging.disable(logging.INFO)
+    Logger.set_sampling(sampling)
+
+    try:
+        start = time.perf_counter()
+        for _ in range(GAMES):
+            play_game()
+        return GAMES / (time.perf_counter() - start)
+    finally:
+        logging.disable(logging.NOTSET)
+        Logger.set_sampling(1)
+        drain_logs()
+
+
+def drain_logs():
+    """
+    Wait for the listener threads to write every record queued, so that they do not slow down the next measurement.
+    """
+    while any(not handler.queue.empty() for handler in list(Logger.file_handlers.values())):
+        time.sleep(0.01)
+
+
+def profile(limit=25):
+    """
+    Print where the server spends its time playing games, without the network or pauses in the way.
+    """
+    profiler = cProfile.Profile()
+    logging.disable(logging.INFO)
+    profiler.runcall(lambda: [play_game() for _ in range(GAMES)])
+    logging.disable(logging.NOTSET)
+    pstats.Stats(profiler).sort_stats('cumulative').print_stats(limit)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ['profile']:
+        profile()
+    else:
+        run()
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+from threading import Event
+from threading import Thread
+
+import model.protocol as P
+from server.hangman_server import HangmanServer
+from test.bots import ScriptedBot
+
+logger = logging.getLogger("benchmark_workers")
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.StreamHandler())
+
+HOST = '127.0.0.1'
+CONNECTIONS = 500
+CONCURRENCY = 100
+GAMES = 50
+NEVER_FULL = 1000  # a lobby size no handshake benchmark will fill, so no games start
+BACKLOG = 1024  # the default of 5 drops most of CONCURRENCY simultaneous connects
+
+
+def run():
+    if not hasattr(socket, 'SO_REUSEPORT'):
+        logger.info("SO_REUSEPORT is not supported on this platform: skipping the workers benchmark")
+        return
+
+    for workers in sorted({1, 2, os.cpu_count() or 1}):
+        port = free_port()
+        shutdown = Event()
+        server = HangmanServer(port=port, max_connections=BACKLOG, workers=workers)
+        supervisor = Thread(target=server.supervise, args=(shutdown,))
+        supervisor.start()
+        wait_until_serving(port)
+
+        connections_per_second = asyncio.run(measure_handshakes(port))
+        games_per_second, concurrent_games = measure_games(port, workers)
+
+        shutdown.set()
+        supervisor.join()
+        logger.info(f"{workers} workers: {connections_per_second:>6.0f} connections/s, "
+                    f"{games_per_second:>5.1f} games/s, up to {concurrent_games} games at once "
+                    f"({os.cpu_count()} cores)")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def wait_until_serving(port: int):
+    while True:
+        try:
+            asyncio.run(handshake(port, 'probe'))
+            break
+        except OSError:
+            time.sleep(0.1)
+    time.sleep(1)  # give the other workers time to bind as well
+
+
+async def read_message(reader: asyncio.StreamReader):
+    length = int((await reader.readexactly(P.HEADER)).decode())
+    return (await reader.readexactly(length)).decode()
+
+
+async def handshake(port: int, name: str):
+    """
+    Connect, and answer the server until it puts the player in the queue.
+    """
+    reader, writer = await asyncio.open_connection(HOST, port)
+
+    try:
+        while True:
+            message = await read_message(reader)
+
+            if message == P.REQUEST_PLAYER:
+                writer.write(P.write_frame(f'{P.PLAYER}{P.ASSIGNMENT}{name}{P.LIST_DELIMITER}{NEVER_FULL}'))
+            elif message == P.ADDING_TO_QUEUE:
+                return
+    finally:
+        writer.close()
+
+
+async def measure_handshakes(port: int):
+    """
+    Complete CONNECTIONS handshakes, CONCURRENCY at a time.
+    Return: the number of handshakes completed per second.
+    """
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def limited(index):
+        async with semaphore:
+            await handshake(port, f'player{index}')
+
+    start = time.perf_counter()
+    await asyncio.gather(*[limited(index) for index in range(CONNECTIONS)])
+    return CONNECTIONS / (time.perf_counter() - start)
+
+
+def measure_games(port: int, workers: int):
+    """
+    Have 2 * GAMES scripted bots connect at once, and play a game in pairs.
+    The kernel spreads the bots over the workers, and lobbies are per worker: a bot left alone on its worker does not
+    get to play, and is disconnected once the others are done.
+    Return: a tuple (games finished per second, the most games in progress at the same time).
+    """
+    start = time.perf_counter()
+    bots = [ScriptedBot(socket.create_connection((HOST, port)), f'bot{index}') for index in range(2 * GAMES)]
+    [bot.start() for bot in bots]
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline and sum(not bot.is_alive() for bot in bots) < len(bots) - workers:
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - start
+
+    for bot in bots:
+        bot.connection.close()
+
+    played = [bot for bot in bots if P.GAME_START in bot.transcript and not bot.is_alive()]
+    return len(played) / 2 / elapsed, most_overlapping(played) // 2
+
+
+def most_overlapping(bots: list):
+    """
+    Return: the most bots playing at the same time, from GAME_START to their last message.
+    """
+    edges = []
+    for bot in bots:
+        edges.append((bot.received_at[bot.transcript.index(P.GAME_START)], 1))
+        edges.append((bot.received_at[-1], -1))
+
+    playing, most = 0, 0
+    for _, change in sorted(edges):
+        playing += change
+        most = max(most, playing)
+    return most
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,22 @@
+from benchmark.broadcast import run as run_broadcast_benchmark
+from benchmark.codec import run as run_codec_benchmark
+from benchmark.framing import run as run_framing_benchmark
+from benchmark.hangman import run as run_hangman_benchmark
+from benchmark.handshake import run as run_handshake_benchmark
+from benchmark.lobby_start import run as run_lobby_start_benchmark
+from benchmark.matchmaking import run as run_matchmaking_benchmark
+from benchmark.micro import run as run_micro_benchmark
+from benchmark.simulation import run as run_simulation_benchmark
+from benchmark.workers import run as run_workers_benchmark
+
+if __name__ == "__main__":
+    run_micro_benchmark()
+    run_framing_benchmark()
+    run_codec_benchmark()
+    run_broadcast_benchmark()
+    run_matchmaking_benchmark()
+    run_lobby_start_benchmark()
+    run_handshake_benchmark()
+    run_hangman_benchmark()
+    run_simulation_benchmark()
+    run_workers_benchmark()
@@ -16,11 +16,14 @@ class HangmanClient:
         P.REQUEST_PLAYER: I.send_player,
         P.GAME_START: I.start,
         P.MOVE_MADE: I.process_move,
+        P.BOARD: I.process_board,
+        P.BOARD_DELTA: I.process_delta,
         P.YOUR_TURN: I.my_turn,
         P.REQUEST_MAX_TRIES: I.max_tries,
         P.TURN: I.player_turn,
         P.CORRECT: I.correct_guess,
         P.FORCE_DISCONNECT: I.disconnect,
+        P.BUSY: I.busy,
         P.ADDING_TO_QUEUE: I.add_to_queue,
         P.INVALID_INPUT: lambda **kwargs: (True, 'Invalid input, server will re-send request...'),
         P.HEARTBEAT: I.heartbeat,
@@ -81,30 +84,17 @@ class HangmanClient:
 
         while listen:
             try:
-                data = self.player.listen()
+                frames = self.player.receive()
 
-                if not data:
+                if frames is None:
                     self.app_logger.warn('Server disconnected!')
                     break
 
-                commands = P.decode_split_commands(data)
+                for data in frames:
+                    listen = self._handle_server_message(data, kwargs)
 
-                if len(commands) > 2:
-                    kwargs['payload'] = commands[1:]
-                elif len(commands) > 1:
-                    kwargs['payload'] = commands[1]
-                elif len(commands) == 1:
-                    kwargs['payload'] = commands[0]
-                self.app_logger.info(f'Received from server: {data}. src={SRC}/{method}:115')
-
-                command = commands[0].split(P.ASSIGNMENT)[0]
-                to_execute = self._interpret(command)
-                view = to_execute(**kwargs)
-
-                if view[1] is not None:
-                    self.communication_logger.info(view[1])
-
-                listen = view[0]
+                    if not listen:
+                        break
             except OSError:
                 self.app_logger.critical(f'Could not read from server... src={SRC}/{method}:107')
                 self.communication_logger.critical(I.CONNECT_FAILED)
@@ -112,6 +102,47 @@ class HangmanClient:
                 listen = False
         self.app_logger.info('Disconnected from server')
 
+    def _handle_server_message(self, data: str, kwargs: dict):
+        method = '_handle_server_message'
+
+        if data.startswith(P.BUNDLE + P.ASSIGNMENT):
+            return self._handle_bundle(data, kwargs)
+        commands = P.decode_split_commands(data)
+
+        if len(commands) > 2:
+            kwargs['payload'] = commands[1:]
+        elif len(commands) > 1:
+            kwargs['payload'] = commands[1]
+        elif len(commands) == 1:
+            kwargs['payload'] = commands[0]
+        self.app_logger.info(f'Received from server: {data}. src={SRC}/{method}:125')
+
+        command = commands[0].split(P.ASSIGNMENT)[0]
+        to_execute = self._interpret(command)
+        view = to_execute(**kwargs)
+
+        if view[1] is not None:
+            self.communication_logger.info(view[1])
+
+        return view[0]
+
+    def _handle_bundle(self, data: str, kwargs: dict):
+        """
+        Handle every message of a BUNDLE in turn, as if they had come in frames of their own.
+        Return: False once a message ends the connection.
+        """
+        messages = P.decode_bundle(data)
+
+        if messages is None:
+            view = self._protocol_not_respected(**kwargs)
+            self.communication_logger.info(view[1])
+            return view[0]
+
+        for message in messages:
+            if not self._handle_server_message(message, kwargs):
+                return False
+        return True
+
     def set_remote_from_input(self):
         remote, port = self._build_connection_from_input()
         self.remote = remote
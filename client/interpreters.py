@@ -1,11 +1,15 @@
 from logging import Logger
 import socket as S
 
+from model.codec import negotiated_codec
 from model.player import Player
 import model.protocol as P
 
 max_length = 25
 picked_length = 10
+capabilities = [P.BINARY, P.PIPELINE, P.DELTA, P.FUSED]
+board = []  # the word as last shown, kept up to date by BOARD_DELTA
+board_sequence = None  # the tries the board was last updated at, None until the first BOARD
 
 WELCOME_MESSAGE = 'Successfully connected to the server!'
 GAME_START = 'Game is starting!'
@@ -20,6 +24,7 @@ CORRECT_GUESS = 'Your guess was correct!'
 INCORRECT_GUESS = 'Your guess was incorrect!'
 INCORRECT_SERVER_FORMAT = 'Could not understand the server. Disconnecting...'
 FORCE_DISCONNECT = 'The game is over. Disconnecting and shutting down...'
+SERVER_BUSY = 'The server is too busy to take you. Please try again later.'
 ADD_TO_QUEUE = 'You are being added to a game lobby.'
 WIN_MESSAGE = 'You won! Asking players if they want to play another round...'
 LOST_MESSAGE = 'Sorry, you lost! Better luck next time. Asking players if they want to play another round...'
@@ -28,6 +33,11 @@ OTHER_PLAYER_CONTINUE = 'Getting answers from other players...'
 
 
 def welcome(**kwargs):
+    player: Player = kwargs.get('player', None)
+    player.capabilities = set(P.decode_capabilities(kwargs.get('payload', ''))) & set(capabilities)
+
+    if P.PIPELINE in player.capabilities:
+        player.tell(P.READY)  # the client reads every frame received, so the server need not wait
     return True, WELCOME_MESSAGE
 
 
@@ -49,12 +59,19 @@ def send_player(**kwargs):
     player: Player = kwargs.get('player', None)
     to_send = P.construct_player(player)
 
+    if player.capabilities:
+        to_send += P.DELIM + P.construct_capabilities(sorted(player.capabilities))
+
     try:
         player.tell(to_send)
     except S.error as error:
         kwargs.get('file_logger', None).error(error)
         player.get_connection.close()
         return False, CONNECT_FAILED
+
+    codec = negotiated_codec(player.capabilities)
+    if codec is not player.codec:
+        player.set_codec(codec)
     return True, None
 
 
@@ -164,6 +181,44 @@ def process_move(**kwargs):
     return True, to_display
 
 
+def process_board(**kwargs):
+    global board, board_sequence
+    decoded = P.decode_board(kwargs.get('payload', None))
+
+    if decoded is None:
+        kwargs.get('player', None).get_connection.close()
+        return False, INCORRECT_SERVER_FORMAT
+
+    board_sequence, board = decoded
+    return True, 'Word: ' + ' '.join(board)
+
+
+def process_delta(**kwargs):
+    global board_sequence
+    decoded = P.decode_delta(kwargs.get('payload', None))
+
+    if decoded is None:
+        kwargs.get('player', None).get_connection.close()
+        return False, INCORRECT_SERVER_FORMAT
+
+    sequence, letter, positions = decoded
+
+    if board_sequence is None or sequence <= board_sequence:
+        return True, None  # already shown, e.g. by a BOARD asked for after a gap
+    if sequence != board_sequence + 1:
+        board_sequence = None  # missed an update: ignore the next ones until the whole board arrives
+        kwargs.get('player', None).tell(P.REQUEST_BOARD)
+        return True, None
+
+    board_sequence = sequence
+    for position in positions:
+        if position >= len(board):
+            kwargs.get('player', None).get_connection.close()
+            return False, INCORRECT_SERVER_FORMAT
+        board[position] = letter
+    return True, 'Word: ' + ' '.join(board)
+
+
 def correct_guess(**kwargs):
     payload = kwargs.get('payload', None)
     correct = P.decode_correct(payload)
@@ -184,6 +239,13 @@ def disconnect(**kwargs):
     return False, FORCE_DISCONNECT
 
 
+def busy(**kwargs):
+    socket = kwargs.get('player').get_connection
+    socket.close()
+
+    return False, SERVER_BUSY
+
+
 def heartbeat(**kwargs):
     logger = kwargs.get('file_logger', None)
     logger.info('Received heartbeat')
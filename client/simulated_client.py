@@ -0,0 +1,271 @@
+import asyncio
+import math
+import random
+import string
+import time
+
+import model.protocol as P
+from model.codec import TextCodec
+from model.codec import negotiated_codec
+
+SRC = 'client/simulated_client.py'
+
+SECRETS = ['hangman', 'socket', 'thread', 'protocol', 'latency', 'python', 'server', 'client']
+
+
+class LoadStats:
+    """
+    What a crowd of SimulatedClients measured, shared between them.
+    Latencies are keyed by the command of the message received: the time from the client's last message (or from
+    connecting, for the first one) to the first message the server sent after it.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.handshakes = []  # time.perf_counter() per ADDING_TO_QUEUE received
+        self.results = []  # time.perf_counter() per WIN or LOSS received
+        self.latencies = {}  # command -> list of seconds
+        self.failed_connections = 0
+        self.shed_connections = 0  # turned away by the server with BUSY
+        self.invalid_inputs = 0
+
+    def record_latency(self, command: str, seconds: float):
+        self.latencies.setdefault(command, []).append(seconds)
+
+    def report(self, players_per_game: int):
+        """
+        Return: a dict, ready to be written as JSON, summarising the run.
+        """
+        def per_second(count: int, times: list):
+            elapsed = max(times) - self.started if times else 0
+            return round(count / elapsed, 2) if elapsed > 0 else 0.0
+
+        games = len(self.results) // players_per_game
+        return {
+            'connections': {
+                'completed': len(self.handshakes),
+                'failed': self.failed_connections,
+                'shed': self.shed_connections,
+                'per_second': per_second(len(self.handshakes), self.handshakes),
+            },
+            'games': {
+                'completed': games,
+                'per_second': per_second(games, self.results),
+            },
+            'invalid_inputs': self.invalid_inputs,
+            'latency_ms': {command: summarise(values) for command, values in sorted(self.latencies.items())},
+        }
+
+
+def summarise(seconds: list):
+    values = sorted(seconds)
+    return {
+        'count': len(values),
+        'p50': round(percentile(values, 0.50) * 1000, 3),
+        'p99': round(percentile(values, 0.99) * 1000, 3),
+    }
+
+
+def percentile(values: list, fraction: float):
+    """
+    @requires values is sorted and not empty
+    Return: the nearest-rank percentile of values.
+    """
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+class SimulatedClient:
+    """
+    A headless client for load tests, speaking the same protocol as HangmanClient without ever calling input().
+    It answers every prompt of the server on its own, after an optional think time, and records in a LoadStats how
+    long the server took to answer it.
+    """
+    READ_SIZE = 4096
+    CAPABILITIES = [P.BINARY, P.PIPELINE, P.DELTA, P.FUSED]
+
+    def __init__(self, name: str, stats: LoadStats, preferred_players=2, rounds=1, think_time=0.0, max_tries=10,
+                 binary=True, pipeline=True, delta=True, fused=True, early_record=True, seed=None):
+        """
+        Initialise the client.
+        :param name: the name to play under.
+        :param stats: the LoadStats to record measurements in.
+        :param preferred_players: the size of the lobby to join.
+        :param rounds: the number of rounds to play before declining another one.
+        :param think_time: the mean time in seconds to wait before answering a prompt; the actual time is drawn
+                           uniformly between half and one and a half times as long.
+        :param max_tries: the number of tries to give the others when choosing the word.
+        :param binary: accept the binary codec if the server offers it.
+        :param pipeline: accept PIPELINE if the server offers it, rather than being paced like a human player.
+        :param delta: accept DELTA if the server offers it, keeping the board rather than being sent it every turn.
+        :param fused: accept FUSED if the server offers it, being sent the updates of a turn in one frame.
+        :param early_record: send the player record as soon as connected, rather than waiting to be asked for it.
+        :param seed: seed for the choice of secrets and guesses, for reproducible runs.
+        """
+        self.name = name
+        self.stats = stats
+        self.preferred_players = preferred_players
+        self.rounds = rounds
+        self.think_time = think_time
+        self.max_tries = max_tries
+        self.binary = binary
+        self.pipeline = pipeline
+        self.delta = delta
+        self.fused = fused
+        self.early_record = early_record
+        self.board_sequence = None  # the tries of the last board update applied, see client/interpreters.py
+        self.random = random.Random(seed)
+        self.codec = TextCodec
+        self.offered = []
+        self.guesses = []
+        self.rounds_played = 0
+        self.reader = None
+        self.writer = None
+        self.buffer = bytearray()
+        self.last_sent = None  # time.perf_counter() of the last message sent, until the next one is received
+
+    def __repr__(self):
+        return f"<SimulatedClient name={self.name} />"
+
+    async def run(self, host: str, port: int):
+        """
+        Connect and play until the server disconnects the client.
+        :return: None
+        """
+        self.last_sent = time.perf_counter()
+
+        try:
+            self.reader, self.writer = await asyncio.open_connection(host, port)
+        except OSError:
+            self.stats.failed_connections += 1
+            return
+
+        try:
+            if self.early_record:
+                self.offered = list(SimulatedClient.CAPABILITIES)  # the server keeps those it offers
+                await self.send_player(switch_codec=False)
+
+            while True:
+                message = await self.next_message()
+
+                if message is None or not await self.answer(message):
+                    break
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            self.writer.close()
+
+    async def next_message(self):
+        """
+        Return: the next message from the server, or None once it closed the connection.
+        """
+        while True:
+            view = memoryview(self.buffer)
+            message, frame_end = self.codec.parse_frame(self.buffer, view, 0, len(self.buffer))
+            view.release()
+
+            if message is not None:
+                del self.buffer[:frame_end]
+                break
+
+            data = await self.reader.read(SimulatedClient.READ_SIZE)
+            if not data:
+                return None
+            self.buffer += data
+
+        if self.last_sent is not None:
+            command = message.partition(P.DELIM)[0].partition(P.ASSIGNMENT)[0]
+            self.stats.record_latency(command, time.perf_counter() - self.last_sent)
+            self.last_sent = None
+        return message
+
+    async def tell(self, message: str, think=True):
+        if think and self.think_time:
+            await asyncio.sleep(self.random.uniform(0.5, 1.5) * self.think_time)
+
+        self.writer.write(self.codec.encode(message))
+        await self.writer.drain()
+        self.last_sent = time.perf_counter()
+
+    async def answer(self, message: str):
+        """
+        Respond to a message of the server, the way a player would.
+        Return: False once the server disconnected the client.
+        """
+        if message.startswith(P.BUNDLE + P.ASSIGNMENT):
+            for bundled in P.decode_bundle(message) or []:
+                if not await self.answer(bundled):
+                    return False
+            return True
+
+        commands = P.decode_split_commands(message)
+        command = commands[0].partition(P.ASSIGNMENT)[0]
+
+        if command == P.WELCOME:
+            self.offered = P.decode_capabilities(commands[1]) if len(commands) > 1 else []
+
+            if self.early_record:
+                self.codec = negotiated_codec(self.accepted())  # the server switches once it read the record
+            elif self.pipeline and P.PIPELINE in self.offered:
+                await self.tell(P.READY, think=False)
+        elif command == P.REQUEST_PLAYER:
+            await self.send_player()
+        elif command == P.ADDING_TO_QUEUE:
+            self.stats.handshakes.append(time.perf_counter())
+        elif command == P.GAME_START:
+            self.guesses = self.random.sample(string.ascii_lowercase, len(string.ascii_lowercase))
+        elif command == P.REQUEST_MAX_TRIES:
+            await self.tell(P.construct_max_tries(self.max_tries))
+        elif command == P.YOUR_TURN:
+            await self.tell(P.construct_secret_word(self.random.choice(SECRETS)))
+        elif command == P.TURN:
+            turn = P.decode_turn(commands[1:])
+
+            if turn is not None and turn[0] == self.name:
+                await self.tell(P.construct_guess(self.guesses.pop() if self.guesses else 'a')[1])
+        elif command == P.BOARD:
+            board = P.decode_board(commands[0])
+            self.board_sequence = board[0] if board is not None else None
+        elif command == P.BOARD_DELTA:
+            delta = P.decode_delta(commands[0])
+
+            if delta is not None and self.board_sequence is not None and delta[0] > self.board_sequence:
+                if delta[0] == self.board_sequence + 1:
+                    self.board_sequence = delta[0]
+                else:
+                    self.board_sequence = None
+                    await self.tell(P.REQUEST_BOARD, think=False)
+        elif command in (P.WIN, P.LOSS):
+            self.stats.results.append(time.perf_counter())
+        elif command == P.CONTINUE_PLAYING:
+            self.rounds_played += 1
+            await self.tell(P.construct_continue('y' if self.rounds_played < self.rounds else 'n'))
+        elif message == P.INVALID_INPUT:
+            self.stats.invalid_inputs += 1
+        elif command == P.FORCE_DISCONNECT:
+            return False
+        elif command == P.BUSY:
+            self.stats.shed_connections += 1
+            return False
+        return True
+
+    def accepted(self):
+        """
+        Return: the capabilities offered that the client wants.
+        """
+        wanted = {P.BINARY: self.binary, P.PIPELINE: self.pipeline, P.DELTA: self.delta, P.FUSED: self.fused}
+        return [capability for capability in self.offered if wanted.get(capability)]
+
+    async def send_player(self, switch_codec=True):
+        """
+        :param switch_codec: switch to the codec agreed on right after sending the record. A record sent early does
+                             not know yet what the server offers: the switch then waits for WELCOME.
+        """
+        record = f'{P.PLAYER}{P.ASSIGNMENT}{self.name}{P.LIST_DELIMITER}{self.preferred_players}'
+        accepted = self.accepted()
+
+        if accepted:
+            record += P.DELIM + P.construct_capabilities(accepted)
+
+        await self.tell(record, think=False)
+        if switch_codec:
+            self.codec = negotiated_codec(accepted)
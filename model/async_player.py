@@ -0,0 +1,146 @@
+import asyncio
+
+import model.protocol as P
+from model.codec import TextCodec
+from model.logger import Logger
+import model.metrics as M
+import model.outbound as O
+
+SRC = "model/async_player.py"
+
+
+class AsyncPlayer:
+    """
+    The asyncio counterpart of Player.
+    Wraps a StreamReader/StreamWriter pair instead of a blocking socket, so thousands of idle players can wait
+    on a single event loop. All players share one logger to keep the memory per connection flat.
+    Sends do not wait for the client to read: the transport's buffer is the connection's outbound queue, written as
+    one send whenever the socket is writable. A client letting more than max_buffered bytes pile up is disconnected.
+    """
+    logger = Logger.create_wire_logger('ASYNC_PLAYER')
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, name="new_player",
+                 preferred_players=2, max_buffered=O.MAX_BYTES):
+        self.reader = reader
+        self.writer = writer
+        self.max_buffered = max_buffered
+        self.score = 0
+        self.name = name
+        self.preferred_players = preferred_players
+        self.codec = TextCodec
+        self.capabilities = set()
+        self.queued_since = None  # time.perf_counter() when placed in a lobby
+        self.pending_length = None  # the length read from the header of a message whose body did not arrive yet
+        self.closed = False
+
+    def __repr__(self):
+        return f"<Player name={self.name}/>"
+
+    def __eq__(self, value):
+        if isinstance(value, AsyncPlayer):
+            return self.name == value.name
+        return False
+
+    @property
+    def peer(self):
+        return self.writer.get_extra_info('peername')
+
+    @property
+    def is_connected(self):
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def increase_score(self, value=1):
+        self.logger.info("%s Increasing score by %s. src=%s/increase_score:40", self, value, SRC)
+        self.score += value
+
+    def set_name(self, value: str):
+        self.logger.info("%s Setting name to %s. src=%s/set_name:44", self, value, SRC)
+        self.name = value
+
+    async def tell(self, message: str):
+        self.logger.info("%s Sending: %s. src=%s/tell:48", self, message, SRC)
+        frame = self.codec.encode(message)
+        M.record_sent(message, len(frame))
+        await self.send(frame)
+
+    async def send(self, frame: bytes):
+        """
+        Send an already encoded frame, e.g. one shared between the recipients of a broadcast.
+        Never waits for the client: one that is more than max_buffered bytes behind is disconnected instead.
+        """
+        if self.writer.is_closing():
+            return
+
+        try:
+            self.writer.write(frame)
+        except (ConnectionError, OSError) as error:
+            self.logger.error('%s Could not write to client! %s', self, error)
+            return
+
+        if self.writer.transport.get_write_buffer_size() > self.max_buffered:
+            self.logger.warning('%s Too slow to keep up. Disconnecting... src=%s/send:76', self, SRC)
+            M.OUTBOUND_OVERFLOWS.inc(1, O.DISCONNECT)
+            self.writer.transport.abort()
+
+    async def listen(self, timeout=None):
+        """
+        Wait for the next message.
+        :param timeout: in seconds, the longest to wait for it. Default = None, waiting as long as it takes.
+        Return: the message, or None if the connection was closed or is corrupt.
+        Raises asyncio.TimeoutError if no complete message arrived within timeout. A message cut in two by the
+        timeout is returned whole by the next call: StreamReader.readexactly only takes the bytes once all arrived,
+        and a header already read is kept in pending_length.
+        """
+        if timeout is None:
+            return await self._listen()
+        return await asyncio.wait_for(self._listen(), timeout)
+
+    async def _listen(self):
+        try:
+            if self.pending_length is None:
+                header = await self.reader.readexactly(P.HEADER)
+                self.pending_length = int(header.decode())
+            length = self.pending_length
+            response = (await self.reader.readexactly(length)).decode()
+            self.pending_length = None
+            self.logger.info("%s Received: %s. src=%s/listen:60", self, response, SRC)
+            M.BYTES_RECEIVED.inc(P.HEADER + length)
+            M.record_received(response)
+            return response
+        except (asyncio.IncompleteReadError, ConnectionError, OSError, ValueError):
+            self.logger.error('Could not read from client!')
+
+    async def heartbeat(self):
+        """
+        Send a heartbeat, the asyncio equivalent of Player.is_connected.
+        :return: bool, True if the player is still reachable.
+        """
+        if not self.is_connected:
+            return False
+
+        await self.tell(P.HEARTBEAT)
+        return self.is_connected
+
+    async def play_again(self, timeout=None):
+        """
+        Ask the player whether to play again.
+        :param timeout: in seconds, the longest to wait for the answer, see listen.
+        Return: True if they answered yes.
+        """
+        await self.tell(P.CONTINUE_PLAYING)
+        response = await self.listen(timeout)
+
+        if response is None:
+            return False
+        return P.decode_continue(response)
+
+    async def disconnect(self):
+        if not self.writer.is_closing():
+            await self.tell(P.FORCE_DISCONNECT)
+        self.close()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            M.CONNECTIONS.dec()
+        self.writer.close()
@@ -0,0 +1,41 @@
+import time
+from threading import Lock
+
+
+class SystemClock:
+    """The real clock: time passes on its own, and sleeping blocks the calling thread."""
+
+    @staticmethod
+    def now():
+        return time.monotonic()
+
+    @staticmethod
+    def sleep(seconds: float):
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    A clock for tests and simulations: time only passes when someone sleeps, and sleeping returns immediately.
+    Code written against a clock runs its pauses and timeouts in virtual time, without waiting for them.
+    """
+
+    def __init__(self, start=0.0):
+        self.time = start
+        self.lock = Lock()
+
+    def __repr__(self):
+        return f"<VirtualClock time={self.time} />"
+
+    def now(self):
+        return self.time
+
+    def sleep(self, seconds: float):
+        self.advance(seconds)
+
+    def advance(self, seconds: float):
+        with self.lock:
+            self.time += max(0.0, seconds)
+
+
+SYSTEM_CLOCK = SystemClock()
@@ -0,0 +1,147 @@
+import model.protocol as P
+
+SRC = "model/codec.py"
+
+
+class TextCodec:
+    """
+    The original framing: a HEADER-byte ASCII length header followed by the message as text.
+    Every client understands it, so every connection starts out with it.
+    """
+    NAME = 'text'
+
+    @staticmethod
+    def encode(message: str):
+        """
+        Return: the frame for message, as bytes.
+        """
+        return P.write_frame(message)
+
+    @staticmethod
+    def parse_frame(buffer: bytearray, view: memoryview, start: int, end: int):
+        """
+        Parse one frame from buffer[start:end].
+        Return: a tuple (message, frame_end) if a complete frame is available.
+                Otherwise a tuple (None, needed), with needed the number of bytes from start the frame will take
+                as far as is known so far.
+        Raises ValueError on a malformed header.
+        """
+        if end - start < P.HEADER:
+            return None, P.HEADER
+
+        length = int(buffer[start:start + P.HEADER])
+        frame_end = start + P.HEADER + length
+
+        if frame_end > end:
+            return None, P.HEADER + length
+
+        return str(view[start + P.HEADER:frame_end], 'utf-8'), frame_end
+
+
+class BinaryCodec:
+    """
+    A compact framing, negotiated at handshake with the P.BINARY capability.
+    A frame is a varint length followed by a one-byte opcode for the message's command and the rest of the message.
+    The remainder (e.g. ';P=alina,2;10' for a TURN) stays text, so every decode_* function in model/protocol.py
+    keeps working on decoded messages. Opcode 0 carries a message with an unknown command verbatim.
+    Frames of constant messages such as HEARTBEAT and GAME_START are encoded once, up front.
+    """
+    NAME = P.BINARY
+    RAW = 0
+    COMMANDS = [
+        '',  # RAW
+        P.WELCOME, P.REQUEST_PLAYER, P.REQUEST_MAX_TRIES, P.ADDING_TO_QUEUE, P.GAME_START, P.YOUR_TURN, P.TURN,
+        P.CORRECT, P.MOVE_MADE, P.SCORE, P.INVALID_INPUT.split(P.ASSIGNMENT)[0], P.FORCE_DISCONNECT, P.HEARTBEAT,
+        P.CHOOSING_PLAYER, P.CONTINUE_PLAYING, P.WIN, P.LOSS, P.PLAYER, P.GUESS, P.SECRET, P.MAX_TRIES,
+        P.CAPABILITIES, P.BOARD, P.BOARD_DELTA, P.REQUEST_BOARD, P.BUNDLE,
+    ]
+    OPCODES = {command: opcode for opcode, command in enumerate(COMMANDS)}
+
+    @staticmethod
+    def encode(message: str):
+        """
+        Return: the frame for message, as bytes.
+        """
+        frame = CONSTANT_FRAMES.get(message)
+
+        if frame is not None:
+            return frame
+
+        return BinaryCodec._encode(message)
+
+    @staticmethod
+    def _encode(message: str):
+        command = message.partition(P.DELIM)[0].partition(P.ASSIGNMENT)[0]
+        opcode = BinaryCodec.OPCODES.get(command)
+
+        if opcode is None:
+            opcode, command = BinaryCodec.RAW, ''
+
+        body = message[len(command):].encode()
+        length = len(body) + 1
+
+        if length < 0x80:
+            return bytes((length, opcode)) + body
+        return BinaryCodec.encode_varint(length) + bytes((opcode,)) + body
+
+    @staticmethod
+    def parse_frame(buffer: bytearray, view: memoryview, start: int, end: int):
+        """
+        Parse one frame from buffer[start:end].
+        Return: a tuple (message, frame_end) if a complete frame is available.
+                Otherwise a tuple (None, needed), with needed the number of bytes from start the frame will take
+                as far as is known so far.
+        Raises ValueError on an unknown opcode.
+        """
+        length, shift, position = 0, 0, start
+
+        while True:
+            if position == end:
+                return None, position - start + 1
+
+            byte = buffer[position]
+            position += 1
+            length |= (byte & 0x7F) << shift
+
+            if byte < 0x80:
+                break
+            shift += 7
+
+        frame_end = position + length
+
+        if frame_end > end:
+            return None, frame_end - start
+
+        try:
+            command = BinaryCodec.COMMANDS[buffer[position]]
+        except IndexError:
+            raise ValueError(f'Unknown opcode: {buffer[position]}')
+
+        return command + str(view[position + 1:frame_end], 'utf-8'), frame_end
+
+    @staticmethod
+    def encode_varint(value: int):
+        encoded = bytearray()
+
+        while value >= 0x80:
+            encoded.append((value & 0x7F) | 0x80)
+            value >>= 7
+        encoded.append(value)
+
+        return bytes(encoded)
+
+
+CONSTANT_FRAMES = {message: BinaryCodec._encode(message) for message in [
+    P.WELCOME, P.REQUEST_PLAYER, P.REQUEST_MAX_TRIES, P.ADDING_TO_QUEUE, P.GAME_START, P.YOUR_TURN,
+    P.INVALID_INPUT, P.FORCE_DISCONNECT, P.HEARTBEAT, P.CONTINUE_PLAYING, P.REQUEST_BOARD,
+    P.construct_correct(True), P.construct_correct(False),
+]}
+
+
+def negotiated_codec(capabilities):
+    """
+    Return: the codec to use for a connection, given the capabilities both sides agreed on.
+    """
+    if P.BINARY in capabilities:
+        return BinaryCodec
+    return TextCodec
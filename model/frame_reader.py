@@ -0,0 +1,100 @@
+from collections import deque
+from socket import socket
+
+from model.codec import TextCodec
+import model.metrics as M
+
+SRC = "model/frame_reader.py"
+
+
+class FrameReader:
+    """
+    Reads frames from a connection, parsed by the connection's codec (see model/codec.py).
+    Data is received with recv_into into one reusable buffer, so TCP may split or coalesce frames freely:
+    incomplete headers and messages stay in the buffer until the rest arrives.
+    """
+    BUFFER_SIZE = 4096
+
+    def __init__(self, connection: socket, size=BUFFER_SIZE):
+        self.connection = connection
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+        self.start = 0  # first byte not yet parsed into a frame
+        self.end = 0  # first free byte in the buffer
+        self.frames = deque()
+        self.codec = TextCodec
+
+    def __repr__(self):
+        return f"<FrameReader buffered={self.end - self.start} frames={len(self.frames)} />"
+
+    def receive(self):
+        """
+        Return the frames already parsed, or else perform a single read and return the frames it completed.
+        @ensures at most one recv_into call.
+        Return: a list of zero or more messages, as strings.
+        Raises ConnectionResetError if the remote closed the connection, ValueError on a malformed header.
+        """
+        if not self.frames:
+            self._read()
+
+        frames = list(self.frames)
+        self.frames.clear()
+        return frames
+
+    def next_frame(self):
+        """
+        Block until a complete frame is available.
+        Return: the next message, as a string.
+        Raises ConnectionResetError if the remote closed the connection, ValueError on a malformed header.
+        """
+        while not self.frames:
+            self._read()
+
+        return self.frames.popleft()
+
+    def _read(self):
+        if self.end == len(self.buffer):
+            self._make_room(self.end - self.start + 1)
+
+        received = self.connection.recv_into(self.view[self.end:])
+
+        if received == 0:
+            raise ConnectionResetError('Connection closed by remote')
+
+        M.BYTES_RECEIVED.inc(received)
+        self.end += received
+        self._parse()
+
+    def _parse(self):
+        while self.start < self.end:
+            message, frame_end = self.codec.parse_frame(self.buffer, self.view, self.start, self.end)
+
+            if message is None:
+                self._make_room(frame_end)
+                break
+
+            self.frames.append(message)
+            self.start = frame_end
+
+        if self.start == self.end:
+            self.start = self.end = 0
+
+    def _make_room(self, needed: int):
+        """
+        Make sure the buffer can hold needed bytes from the first unparsed byte onwards.
+        Moves the unparsed bytes to the front of the buffer, and grows the buffer if that is not enough.
+        """
+        unparsed = self.end - self.start
+
+        if needed > len(self.buffer):
+            grown = bytearray(max(needed, 2 * len(self.buffer)))
+            grown[:unparsed] = self.view[self.start:self.end]
+            self.view.release()
+            self.buffer = grown
+            self.view = memoryview(self.buffer)
+        elif len(self.buffer) - self.start < needed:
+            self.buffer[:unparsed] = self.buffer[self.start:self.end]
+        else:
+            return
+
+        self.start, self.end = 0, unparsed
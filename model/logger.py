@@ -1,8 +1,34 @@
+import atexit
+import itertools
 import logging
+import logging.handlers
+import os
+import queue
 from sys import stdout as standard_output
+from threading import Lock
+
+SERVER_LOG = 'server.log'
+COMMUNICATION_LOG = 'communication.log'
+MAX_LOG_BYTES = 10 * 1024 * 1024  # rotate a log file once it reaches this size
+LOG_BACKUPS = 3  # the number of rotated files kept, as server.log.1, server.log.2, ...
 
 
 class Logger:
+    """
+    The logging set-up shared by the whole process.
+    Every log file has exactly one handler per process, however many loggers write to it. That handler only puts the
+    record on a queue: a single listener thread formats and writes it, so threads sending and receiving messages
+    never wait on the disk or on each other.
+    Worker processes write log files of their own, see Logger.set_worker.
+    """
+    lock = Lock()
+    file_handlers = {}  # file name -> the QueueHandler writing to it
+    file_targets = {}  # file name -> the RotatingFileHandler its listener thread writes with
+    file_suffix = ''  # inserted before the extension of every log file, e.g. '.worker0'
+    console_handler = None
+    samplers = {}  # wire component -> its Sampler
+    sampling = 1  # for wire components created later
+
     def __init__ (self):
         super().__init__(self)
 
@@ -11,17 +37,149 @@ class Logger:
         logger = logging.getLogger(name)
         logger.setLevel(severity)
 
-        format_string = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        format_date = '%d/%m/%Y %I:%M:%S %p'
-
         if to_file:
-            handler = logging.FileHandler('server.log', 'w')
+            handler = Logger.get_file_handler(SERVER_LOG)
         else:
-            handler = logging.StreamHandler(standard_output)
-            format_string = '%(name)s: %(message)s'
+            handler = Logger.get_console_handler()
+
+        if handler not in logger.handlers:
+            logger.addHandler(handler)
+        return logger
+
+    @staticmethod
+    def create_wire_logger (component: str):
+        """
+        Create the logger for the messages a component sends and receives, written to communication.log.
+        Wire logs are on the hot path of every message, so they can be sampled, see Logger.set_sampling.
+        :param component: the name of the component, e.g. 'PLAYER'.
+        :return: SampledLogger
+        """
+        with Logger.lock:
+            manager = logging.Logger.manager
+            default, manager.loggerClass = manager.loggerClass, SampledLogger
+            try:
+                logger = logging.getLogger(f'WIRE.{component}')
+            finally:
+                manager.loggerClass = default
+
+            if component not in Logger.samplers:
+                Logger.samplers[component] = Sampler(Logger.sampling)
+                logger.sampler = Logger.samplers[component]
 
-        formatter = logging.Formatter(fmt=format_string, datefmt=format_date)
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
 
+        handler = Logger.get_file_handler(COMMUNICATION_LOG)
+        if handler not in logger.handlers:
+            logger.addHandler(handler)
         return logger
+
+    @staticmethod
+    def set_sampling (every: int, component: str = None):
+        """
+        Only log 1 in every so many informational wire messages. Warnings and errors are always logged.
+        :param every: log 1 in every messages. 1 logs them all.
+        :param component: the wire component to sample, or None for all of them.
+        :return: None
+        """
+        with Logger.lock:
+            if component is None:
+                Logger.sampling = every
+
+            for name, sampler in Logger.samplers.items():
+                if component is None or name == component:
+                    sampler.every = every
+
+    @staticmethod
+    def set_worker (index=None):
+        """
+        Have the process write log files of its own, e.g. server.worker0.log, rotated independently. Handlers of
+        several processes rotating the same file would rename it under one another, losing records.
+        :param index: the worker's number, or None for the files of the supervisor or of a single-process server.
+        :return: None
+        """
+        with Logger.lock:
+            Logger.file_suffix = '' if index is None else f'.worker{index}'
+
+            for file_name, target in Logger.file_targets.items():
+                target.acquire()
+                try:
+                    if target.stream is not None:
+                        target.stream.close()
+                        target.stream = None  # reopened under the new name by the next record
+                    target.baseFilename = os.path.abspath(Logger._file_path(file_name))
+                finally:
+                    target.release()
+
+    @staticmethod
+    def _file_path (file_name: str):
+        """
+        @requires Logger.lock is held.
+        Return: the path the process writes file_name to, see Logger.set_worker.
+        """
+        root, extension = os.path.splitext(file_name)
+        return f'{root}{Logger.file_suffix}{extension}'
+
+    @staticmethod
+    def get_file_handler (file_name: str):
+        """
+        Return: the process' handler for file_name, creating it and its listener thread the first time.
+        """
+        with Logger.lock:
+            if file_name not in Logger.file_handlers:
+                target = logging.handlers.RotatingFileHandler(Logger._file_path(file_name), maxBytes=MAX_LOG_BYTES,
+                                                              backupCount=LOG_BACKUPS, delay=True)
+                target.setFormatter(logging.Formatter(fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                                                      datefmt='%d/%m/%Y %I:%M:%S %p'))
+
+                records = queue.SimpleQueue()
+                listener = logging.handlers.QueueListener(records, target)
+                listener.start()
+                atexit.register(listener.stop)  # write out what is still queued
+
+                Logger.file_targets[file_name] = target
+                Logger.file_handlers[file_name] = LazyQueueHandler(records)
+            return Logger.file_handlers[file_name]
+
+    @staticmethod
+    def get_console_handler ():
+        with Logger.lock:
+            if Logger.console_handler is None:
+                Logger.console_handler = logging.StreamHandler(standard_output)
+                Logger.console_handler.setFormatter(logging.Formatter(fmt='%(name)s: %(message)s'))
+            return Logger.console_handler
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    A QueueHandler that leaves formatting to the listener thread.
+    The standard one formats the message on the logging thread, before queueing it.
+    """
+    def prepare(self, record):
+        return record
+
+
+class Sampler:
+    """Picks 1 in every `every` informational records of a wire logger to log, see SampledLogger."""
+
+    def __init__(self, every=1):
+        self.every = every
+        self.counter = itertools.count()
+
+    def sample(self):
+        """
+        Return: True for 1 in every `every` calls.
+        """
+        return self.every <= 1 or next(self.counter) % self.every == 0
+
+
+class SampledLogger(logging.Logger):
+    """
+    A wire logger, sampling its informational records before they are built: building a record takes longer than
+    sending most messages, and most of them are dropped when sampling. Warnings and errors are always logged.
+    """
+    sampler = None
+
+    def info(self, msg, *args, **kwargs):
+        if self.sampler is None or self.sampler.sample():
+            super().info(msg, *args, **kwargs)
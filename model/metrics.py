@@ -0,0 +1,286 @@
+from threading import Lock
+from threading import current_thread
+from threading import local
+import bisect
+
+import model.protocol as P
+
+# Every command of the protocol, as it starts a message. Anything else a client sends is counted as OTHER, so a
+# misbehaving client cannot create a time series per message.
+OPCODES = frozenset([P.GUESS, P.SECRET, P.MAX_TRIES, P.CORRECT, P.MOVE_MADE, P.SCORE, P.WELCOME, P.REQUEST_PLAYER,
+                     P.REQUEST_MAX_TRIES, P.ADDING_TO_QUEUE, P.GAME_START, P.YOUR_TURN, P.TURN,
+                     P.INVALID_INPUT.partition(P.ASSIGNMENT)[0], P.FORCE_DISCONNECT, P.HEARTBEAT, P.CHOOSING_PLAYER,
+                     P.CONTINUE_PLAYING, P.WIN, P.LOSS, P.PLAYER, P.CAPABILITIES, P.READY, P.BOARD,
+                     P.BOARD_DELTA, P.REQUEST_BOARD, P.BUNDLE, P.BUSY])
+OTHER = 'other'
+
+# in seconds: from a few milliseconds for a handshake to minutes for a lobby to fill up
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class _Metric:
+    """
+    A metric recorded without contention: every thread adds to a cell of its own, and only reading the metric sums
+    the cells up. The lock is only taken the first time a thread records, and while reading.
+    Cells of threads that have finished are folded into one, so a server starting a thread per connection does not
+    keep a cell per connection it ever had.
+    """
+    TYPE = None
+
+    def __init__(self, name: str, description: str, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.lock = Lock()
+        self.local = local()
+        self.cells = []  # (thread, cell), a cell being a dict: label values -> value
+        self.retired = {}  # what the threads that finished recorded
+        self.fold_at = 64
+
+    def __repr__(self):
+        return f"<{type(self).__name__} name={self.name} cells={len(self.cells)} />"
+
+    def _cell(self):
+        try:
+            return self.local.cell
+        except AttributeError:
+            cell = self.local.cell = {}
+
+            with self.lock:
+                if len(self.cells) >= self.fold_at:
+                    self._fold()
+                    self.fold_at = max(64, 2 * len(self.cells))
+                self.cells.append((current_thread(), cell))
+            return cell
+
+    def _fold(self):
+        """
+        @requires self.lock is held
+        @ensures the cells of finished threads are merged into self.retired.
+        """
+        alive = []
+        for thread, cell in self.cells:
+            if thread.is_alive():
+                alive.append((thread, cell))
+            else:
+                for key, value in cell.items():
+                    self.retired[key] = self._merge(self.retired.get(key), value)
+        self.cells = alive
+
+    @staticmethod
+    def _merge(total, value):
+        return value if total is None else total + value
+
+    def collect(self):
+        """
+        Return: a dict, label values -> the value summed over all threads.
+        """
+        with self.lock:
+            self._fold()
+            totals = dict(self.retired)
+
+            for _, cell in self.cells:
+                for key, value in list(cell.items()):
+                    totals[key] = self._merge(totals.get(key), value)
+        return totals
+
+    def render(self):
+        """
+        Return: the metric in the Prometheus text exposition format, as a list of lines.
+        """
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} {self.TYPE}']
+        for key, value in sorted(self.collect().items()):
+            lines.append(f'{self.name}{self._labels(key)} {_number(value)}')
+        return lines
+
+    def _labels(self, key: tuple, **extra):
+        pairs = list(zip(self.labels, key)) + list(extra.items())
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+class Counter(_Metric):
+    TYPE = 'counter'
+
+    def inc(self, amount=1, *labels):
+        """
+        :param amount: the amount to add.
+        :param labels: the value of each of the metric's labels, in order.
+        """
+        cell = self._cell()
+        cell[labels] = cell.get(labels, 0) + amount
+
+
+class Gauge(Counter):
+    """A value that goes up and down, like the number of open connections."""
+    TYPE = 'gauge'
+
+    def dec(self, amount=1, *labels):
+        self.inc(-amount, *labels)
+
+
+class CallbackGauge(_Metric):
+    """A gauge read from the server's state when the metrics are read, rather than recorded as it changes."""
+    TYPE = 'gauge'
+
+    def __init__(self, name: str, description: str, labels=()):
+        super().__init__(name, description, labels)
+        self.function = None
+
+    def watch(self, function):
+        """
+        :param function: called whenever the metric is read, returning a dict: label values -> value.
+        """
+        self.function = function
+
+    def collect(self):
+        return self.function() if self.function is not None else {}
+
+
+class Histogram(_Metric):
+    TYPE = 'histogram'
+
+    def __init__(self, name: str, description: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        """
+        :param value: the value observed, e.g. a duration in seconds.
+        :param labels: the value of each of the metric's labels, in order.
+        """
+        cell = self._cell()
+        counts = cell.get(labels)
+
+        if counts is None:
+            counts = cell[labels] = [0] * (len(self.buckets) + 2)  # a count per bucket, then +Inf, then the sum
+
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    @staticmethod
+    def _merge(total, value):
+        return list(value) if total is None else [a + b for a, b in zip(total, value)]
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} {self.TYPE}']
+
+        for key, counts in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{self._labels(key, le=bound)} {cumulative}')
+            lines.append(f'{self.name}_sum{self._labels(key)} {_number(counts[-1])}')
+            lines.append(f'{self.name}_count{self._labels(key)} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """The metrics of one server process, rendered together for the metrics endpoint and the STATS command."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def __repr__(self):
+        return f"<MetricsRegistry metrics={len(self.metrics)} />"
+
+    def counter(self, name: str, description: str, labels=()):
+        return self.register(Counter(name, description, labels))
+
+    def gauge(self, name: str, description: str, labels=()):
+        return self.register(Gauge(name, description, labels))
+
+    def callback_gauge(self, name: str, description: str, labels=()):
+        return self.register(CallbackGauge(name, description, labels))
+
+    def histogram(self, name: str, description: str, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, description, labels, buckets))
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """
+        Return: every metric in the Prometheus text exposition format.
+        """
+        return '\n'.join(line for metric in self.metrics for line in metric.render()) + '\n'
+
+
+def _number(value):
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def opcode(message: str):
+    """
+    Return: the command a message starts with, or OTHER if it is not one of the protocol's.
+    """
+    command = message.partition(P.DELIM)[0].partition(P.ASSIGNMENT)[0]
+    return command if command in OPCODES else OTHER
+
+
+def record_sent(message: str, size: int, recipients=1):
+    """
+    Count a message sent, and the bytes it took on the wire.
+    :param message: the message sent.
+    :param size: the bytes sent, to all recipients together.
+    :param recipients: the number of players the message was sent to.
+    """
+    MESSAGES_SENT.inc(recipients, opcode(message))
+    BYTES_SENT.inc(size)
+
+
+def record_received(message: str):
+    MESSAGES_RECEIVED.inc(1, opcode(message))
+
+
+def watch_lobbies(lobbies):
+    """
+    Read the open lobbies and the running games from a LobbyRegistry whenever the metrics are read.
+    :param lobbies: the server's LobbyRegistry.
+    """
+    OPEN_LOBBIES.watch(lambda: {(size,): depth['lobbies'] for size, depth in lobbies.queue_depth().items()})
+    RUNNING_GAMES.watch(lambda: {(): sum(1 for group in lobbies if group.in_game)})
+
+
+REGISTRY = MetricsRegistry()
+
+CONNECTIONS = REGISTRY.gauge('hangman_connections', 'Client connections currently open.')
+OPEN_LOBBIES = REGISTRY.callback_gauge('hangman_open_lobbies', 'Lobbies waiting for players, by size.', ['size'])
+RUNNING_GAMES = REGISTRY.callback_gauge('hangman_running_games', 'Games being played.')
+MESSAGES_SENT = REGISTRY.counter('hangman_messages_sent_total', 'Messages sent to clients, by command.',
+                                 ['opcode'])
+MESSAGES_RECEIVED = REGISTRY.counter('hangman_messages_received_total', 'Messages received from clients, by command.',
+                                     ['opcode'])
+BYTES_SENT = REGISTRY.counter('hangman_bytes_sent_total', 'Bytes sent to clients, headers included.')
+BYTES_RECEIVED = REGISTRY.counter('hangman_bytes_received_total', 'Bytes received from clients, headers included.')
+OUTBOUND_OVERFLOWS = REGISTRY.counter('hangman_outbound_overflows_total',
+                                      'Connections whose outbound queue overflowed, by what was done: disconnect the '
+                                      'client, or drop-boards superseded.', ['action'])
+OUTBOUND_DROPPED = REGISTRY.counter('hangman_outbound_dropped_total',
+                                    'Board updates dropped from an outbound queue, a later one superseding them.')
+HANDSHAKE_SECONDS = REGISTRY.histogram('hangman_handshake_seconds',
+                                       'From accepting a connection to queueing its player in a lobby.')
+HANDSHAKES = REGISTRY.counter('hangman_handshakes_total',
+                              'Players queued in a lobby, by handshake: pipelined, acknowledged or paced.', ['flow'])
+CONNECTIONS_SHED = REGISTRY.counter('hangman_connections_shed_total',
+                                    'Connections closed before their player was queued, by reason: the accept rate, '
+                                    'the handshakes under way, or the handshake timing out.', ['reason'])
+LOBBY_WAIT_SECONDS = REGISTRY.histogram('hangman_lobby_wait_seconds',
+                                        'From queueing a player in a lobby to the start of its game.')
+TURN_RESPONSE_SECONDS = REGISTRY.histogram('hangman_turn_response_seconds',
+                                           'From announcing a turn to receiving the guessing player\'s guess.')
+EXECUTOR_BUSY = REGISTRY.gauge('hangman_executor_busy', 'Threads of a server pool running a task, by pool.', ['pool'])
+EXECUTOR_QUEUED = REGISTRY.gauge('hangman_executor_queued', 'Tasks waiting for a thread of a server pool, by pool.',
+                                 ['pool'])
+EXECUTOR_REJECTED = REGISTRY.counter('hangman_executor_rejected_total',
+                                     'Tasks turned away because a server pool\'s queue was full, by pool.', ['pool'])
+EXECUTOR_WAIT_SECONDS = REGISTRY.histogram('hangman_executor_wait_seconds',
+                                           'From submitting a task to a server pool to a thread starting it, by pool.',
+                                           ['pool'])
+PROMPTS_EXPIRED = REGISTRY.counter('hangman_prompts_expired_total',
+                                   'Prompts a player did not answer in time (deadline) or validly (retries), by prompt '
+                                   'and cause.', ['prompt', 'cause'])
+PLAYERS_EVICTED = REGISTRY.counter('hangman_players_evicted_total',
+                                   'Players removed from a running game, by cause.', ['cause'])
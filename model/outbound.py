@@ -0,0 +1,186 @@
+from collections import deque
+from threading import Lock
+import socket as S
+import time
+
+import model.metrics as M
+import model.protocol as P
+
+SRC = 'model/outbound.py'
+NO_WAIT = getattr(S, 'MSG_DONTWAIT', None)  # not available on Windows
+
+DISCONNECT = 'disconnect'
+DROP_BOARDS = 'drop-boards'
+POLICIES = (DISCONNECT, DROP_BOARDS)
+MAX_BYTES = 256 * 1024  # queued for a connection, beyond which it overflows
+LINGER = 5  # in seconds, the longest a closed connection is kept open to take what is still queued for it
+
+BOARD_UPDATES = (P.MOVE_MADE, P.BOARD, P.BOARD_DELTA)
+
+
+def is_board_update(message: str):
+    """
+    Return: True if message only brings the board up to date, so that a later board update supersedes it.
+    """
+    return message.partition(P.DELIM)[0].partition(P.ASSIGNMENT)[0] in BOARD_UPDATES
+
+
+class OutboundQueue:
+    """
+    The frames waiting to be written to one connection. Pushing never blocks: a frame is written right away if
+    nothing is queued and the socket takes it, and queued otherwise, for a writer (see WriterThread) to write every
+    frame queued in one send once the socket is writable again.
+    The queue holds at most max_bytes. Past that, the connection overflows and policy decides: DISCONNECT gives up on
+    it, DROP_BOARDS first drops the board updates a later one supersedes, and only gives up if that is not enough.
+    Clients that keep the board see a gap in the tries numbering the updates, and ask for the whole board again.
+    The queue writes through a duplicate of the socket, which only the writer closes: its timeout is not changed by
+    whoever waits on the socket for a message, and it keeps the connection open until the frames queued are written.
+    """
+
+    def __init__(self, connection: S.socket, writer, max_bytes=MAX_BYTES, policy=DISCONNECT):
+        """
+        :param connection: the socket to write to, duplicated.
+        :param writer: what writes the frames queued, told by watch(queue) whenever the queue stops being empty.
+        :param max_bytes: the most bytes queued.
+        :param policy: what to do when the queue overflows, DISCONNECT or DROP_BOARDS.
+        """
+        self.connection = connection.dup()
+        self.writer = writer
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.frames = deque()  # (frame, droppable), the first one possibly partly written already
+        self.size = 0
+        self.lock = Lock()
+        self.closing_at = None  # time.monotonic() when the owner closed the connection
+        self.abandoned = False
+
+    def __repr__(self):
+        return f"<OutboundQueue frames={len(self.frames)} bytes={self.size}/{self.max_bytes} policy={self.policy} />"
+
+    def push(self, frame: bytes, droppable=False):
+        """
+        Write a frame, or queue it behind the frames still waiting.
+        :param droppable: the frame is a board update, which DROP_BOARDS may drop once a later one is queued.
+        Return: False if the connection was given up on, True otherwise.
+        """
+        with self.lock:
+            if self.abandoned or self.closing_at is not None:
+                return False
+
+            idle = not self.frames
+            if idle:
+                rest = self._write_now(frame)
+                if not rest:
+                    return True
+                droppable = droppable and len(rest) == len(frame)  # a frame partly written has to be finished
+                frame = rest
+
+            self.frames.append((frame, droppable))
+            self.size += len(frame)
+            given_up = self.size > self.max_bytes and not self._overflow()
+
+        if given_up:
+            self._abandon()
+            return False
+        if idle:
+            self.writer.watch(self)
+        return True
+
+    def write_now(self, frame: bytes):
+        """
+        Write as much of a frame as the socket takes right away, unless frames are queued ahead of it.
+        Return: the bytes that were not written, the whole frame if any were queued.
+        """
+        with self.lock:
+            if self.frames or self.abandoned or self.closing_at is not None:
+                return frame
+            return self._write_now(frame)
+
+    def flush(self):
+        """
+        Write every frame queued, in one send, as far as the socket takes them. Called by the writer.
+        Return: True if frames remain queued.
+        """
+        with self.lock:
+            if not self.frames:
+                return False
+
+            try:
+                sent = self.connection.send(b''.join([frame for frame, _ in self.frames]), NO_WAIT)
+            except BlockingIOError:
+                return True
+            except OSError:
+                self.frames.clear()
+                self.size = 0
+                return False
+
+            self.size -= sent
+            while self.frames and sent >= len(self.frames[0][0]):
+                sent -= len(self.frames.popleft()[0])
+            if sent:
+                self.frames[0] = (self.frames[0][0][sent:], False)
+            return bool(self.frames)
+
+    def close(self):
+        """
+        Have the writer close the queue's socket once every frame queued was written, or after LINGER seconds.
+        The owner closes its own socket right away.
+        :return: None
+        """
+        with self.lock:
+            if self.closing_at is not None:
+                return
+            self.closing_at = time.monotonic()
+        self.writer.watch(self)
+
+    @property
+    def done(self):
+        """
+        True once the writer may close the queue's socket: the connection was given up on, or closed by its owner and
+        either every frame was written or LINGER seconds passed.
+        """
+        if self.abandoned:
+            return True
+        return self.closing_at is not None and (not self.frames or time.monotonic() - self.closing_at > LINGER)
+
+    def _write_now(self, frame: bytes):
+        try:
+            sent = self.connection.send(frame, NO_WAIT)
+            return frame[sent:]
+        except BlockingIOError:
+            return frame
+        except OSError:
+            return b''  # the connection failed: whoever reads from it will find out
+
+    def _overflow(self):
+        """
+        @requires self.lock is held, and self.size > self.max_bytes
+        Return: True if the queue fits in max_bytes again, having dropped superseded board updates.
+        """
+        if self.policy == DROP_BOARDS:
+            latest = max([index for index, (_, droppable) in enumerate(self.frames) if droppable], default=None)
+            kept = deque([entry for index, entry in enumerate(self.frames) if not entry[1] or index == latest])
+
+            if len(kept) < len(self.frames):
+                M.OUTBOUND_OVERFLOWS.inc(1, DROP_BOARDS)
+                M.OUTBOUND_DROPPED.inc(len(self.frames) - len(kept))
+                self.frames = kept
+                self.size = sum(len(frame) for frame, _ in kept)
+        return self.size <= self.max_bytes
+
+    def _abandon(self):
+        """
+        Give up on a consumer too slow to keep up: forget what is queued, and shut the connection down, so that
+        whoever reads from it finds it closed and handles the disconnection as usual.
+        """
+        with self.lock:
+            self.abandoned = True
+            self.frames.clear()
+            self.size = 0
+
+        M.OUTBOUND_OVERFLOWS.inc(1, DISCONNECT)
+        try:
+            self.connection.shutdown(S.SHUT_RDWR)
+        except OSError:
+            pass
+        self.writer.watch(self)
@@ -1,20 +1,32 @@
 from socket import socket
 import socket as S
-import logging
-import time
 
 import model.protocol as P
+from model.codec import TextCodec
+from model.frame_reader import FrameReader
+from model.logger import Logger
+import model.metrics as M
+from model.outbound import is_board_update
 
 SRC = "model/player.py"
+NO_WAIT = getattr(S, 'MSG_DONTWAIT', None)  # not available on Windows
 
 
 class Player:
+    logger = Logger.create_wire_logger('PLAYER')  # shared: a logger per player would never be freed
+
     def __init__ (self, connection: socket = None, name="new_player", preferred_players=2):
         self.connection = connection
         self.score = 0
         self.name = name
         self.preferred_players = preferred_players
-        self.logger = self.get_logger(f"logger_{self.__repr__()}")
+        self.frame_reader = None
+        self.codec = TextCodec
+        self.capabilities = set()
+        self.deferred = []  # messages to send in one frame with the next one told, see defer
+        self.queued_since = None  # time.perf_counter() when placed in a lobby
+        self.outbound = None  # an OutboundQueue, once a writer thread writes for this connection
+        self.closed = False
 
     def __repr__(self):
         return f"<Player name={self.name}/>"
@@ -32,48 +44,134 @@ class Player:
             return False
 
     def increase_score (self, value=1):
-        self.logger.info(f"{self} Increasing score by {value}. src={SRC}/increase_score:22")
+        self.logger.info("%s Increasing score by %s. src=%s/increase_score:22", self, value, SRC)
         self.score += value
 
     def set_name (self, value:str):
-        self.logger.info(f"{self} Setting name to {value}. src={SRC}/set_name:26")
+        self.logger.info("%s Setting name to %s. src=%s/set_name:26", self, value, SRC)
         self.name = value
 
     def tell (self, message):
-        self.logger.info(f"Sending: {message}. src={SRC}/tell:30")
+        message = self.bundle(message)
+        self.logger.info("%s Sending: %s. src=%s/tell:30", self, message, SRC)
+        frame = self.codec.encode(message)
+        M.record_sent(message, len(frame))
+        self.send(frame, is_board_update(message))
+
+    def defer (self, message):
+        """
+        Send a message in one frame with the next message told, if the client accepted P.FUSED; right away otherwise.
+        Only for updates that may wait for the next prompt, such as the result of a guess.
+        """
+        if P.FUSED in self.capabilities:
+            self.deferred.append(message)
+        else:
+            self.tell(message)
+
+    def bundle (self, message):
+        """
+        @ensures clears the messages deferred.
+        Return: message, preceded by the messages deferred so far in one BUNDLE if there are any.
+        """
+        if not self.deferred:
+            return message
+
+        messages, self.deferred = self.deferred + [message], []
+        return P.construct_bundle(messages)
+
+    def send (self, frame: bytes, droppable=False):
+        """
+        Send an already encoded frame, e.g. one shared between the recipients of a broadcast.
+        With an outbound queue, the frame is queued rather than waited for, see OutboundQueue.
+        :param droppable: the frame is a board update, which a later one supersedes.
+        """
+        if self.outbound is not None:
+            if not self.outbound.push(frame, droppable):
+                self.logger.warning('%s Too slow to keep up, or closed. Frame not sent. src=%s/send:79', self, SRC)
+            return
+
         try:
-            header = P.write_header(message)
-            self.connection.sendall(header.encode())
-            time.sleep(P.MESSAGE_DELAY)
-            self.connection.sendall(message.encode())
+            self.connection.sendall(frame)
         except S.error as error:
-            self.logger.error(f'Could not write to client! {error}')
+            self.logger.error('%s Could not write to client! %s', self, error)
+
+    def send_without_blocking (self, frame: bytes):
+        """
+        Send as much of an already encoded frame as the socket accepts right away.
+        Return: the bytes that still have to be sent, empty if all of them were (or if the connection failed).
+        """
+        if NO_WAIT is None:
+            return frame
+        if self.outbound is not None:
+            return self.outbound.write_now(frame)
 
-    def listen (self, buffer=4096):
         try:
-            success, header = P.read_header(self)
-
-            if not success:
-                raise S.error
+            sent = self.connection.send(frame, NO_WAIT)
+            return frame[sent:]
+        except BlockingIOError:
+            return frame
+        except S.error as error:
+            self.logger.error('%s Could not write to client! %s', self, error)
+            return b''
 
-            response = self.connection.recv(header).decode()
-            self.logger.info(f"{self} Received: {response}. src={SRC}/listen:35")
+    @property
+    def get_frame_reader (self):
+        if self.frame_reader is None:
+            self.frame_reader = FrameReader(self.connection)
+        return self.frame_reader
+
+    def set_codec (self, codec):
+        """
+        Switch both directions of this connection to another codec (see model/codec.py).
+        """
+        self.logger.info("%s Switching to the %s codec. src=%s/set_codec:60", self, codec.NAME, SRC)
+        self.codec = codec
+        self.get_frame_reader.codec = codec
+
+    def listen (self, timeout=None):
+        """
+        Wait for the next message.
+        :param timeout: in seconds, the longest to wait for it. Default = None, waiting as long as it takes.
+        Return: the message, or None if the connection was closed or is corrupt.
+        Raises socket.timeout if no complete message arrived within timeout; a partial one is kept for the next call.
+        """
+        try:
+            if timeout is None:
+                response = self.get_frame_reader.next_frame()
+            else:
+                response = self._listen_within(timeout)
+            self.logger.info("%s Received: %s. src=%s/listen:59", self, response, SRC)
+            M.record_received(response)
             return response
-        except S.error as error:
+        except S.timeout:
+            raise
+        except (S.error, ValueError) as error:
             self.logger.error('Could not read from client!')
 
-    @staticmethod
-    def get_logger(name: str):
-        logger = logging.getLogger(name)
-        logger.setLevel(logging.INFO)
-        handler = logging.FileHandler('communication.log', 'w')
-        format_string = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        format_date = '%d/%m/%Y %I:%M:%S %p'
-        formatter = logging.Formatter(fmt=format_string, datefmt=format_date)
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+    def _listen_within (self, timeout: float):
+        if timeout <= 0:
+            raise S.timeout('timed out')  # a timeout of 0 would make the socket non-blocking instead
 
-        return logger
+        previous = self.connection.gettimeout()
+        self.connection.settimeout(timeout)
+        try:
+            return self.get_frame_reader.next_frame()
+        finally:
+            self.connection.settimeout(previous)
+
+    def receive (self):
+        """
+        Read whatever the connection has to offer, performing at most one read.
+        Return: a list of zero or more complete messages, or None if the connection was closed or is corrupt.
+        """
+        try:
+            responses = self.get_frame_reader.receive()
+            for response in responses:
+                self.logger.info("%s Received: %s. src=%s/receive:72", self, response, SRC)
+                M.record_received(response)
+            return responses
+        except (S.error, ValueError) as error:
+            self.logger.error('Could not read from client!')
 
     def __eq__(self, value):
         if isinstance(value, Player):
@@ -87,4 +185,12 @@ class Player:
 
     def disconnect(self):
         self.tell(P.FORCE_DISCONNECT)
+        self.close()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            M.CONNECTIONS.dec()
+        if self.outbound is not None:
+            self.outbound.close()  # the frames still queued are written before the connection closes
         self.get_connection.close()
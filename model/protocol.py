@@ -6,19 +6,27 @@ PADDING = b' '
 DELIM = ";"
 ASSIGNMENT = "="
 LIST_DELIMITER = ","
+LENGTH_DELIMITER = ":"
 MIN_TURNS = 5
 MAX_TURNS = 25
-MESSAGE_DELAY = 0.1  # in seconds
+MESSAGE_DELAY = 0.1  # in seconds, the pause after WELCOME for clients that do not acknowledge it with READY
+EARLY_RECORD_WAIT = 0.002  # in seconds, how long a new connection is given to send its player record unasked
+TURN_DELAY = 0.5  # in seconds, the pause before a game starts and after every move, unless every player pipelines
 
 # Server symbols
 MAX_REQUEST_CORRECTIONS = 5
 CYCLE_TIMEOUT = 5  # in seconds
+HEARTBEAT_INTERVAL = 5  # in seconds, per lobby member
+LIVENESS_TICK = 0.5  # in seconds
+LIVENESS_TIMEOUT = 30  # in seconds without a successful heartbeat
 MAX_GROUPS_PER_MANAGER = 30
 
 # Incoming from client
 GUESS = "G"
 SECRET = "SEC"
 MAX_TRIES = "MT"
+READY = "RDY"  # acknowledges WELCOME, sent by clients that accepted PIPELINE
+REQUEST_BOARD = "RB"  # asks for the whole BOARD, sent by clients that accepted DELTA and missed a BOARD_DELTA
 
 # Outgoing from server
 CORRECT = "C"  # valid: C=1 or C=0
@@ -38,9 +46,20 @@ CHOOSING_PLAYER = 'CP'
 CONTINUE_PLAYING = 'AR'
 WIN = 'W'
 LOSS = 'L'
+BOARD = 'B'  # valid: B=3,*,a,*,a, the tries taken so far then the board, to clients that accepted DELTA
+BOARD_DELTA = 'D'  # valid: D=4,a,1,3 or D=5 if nothing was revealed, the tries taken then the letter and positions
+BUNDLE = 'U'  # valid: U=3:C=113:T;P=alina,2;7, messages sent in one frame, each after its length, to FUSED clients
+BUSY = 'BUSY'  # sent in place of WELCOME to a connection the server is too busy to take, before closing it
 
 # Shared
 PLAYER = "P"
+CAPABILITIES = "CAP"  # valid: CAP=bin
+
+# Capabilities, offered by the server in WELCOME and accepted by the client alongside its PLAYER record
+BINARY = "bin"
+PIPELINE = "pipe"  # the client handles frames sent back to back, so the server need not pause between them
+DELTA = "delta"  # the client keeps the board, and is sent what changed (BOARD_DELTA) rather than MOVE_MADE
+FUSED = "fuse"  # the client unpacks BUNDLE, so the updates of a turn can share a frame
 
 
 def won(scores: list):
@@ -51,6 +70,26 @@ def lost(scores: list):
     return f'{LOSS}{DELIM}{construct_score(scores)}'
 
 
+def turn_delay(players: list):
+    """
+    Return: the pause, in seconds, to leave before a game starts and after every move: none if every player accepted
+            PIPELINE, TURN_DELAY otherwise, for the clients that show messages as they come.
+    """
+    if all(PIPELINE in player.capabilities for player in players):
+        return 0
+    return TURN_DELAY
+
+
+def construct_welcome(capabilities: list):
+    if capabilities:
+        return f'{WELCOME}{DELIM}{construct_capabilities(capabilities)}'
+    return WELCOME
+
+
+def construct_capabilities(capabilities: list):
+    return f'{CAPABILITIES}{ASSIGNMENT}{LIST_DELIMITER.join(capabilities)}'
+
+
 def construct_continue(response: str):
     if response.lower() == 'y':
         return f'{CONTINUE_PLAYING}{ASSIGNMENT}1'
@@ -96,6 +135,21 @@ def construct_move(guessed_letters: list):
     return move_string
 
 
+def construct_board(sequence: int, guessed_letters: list):
+    return f"{BOARD}{ASSIGNMENT}{sequence}{LIST_DELIMITER}{LIST_DELIMITER.join(guessed_letters)}"
+
+
+def construct_delta(sequence: int, letter: str, positions: list):
+    if not positions:
+        return f"{BOARD_DELTA}{ASSIGNMENT}{sequence}"
+    revealed = LIST_DELIMITER.join([str(position) for position in positions])
+    return f"{BOARD_DELTA}{ASSIGNMENT}{sequence}{LIST_DELIMITER}{letter}{LIST_DELIMITER}{revealed}"
+
+
+def construct_bundle(messages: list):
+    return f"{BUNDLE}{ASSIGNMENT}" + ''.join([f"{len(message)}{LENGTH_DELIMITER}{message}" for message in messages])
+
+
 def construct_turn(player, tries_left):
     return f"{TURN}{DELIM}{construct_player(player)}{DELIM}{tries_left}"
 
@@ -141,6 +195,13 @@ def decode_player(command: str):
     return Result.get_negative()
 
 
+def decode_capabilities(command: str):
+    parts = command.split(ASSIGNMENT)
+    if parts[0] == CAPABILITIES and len(parts) == 2:
+        return [capability for capability in parts[1].split(LIST_DELIMITER) if capability]
+    return []
+
+
 def decode_guess(command: str):
     parts = command.split(ASSIGNMENT)
     if parts[0] == GUESS:
@@ -179,6 +240,67 @@ def decode_move(command: str):
     return False, None
 
 
+def decode_board(command: str):
+    """
+    Return: a tuple (sequence, letters) for a BOARD command, None if it is not a valid one.
+    """
+    parts = command.split(ASSIGNMENT)
+    if parts[0] == BOARD and len(parts) == 2:
+        sequence, _, letters = parts[1].partition(LIST_DELIMITER)
+        try:
+            return int(sequence), letters.split(LIST_DELIMITER) if letters else []
+        except ValueError:
+            return None
+    return None
+
+
+def decode_delta(command: str):
+    """
+    Return: a tuple (sequence, letter, positions) for a BOARD_DELTA command, letter None and positions empty if
+            nothing was revealed. None if it is not a valid one.
+    """
+    parts = command.split(ASSIGNMENT)
+    if parts[0] == BOARD_DELTA and len(parts) == 2:
+        arguments = parts[1].split(LIST_DELIMITER)
+        try:
+            sequence, positions = int(arguments[0]), [int(position) for position in arguments[2:]]
+        except ValueError:
+            return None
+
+        if len(arguments) == 1:
+            return sequence, None, []
+        if positions:
+            return sequence, arguments[1], positions
+    return None
+
+
+def decode_bundle(message: str):
+    """
+    Take a whole message rather than a command, as the messages bundled contain DELIM.
+    Return: the list of messages in a BUNDLE, None if it is not a valid one.
+    """
+    position = len(BUNDLE) + len(ASSIGNMENT)
+    if message[:position] != f"{BUNDLE}{ASSIGNMENT}":
+        return None
+
+    messages = []
+    while position < len(message):
+        separator = message.find(LENGTH_DELIMITER, position)
+        if separator < 0:
+            return None
+
+        try:
+            end = separator + 1 + int(message[position:separator])
+        except ValueError:
+            return None
+        if end > len(message):
+            return None
+
+        messages.append(message[separator + 1:end])
+        position = end
+    return messages
+
+
 def decode_correct(command: str):
     parts = command.split(ASSIGNMENT)
     if parts[0] == CORRECT:
@@ -203,6 +325,22 @@ def decode_continue(command: str):
         return None
 
 
+def decode_answer(message: str, decode):
+    """
+    Decode a client's answer to a prompt, which has to be a single command.
+    :param decode: the decoder of the command expected, e.g. decode_guess.
+    Return: the decoded answer, or None if the message is not a valid one.
+    """
+    commands = decode_split_commands(message)
+
+    if len(commands) != 1:
+        return None
+    try:
+        return decode(commands[0])
+    except IndexError:
+        return None  # the command has no ASSIGNMENT
+
+
 def read_header(player):
     """
     Read the header from the client.
@@ -224,6 +362,17 @@ def write_header(message: str):
     Return the string header to send to the client.
     """
     message_as_bytes = message.encode()
-    length = len(message_as_bytes)
-    header = str(length).encode() + PADDING * (HEADER - length)
+    length = str(len(message_as_bytes)).encode()
+    header = length + PADDING * (HEADER - len(length))
     return header.decode()
+
+
+def write_frame(message: str):
+    """
+    Create a complete frame to write to the client, given a message: the HEADER-byte header followed by the message.
+    Sending the frame in a single write avoids a pause between header and message.
+    Return the frame as bytes.
+    """
+    message_as_bytes = message.encode()
+    length = str(len(message_as_bytes)).encode()
+    return length + PADDING * (HEADER - len(length)) + message_as_bytes
@@ -0,0 +1,117 @@
+import logging
+
+import model.metrics as M
+from model.clock import SYSTEM_CLOCK
+from model.logger import Logger
+from server.executor import BoundedExecutor
+from server.executor import ExecutorFull
+
+SRC = 'server/admission.py'
+
+logger = Logger.create_logger('ADMISSION', logging.INFO, to_file=True)
+
+
+class RateLimiter:
+    """
+    A token bucket: rate tokens are added every second, up to burst of them, and every accept takes one.
+    Used from the accepting thread (or event loop) only, so it takes no lock.
+    """
+
+    def __init__(self, rate: float, burst=None, clock=SYSTEM_CLOCK):
+        """
+        :param rate: the tokens added every second, i.e. the accepts allowed per second in the long run.
+        :param burst: the most tokens kept, i.e. the accepts allowed at once after a quiet spell. Default = rate.
+        :param clock: the clock to measure time with, see model/clock.py.
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.clock = clock
+        self.tokens = self.burst
+        self.updated = clock.now()
+
+    def __repr__(self):
+        return f"<RateLimiter rate={self.rate}/s tokens={self.tokens:.1f}/{self.burst} />"
+
+    def take(self):
+        """
+        Return: True if a token was taken, False if there was none left.
+        """
+        now = self.clock.now()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class AdmissionControl:
+    """
+    Decides which new connections get a handshake. Handshakes run on a bounded pool of threads, each within
+    handshake_timeout of the connection being accepted, and accepts can be limited to a rate. Connections beyond
+    those limits are shed: sent BUSY and closed at once, and counted in hangman_connections_shed_total by reason.
+    In a server of several worker processes, every worker applies the limits on its own.
+    """
+    MAX_HANDSHAKES = 64  # handshakes run at once
+    MAX_QUEUED_HANDSHAKES = 1024  # handshakes waiting for a thread, beyond which connections are shed
+    HANDSHAKE_TIMEOUT = 10  # in seconds, from the accept to the player being queued in a lobby
+    RATE, HANDSHAKES, TIMEOUT = 'rate', 'handshakes', 'timeout'  # why a connection was shed
+
+    def __init__(self, max_handshakes=MAX_HANDSHAKES, max_queued_handshakes=MAX_QUEUED_HANDSHAKES, accept_rate=None,
+                 accept_burst=None, handshake_timeout=HANDSHAKE_TIMEOUT, clock=SYSTEM_CLOCK):
+        """
+        :param max_handshakes: the most handshakes run at once.
+        :param max_queued_handshakes: the most handshakes waiting for one of those to finish.
+        :param accept_rate: the most connections accepted per second. Default = None, accepting any number.
+        :param accept_burst: the most connections accepted at once, within accept_rate. Default = accept_rate.
+        :param handshake_timeout: in seconds, the longest a handshake may take, waiting for a thread included.
+        :param clock: the clock the accept rate is measured with, see model/clock.py.
+        """
+        self.max_handshakes = max_handshakes
+        self.max_queued_handshakes = max_queued_handshakes
+        self.handshake_timeout = handshake_timeout
+        self.limiter = RateLimiter(accept_rate, accept_burst, clock) if accept_rate is not None else None
+        self.pool = None  # created on first use, so the settings can be handed to worker processes
+
+    def __repr__(self):
+        return f"<AdmissionControl pool={self.pool} limiter={self.limiter} timeout={self.handshake_timeout} />"
+
+    def admit(self, handshaking=0):
+        """
+        Decide whether a connection just accepted may start its handshake.
+        :param handshaking: the handshakes under way, for servers that do not run them on this pool, e.g. coroutines.
+        Return: None if it may, or the reason it has to be shed: RATE or HANDSHAKES.
+        """
+        if self.limiter is not None and not self.limiter.take():
+            return AdmissionControl.RATE
+        if handshaking >= self.max_handshakes + self.max_queued_handshakes:
+            return AdmissionControl.HANDSHAKES
+        return None
+
+    def start(self, handshake):
+        """
+        Run handshake.run() on the pool, as soon as one of its threads is free.
+        Return: None if it was started or queued, HANDSHAKES if the pool's queue is full.
+        """
+        if self.pool is None:
+            self.pool = BoundedExecutor('handshakes', self.max_handshakes, self.max_queued_handshakes)
+
+        try:
+            self.pool.submit(handshake.run)
+            return None
+        except ExecutorFull:
+            return AdmissionControl.HANDSHAKES
+
+    @staticmethod
+    def shed(reason: str):
+        """
+        Count a connection shed for reason. The caller then closes it, after sending it P.BUSY unless its handshake
+        timed out.
+        """
+        M.CONNECTIONS_SHED.inc(1, reason)
+        logger.warning(f"Shedding a new connection ({reason}). src={SRC}/shed:108")
+
+    def shutdown(self, wait=True):
+        if self.pool is not None:
+            self.pool.shutdown(wait)
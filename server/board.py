@@ -0,0 +1,53 @@
+import model.protocol as P
+from server.hangman import Hangman
+
+
+class BoardUpdates:
+    """
+    The board of a round, as its players were last sent it.
+    Clients that accepted P.DELTA keep the board themselves: they are sent the whole BOARD once, then a BOARD_DELTA
+    per try with only the positions it revealed. Both are numbered by the tries taken so far, so a client that misses
+    an update sees a gap and asks for the BOARD again (P.REQUEST_BOARD). Other clients are sent MOVE_MADE every turn.
+    """
+
+    def __init__(self, hangman: Hangman):
+        self.hangman = hangman
+        self.sent = None  # hangman.tries when the board was last sent
+
+    def __repr__(self):
+        return f"<BoardUpdates tries={self.hangman.tries} sent={self.sent} />"
+
+    def snapshot(self):
+        """
+        Return: the whole board, as BOARD, for a client that asked for it.
+        """
+        return P.construct_board(self.hangman.tries, self.hangman.guessed_letters)
+
+    def updates(self, players: list):
+        """
+        The messages that bring every player up to date with the board, at the start of a turn.
+        @ensures the players keeping the board are sent nothing if it has not changed since the last call, e.g.
+                 after a skipped turn.
+        Return: a list of tuples (players, message), to broadcast message to players.
+        """
+        keeping = [player for player in players if P.DELTA in player.capabilities]
+        legacy = [player for player in players if P.DELTA not in player.capabilities]
+        updates = [(legacy, P.construct_move(self.hangman.guessed_letters))] if legacy else []
+
+        update = self._next_update()
+        if keeping and update is not None:
+            updates.append((keeping, update))
+        return updates
+
+    def _next_update(self):
+        tries, sent = self.hangman.tries, self.sent
+        self.sent = tries
+
+        if tries == sent:
+            return None
+        if sent is None or tries != sent + 1:
+            return self.snapshot()
+
+        revealed = self.hangman.last_revealed
+        letter = self.hangman.guessed_letters[revealed[0]] if revealed else None
+        return P.construct_delta(tries, letter, revealed)
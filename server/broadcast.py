@@ -0,0 +1,101 @@
+import asyncio
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+from model.logger import Logger
+import model.metrics as M
+from model.outbound import is_board_update
+import model.protocol as P
+
+SRC = 'server/broadcast.py'
+
+MAX_WORKERS = 32
+
+logger = Logger.create_wire_logger('BROADCAST')
+_executor = None
+
+
+def broadcast(players: list, message: str):
+    """
+    Send the same message to several players at once, bundled with whatever was deferred for them (see Player.defer).
+    The message is encoded once per codec and bundle in use, and queued for the players with an outbound queue (see
+    OutboundQueue). It is written to the others' sockets without blocking, and only what a socket does not accept
+    right away is finished on a shared pool of threads, so one slow receiver does not delay the others.
+    :param players: the players to send the message to.
+    :param message: the message to send.
+    :return: None, once every player was sent the message (or failed to).
+    """
+    logger.info("Broadcasting to %d players: %s. src=%s/broadcast:23", len(players), message, SRC)
+
+    frames = {}  # (codec, message bundled) -> frame
+    recipients = Counter()
+    sends = []
+    for player in players:
+        key = (player.codec, player.bundle(message))
+
+        if key not in frames:
+            frames[key] = player.codec.encode(key[1])
+        recipients[key] += 1
+        sends.append((player, frames[key], key[1]))
+
+    for (codec, bundled), frame in frames.items():
+        M.record_sent(bundled, len(frame) * recipients[codec, bundled], recipients[codec, bundled])
+
+    pending = []
+    for player, frame, bundled in sends:
+        if player.outbound is not None:
+            player.send(frame, is_board_update(bundled))
+            continue
+
+        rest = player.send_without_blocking(frame)
+
+        if rest:
+            pending.append(get_executor().submit(player.send, rest))
+
+    if pending:
+        wait(pending)
+
+
+def broadcast_deferred(players: list, message: str):
+    """
+    Defer a message for the players that accepted P.FUSED (see Player.defer), and broadcast it to the others now.
+    :return: None
+    """
+    now = []
+    for player in players:
+        if P.FUSED in player.capabilities:
+            player.deferred.append(message)
+        else:
+            now.append(player)
+
+    if now:
+        broadcast(now, message)
+
+
+async def broadcast_async(players: list, message: str):
+    """
+    The asyncio counterpart of broadcast: encode once per codec and write to every transport, without waiting for any
+    of them to drain. What a client has not read yet stays in its transport's buffer; a client more than max_buffered
+    bytes behind is disconnected, see AsyncPlayer.send.
+    :param players: the AsyncPlayers to send the message to.
+    :param message: the message to send.
+    :return: None
+    """
+    logger.info("Broadcasting to %d players: %s. src=%s/broadcast_async:47", len(players), message, SRC)
+
+    frames = {}
+    for player in players:
+        if player.codec not in frames:
+            frames[player.codec] = player.codec.encode(message)
+    M.record_sent(message, sum(len(frames[player.codec]) for player in players), len(players))
+
+    await asyncio.gather(*[player.send(frames[player.codec]) for player in players])
+
+
+def get_executor():
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='broadcast')
+    return _executor
@@ -0,0 +1,260 @@
+import asyncio
+import logging
+import time
+
+import model.metrics as M
+import model.protocol as P
+from model.async_player import AsyncPlayer
+from model.logger import Logger
+from server.broadcast import broadcast_async
+from server.deadlines import PromptDeadlines
+from server.hangman import Hangman
+
+SRC = 'server/coroutines/game_coroutine.py'
+
+logger = Logger.create_logger('ASYNC_GAME', logging.INFO, to_file=True)
+
+
+class AsyncGame:
+    """
+    The asyncio counterpart of server.game.Game.
+    Plays the same game over the same messages, but as a coroutine on the server's event loop instead of a thread.
+    Prompts have the same deadlines and retries, and a player who misses one is skipped, forfeits or is evicted, as
+    self.deadlines has it, while the others play on.
+    """
+    UNKNOWN = "*"
+    MIN_PLAYERS = 2  # a choosing player and a guessing player
+
+    def __init__(self, group, deadlines: PromptDeadlines = None):
+        """
+        Initialise the game.
+        :param group: the group to play with.
+        :param deadlines: how long players have to answer, and what happens when they do not.
+                          Default: PromptDeadlines(), skipping their turn.
+        """
+        self.group = group
+        self.deadlines = deadlines if deadlines is not None else PromptDeadlines()
+        self.current_player = None
+        self.guessing_player = None
+        self.unanswered = 0  # prompts missed in a row, by any player
+        self.thread_finished = False
+        self.game_over = False
+
+    def __repr__(self):
+        return f"<AsyncGame id={id(self)} players={self.group.players} />"
+
+    @property
+    def get_group(self):
+        return self.group
+
+    @property
+    def is_abandoned(self):
+        """
+        Return: True if too few players are left to play, or if every one of them missed a prompt in a row.
+        """
+        players = len(self.group.players)
+        return players < AsyncGame.MIN_PLAYERS or self.unanswered >= players
+
+    async def run(self):
+        try:
+            await self.play()
+        finally:
+            await self.clean_up()
+
+    async def play(self):
+        # Main game loop
+        while not self.game_over and not self.is_abandoned:
+            self.current_player = self.group.next_player(self.current_player)
+
+            await self.tell_game_started()
+            max_tries, word, missed = await self.request_current_player_info()
+
+            if word is not None:
+                hangman = Hangman(word, max_tries)
+
+                if not await self.game_part_guessing(hangman):
+                    break
+                await self.communicate_win_or_loss(hangman.tries, hangman.max_tries)
+            elif missed == PromptDeadlines.FORFEIT:
+                await self.communicate_win_or_loss(0, 0)  # the choosing player gave up their word: the others win
+            else:
+                continue  # skipped, or the choosing player was evicted: the next player chooses
+
+            if not await self.request_continue_game():
+                self.game_over = True
+        # End main game loop
+
+    async def tell_game_started(self):
+        await self.tell_all_players(P.GAME_START)
+        await asyncio.sleep(P.turn_delay(self.group.players))
+        to_send = P.construct_choosing_player(self.current_player)
+        await self.tell_all_but_current_player(to_send)
+
+    async def game_part_guessing(self, hangman: Hangman):
+        """
+        Let the guessing players guess in turn until the word is found or the tries run out.
+        Return: False if the round cannot be finished, too few players being left.
+        """
+        self.guessing_player = self.group.select_first_guessing_player(self.current_player)
+
+        while not hangman.has_winner and hangman.tries <= hangman.max_tries:
+            if self.is_abandoned:
+                return False
+            self.guessing_player = self.group.next_guessing_player(self.current_player, self.guessing_player)
+
+            await self.tell_all_players(P.construct_move(hangman.guessed_letters))
+            await asyncio.sleep(P.turn_delay(self.group.players))
+
+            guess, missed = await self.request_guess(self.guessing_player, hangman.max_tries, hangman.tries)
+
+            if guess is not None:
+                await self.guessing_player.tell(P.construct_correct(hangman.guess(guess)))
+            elif missed == PromptDeadlines.FORFEIT:
+                hangman.forfeit()
+                await self.guessing_player.tell(P.construct_correct(False))
+        return True
+
+    async def communicate_win_or_loss(self, turns, max_tries):
+        scores = [player.score for player in self.group.players]
+        if turns <= max_tries:
+            await self.tell_all_but_current_player(P.won(scores))
+            await self.tell_current_player(P.lost(scores))
+        else:
+            self.current_player.increase_score()
+            await self.tell_all_but_current_player(P.lost(scores))
+            await self.tell_current_player(P.won(scores))
+
+    async def request_guess(self, guessing_player: AsyncPlayer, max_tries: int, tries: int):
+        """
+        Return: a tuple (guess, missed), guess None if the guessing player gave none, missed then being what was
+                done about it, see PromptDeadlines.
+        """
+        turn = P.construct_turn(guessing_player, max_tries - tries)
+        guess, cause = await self._ask(guessing_player, PromptDeadlines.GUESS, lambda: self.tell_all_players(turn),
+                                       P.decode_guess, M.TURN_RESPONSE_SECONDS)
+
+        if guess is not None:
+            return guess, None
+        return None, await self._missed(guessing_player, PromptDeadlines.GUESS, cause)
+
+    async def request_continue_game(self):
+        responses = await asyncio.gather(*[self._request_continue(player) for player in self.group.players])
+        return all(responses)
+
+    async def _request_continue(self, player: AsyncPlayer):
+        answer, cause = await self._ask(player, PromptDeadlines.CONTINUE, lambda: player.tell(P.CONTINUE_PLAYING),
+                                        P.decode_continue)
+
+        if answer is None:
+            self.deadlines.missed(self, player, PromptDeadlines.CONTINUE, cause)
+        return bool(answer)
+
+    async def _request_max_tries(self):
+        return await self._ask(self.current_player, PromptDeadlines.MAX_TRIES,
+                               lambda: self.tell_current_player(P.REQUEST_MAX_TRIES), P.decode_max_tries)
+
+    async def _request_secret_word(self):
+        secret_word, cause = await self._ask(self.current_player, PromptDeadlines.SECRET,
+                                             lambda: self.tell_current_player(P.YOUR_TURN), P.decode_secret_word)
+
+        if secret_word is None:
+            return None, cause
+        return [letter for letter in secret_word.lower()], None
+
+    async def request_current_player_info(self):
+        """
+        Ask the choosing player for the max tries, then for the secret word.
+        Return: a tuple (max_tries, word, missed), word None if the choosing player did not give both, missed then
+                being what was done about it, see PromptDeadlines.
+        """
+        choosing_player = self.current_player
+        max_tries, cause = await self._request_max_tries()
+
+        if max_tries is not None:
+            word, cause = await self._request_secret_word()
+
+            if word is not None:
+                return max_tries, word, None
+
+        prompt = PromptDeadlines.MAX_TRIES if max_tries is None else PromptDeadlines.SECRET
+        return None, None, await self._missed(choosing_player, prompt, cause)
+
+    async def _ask(self, player: AsyncPlayer, prompt: str, ask, decode, latency=None):
+        """
+        Prompt a player until they answer validly, for at most self.deadlines.retries times and until the prompt's
+        deadline. Every invalid answer is told INVALID_INPUT, then prompted again.
+        :param prompt: the prompt, as named in PromptDeadlines, e.g. PromptDeadlines.GUESS.
+        :param ask: a function returning the coroutine that sends the prompt.
+        :param decode: the decoder of the command expected, see P.decode_answer.
+        :param latency: a histogram observing how long the player took to answer, if any.
+        Return: a tuple (answer, cause), answer None if there was no valid one, cause then being
+                PromptDeadlines.DEADLINE, RETRIES or DISCONNECTED.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadlines.timeout(prompt)
+
+        for _ in range(self.deadlines.retries):
+            await ask()
+            asked = time.perf_counter()
+
+            try:
+                response = await player.listen(deadline - loop.time())
+            except asyncio.TimeoutError:
+                return None, PromptDeadlines.DEADLINE
+
+            if response is None:
+                return None, PromptDeadlines.DISCONNECTED
+            if latency is not None:
+                latency.observe(time.perf_counter() - asked)
+
+            answer = P.decode_answer(response, decode)
+
+            if answer is not None:
+                if prompt != PromptDeadlines.CONTINUE:
+                    self.unanswered = 0  # answers to play again come in all at once, from every player
+                return answer, None
+            await player.tell(P.INVALID_INPUT)
+
+        return None, PromptDeadlines.RETRIES
+
+    async def _missed(self, player: AsyncPlayer, prompt: str, cause: str):
+        """
+        Act on a player not answering a prompt of the round, as self.deadlines has it.
+        Return: what was done, PromptDeadlines.SKIP, FORFEIT or EVICT.
+        """
+        self.unanswered += 1
+        missed = self.deadlines.missed(self, player, prompt, cause)
+
+        if missed == PromptDeadlines.EVICT:
+            await self._evict(player, cause)
+        return missed
+
+    async def _evict(self, player: AsyncPlayer, cause: str):
+        """
+        Disconnect a player and play on without them. The turns move on as if they had just had theirs.
+        """
+        players = self.group.players
+        guessing_players = [p for p in players if p != self.current_player]
+
+        if player == self.current_player:
+            self.current_player = players[players.index(player) - 1]
+        elif player == self.guessing_player:
+            self.guessing_player = guessing_players[guessing_players.index(player) - 1]
+
+        logger.warning(f"Evicting {player} from {self} ({cause}). src={SRC}/_evict:244")
+        M.PLAYERS_EVICTED.inc(1, cause)
+        self.group.evict(player)
+        await player.disconnect()
+
+    async def tell_all_players(self, message):
+        await broadcast_async(self.group.players, message)
+
+    async def tell_current_player(self, message):
+        await self.current_player.tell(message)
+
+    async def tell_all_but_current_player(self, message):
+        await broadcast_async([player for player in self.group.players if player != self.current_player], message)
+
+    async def clean_up(self):
+        await asyncio.gather(*[player.disconnect() for player in self.group.players])
+        self.thread_finished = True
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+
+import model.protocol as P
+from model.logger import Logger
+from server.coroutines.game_coroutine import AsyncGame
+from server.deadlines import PromptDeadlines
+from server.lobby_registry import LobbyRegistry
+
+SRC = 'server/coroutines/group_manager_coroutine'
+
+
+class AsyncGroupManager:
+    """The asyncio counterpart of GroupManager, managing the different groups or lobbies"""
+
+    def __init__(self, lobbies: LobbyRegistry, terminal_event: asyncio.Event, deadlines: PromptDeadlines = None):
+        """
+        Initialise the group manager.
+        :param lobbies: the registry of groups this manager will manage.
+        :param terminal_event: an event set when the server shuts down.
+        :param deadlines: the deadlines of every game's prompts. Default: PromptDeadlines().
+        """
+        self.lobbies = lobbies
+        self.terminal_event = terminal_event
+        self.deadlines = deadlines
+        self.logger = Logger.create_logger(self.__repr__(), logging.INFO, to_file=True)
+        self.games = {}
+        self.ready_groups = asyncio.Queue()
+
+    def __repr__(self):
+        return f'<AsyncGroupManager, id={id(self)}>'
+
+    async def run(self):
+        """
+        Start a game for a group the moment the lobby registry reports it ready.
+        Every P.CYCLE_TIMEOUT seconds, also sweep all lobbies as a safety net: evict players who disconnected,
+        start any ready group that was missed and clean up finished games.
+        :return: None
+        """
+        loop = asyncio.get_running_loop()
+        self.lobbies.subscribe(self.ready_groups.put_nowait)
+        next_sweep = loop.time()
+
+        while not self.terminal_event.is_set():
+            timeout = next_sweep - loop.time()
+
+            if timeout > 0:
+                try:
+                    self.start_game(await asyncio.wait_for(self.ready_groups.get(), timeout))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self.sweep()
+            next_sweep = loop.time() + P.CYCLE_TIMEOUT
+
+        self.logger.warning(f'Shutting down manager coroutine. src={SRC}/run:52')
+        for task in self.games.values():
+            task.cancel()
+
+    def start_game(self, group):
+        """
+        Start a game for a group, unless it is not ready or another call already started it.
+        :param group: the group to start a game for.
+        :return: None
+        """
+        if self.lobbies.start_if_ready(group):
+            self.logger.info(f"{group}, ready... src={SRC}/start_game:63")
+
+            game = AsyncGame(group, self.deadlines)
+            self.games[game] = asyncio.create_task(game.run())
+
+    async def sweep(self):
+        """
+        Check every lobby: evict the players whose connection closed, start a game if it is ready.
+        Then clean up finished games.
+        The event loop notices closed connections by itself, so this sends nothing over the network.
+        :return: None
+        """
+        for group in [g for g in self.lobbies if not g.in_game]:
+            for player in [p for p in group.players if not p.is_connected]:
+                if self.lobbies.evict(player, group):
+                    self.logger.info(f"{player} is no longer connected. Evicted from lobby... src={SRC}/sweep:76")
+                    player.close()
+
+            self.start_game(group)
+
+        self.clean_finished_games()
+
+    def clean_finished_games(self):
+        for game in [g for g, task in self.games.items() if task.done()]:
+            task = self.games.pop(game)
+
+            if not task.cancelled() and task.exception() is not None:
+                self.logger.error(f'{game} crashed: {task.exception()!r} src={SRC}/clean_finished_games:74')
+
+            if self.lobbies.remove(game.get_group):
+                self.logger.info(f'Game {game} is over. Cleaned up {game} and {game.get_group}')
+            else:
+                self.logger.error(f'{game} not found or corresponding group not found... '
+                                  f'src={SRC}/clean_finished_games:80')
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import time
+
+from model.logger import Logger
+import model.metrics as M
+import model.protocol as P
+from model.async_player import AsyncPlayer
+from server.lobby_registry import LobbyRegistry
+
+SRC = 'server/coroutines/new_connection_coroutine'
+
+
+class AsyncConnectionHandler:
+    """
+    The asyncio counterpart of ConnectionHandler.
+    Performs the handshake with a freshly accepted connection and queues the player in a lobby.
+    """
+    logger = Logger.create_logger('AsyncConnectionHandler', logging.INFO, to_file=True)
+    CAPABILITIES = [P.PIPELINE]  # no binary codec: AsyncPlayer only reads text frames
+
+    def __init__(self, player: AsyncPlayer, lobbies: LobbyRegistry):
+        """
+        Initialise the connection handler.
+        :param player: the player wrapping the accepted connection.
+        :param lobbies: the registry of groups (lobbies) known to the server.
+        """
+        self.player = player
+        self.lobbies = lobbies
+
+    def __repr__(self):
+        return f'<AsyncConnectionHandler remote={self.player.peer}/>'
+
+    async def run(self):
+        method = 'run'
+        started = time.perf_counter()
+        await self._handshake()
+        early = await self._await_ready()
+
+        for corrections in range(P.MAX_REQUEST_CORRECTIONS):
+            if corrections > 0:
+                self.logger.warning(f"Input not recognised. Retrying... src={SRC}/{method}:40")
+                await self.player.tell(P.INVALID_INPUT)
+
+            if early is None:
+                await self._request_player()
+                response = await self.player.listen()
+            else:
+                response, early = early, None
+
+            if response is None:
+                self.logger.warning(f"Connection with {self.player.peer} closed. src={SRC}/{method}:46")
+                self.player.close()
+                return
+
+            commands = P.decode_split_commands(response)
+
+            if len(commands) == 1 or len(commands) == 2 and commands[1].startswith(P.CAPABILITIES):
+                result = P.decode_player(commands[0])
+
+                if result.success:
+                    self.player.name, self.player.preferred_players = result.result
+                    self._negotiate(commands[1:])
+                    await self._add_to_group()
+                    M.HANDSHAKE_SECONDS.observe(time.perf_counter() - started)
+                    return
+
+        self.logger.warning(f"Max request attempts exceeded. Throwing out connection... src={SRC}/{method}:59")
+        await self.player.disconnect()
+
+    async def _handshake(self):
+        await self.player.tell(P.construct_welcome(AsyncConnectionHandler.CAPABILITIES))
+
+    async def _await_ready(self):
+        """
+        Leave the client MESSAGE_DELAY to take in WELCOME, unless it acknowledges it with READY first.
+        Return: the client's first message if it was something else, to be read as its player record. None otherwise.
+        """
+        try:
+            response = await self.player.listen(P.MESSAGE_DELAY)
+        except asyncio.TimeoutError:
+            return None
+        return None if response == P.READY else response
+
+    def _negotiate(self, commands: list):
+        """
+        Agree on the capabilities the client accepted in its player record, see ConnectionHandler._negotiate.
+        """
+        accepted = P.decode_capabilities(commands[0]) if commands else []
+        self.player.capabilities = set(accepted) & set(AsyncConnectionHandler.CAPABILITIES)
+
+    async def _request_player(self):
+        await self.player.tell(P.REQUEST_PLAYER)
+
+    async def _add_to_group(self):
+        await self.player.tell(P.ADDING_TO_QUEUE)
+        self.lobbies.place(self.player)
@@ -0,0 +1,73 @@
+import logging
+
+import model.metrics as M
+import model.protocol as P
+from model.logger import Logger
+
+SRC = 'server/deadlines.py'
+
+logger = Logger.create_logger('DEADLINES', logging.INFO, to_file=True)
+
+
+class PromptDeadlines:
+    """
+    How long a player has to answer each prompt of a game, how many invalid answers they may send before it counts
+    as no answer at all, and what the game does with a player who did not answer:
+    SKIP passes their turn on to the next player, FORFEIT counts the turn as lost, and EVICT disconnects them and
+    plays on without them, as long as enough players are left.
+    Not answering whether to play again always counts as no, and a player who disconnected is always evicted.
+    """
+    SKIP = 'skip'
+    FORFEIT = 'forfeit'
+    EVICT = 'evict'
+    POLICIES = (SKIP, FORFEIT, EVICT)
+
+    # The prompts, as labelled in the metrics
+    MAX_TRIES = 'max_tries'
+    SECRET = 'secret'
+    GUESS = 'guess'
+    CONTINUE = 'continue'
+
+    # Why a prompt went unanswered
+    DEADLINE = 'deadline'
+    RETRIES = 'retries'
+    DISCONNECTED = 'disconnected'
+
+    TIMEOUTS = {MAX_TRIES: 60, SECRET: 60, GUESS: 30, CONTINUE: 60}  # in seconds
+
+    def __init__(self, timeouts=None, retries=P.MAX_REQUEST_CORRECTIONS, on_expiry=SKIP):
+        """
+        Initialise the deadlines.
+        :param timeouts: a dict, prompt -> the seconds a player has to answer it, overriding TIMEOUTS.
+        :param retries: the most times a prompt is sent, the first included, when the answers are invalid.
+        :param on_expiry: PromptDeadlines.SKIP (default), FORFEIT or EVICT.
+        """
+        if on_expiry not in PromptDeadlines.POLICIES:
+            raise ValueError(f'Unknown expiry policy: {on_expiry}. Expected one of {PromptDeadlines.POLICIES}')
+        if retries < 1:
+            raise ValueError(f'A prompt needs to be sent at least once, got {retries} retries')
+
+        self.timeouts = dict(PromptDeadlines.TIMEOUTS, **(timeouts or {}))
+        self.retries = retries
+        self.on_expiry = on_expiry
+
+    def __repr__(self):
+        return f"<PromptDeadlines timeouts={self.timeouts} retries={self.retries} on_expiry={self.on_expiry} />"
+
+    def timeout(self, prompt: str):
+        return self.timeouts[prompt]
+
+    def missed(self, game, player, prompt: str, cause: str):
+        """
+        Count and log a prompt a player did not answer.
+        :param cause: PromptDeadlines.DEADLINE, RETRIES or DISCONNECTED.
+        Return: what the game is to do about it, PromptDeadlines.SKIP, FORFEIT or EVICT.
+        """
+        if cause == PromptDeadlines.DISCONNECTED:
+            logger.warning(f"{player} disconnected from {game} while asked for {prompt}. src={SRC}/missed:66")
+            return PromptDeadlines.EVICT
+
+        M.PROMPTS_EXPIRED.inc(1, prompt, cause)
+        logger.warning(f"{player} did not answer {prompt} in {game} ({cause}): {self.on_expiry}. "
+                       f"src={SRC}/missed:70")
+        return self.on_expiry
@@ -0,0 +1,115 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+import logging
+import time
+
+import model.metrics as M
+from model.logger import Logger
+
+SRC = 'server/executor.py'
+
+logger = Logger.create_logger('EXECUTOR', logging.INFO, to_file=True)
+_executor = None
+
+
+class ExecutorFull(Exception):
+    """Raised when a task is submitted to a BoundedExecutor whose workers are all busy and whose queue is full."""
+
+
+class BoundedExecutor:
+    """
+    A pool of at most max_workers threads, started as they are needed and kept for the next task, with at most
+    max_queued tasks waiting for one of them. Tasks that have to wait are logged and counted, see model/metrics.py.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queued=None):
+        """
+        Initialise the executor.
+        :param name: the name of the pool, used for its threads, its logs and its metrics.
+        :param max_workers: the most threads the pool runs at once.
+        :param max_queued: the most tasks waiting for a thread, beyond which submit raises ExecutorFull.
+                           Default = None, queueing any number.
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self.lock = Lock()
+        self.busy = 0
+        self.queued = 0
+
+    def __repr__(self):
+        return f"<BoundedExecutor name={self.name} busy={self.busy}/{self.max_workers} queued={self.queued} />"
+
+    def submit(self, function, *arguments):
+        """
+        Run function(*arguments) on one of the pool's threads, as soon as one is free.
+        Return: a concurrent.futures.Future of the result.
+        Raises ExecutorFull if max_queued tasks are already waiting for a thread.
+        """
+        with self.lock:
+            waits = self.busy + self.queued >= self.max_workers
+
+            if waits and self.max_queued is not None and self.queued >= self.max_queued:
+                M.EXECUTOR_REJECTED.inc(1, self.name)
+                raise ExecutorFull(f'{self}')
+            self.queued += 1
+
+        M.EXECUTOR_QUEUED.inc(1, self.name)
+        if waits:
+            logger.warning(f"{self.name}: all {self.max_workers} workers busy, {self.queued} task(s) waiting. "
+                           f"src={SRC}/submit:56")
+
+        return self.pool.submit(self._run, time.perf_counter(), function, arguments)
+
+    def _run(self, submitted: float, function, arguments: tuple):
+        with self.lock:
+            self.queued -= 1
+            self.busy += 1
+
+        M.EXECUTOR_QUEUED.dec(1, self.name)
+        M.EXECUTOR_BUSY.inc(1, self.name)
+        M.EXECUTOR_WAIT_SECONDS.observe(time.perf_counter() - submitted, self.name)
+
+        try:
+            return function(*arguments)
+        finally:
+            with self.lock:
+                self.busy -= 1
+            M.EXECUTOR_BUSY.dec(1, self.name)
+
+    def shutdown(self, wait=True):
+        self.pool.shutdown(wait=wait)
+
+
+class SessionExecutor:
+    """
+    The server-wide threads for games and for blocking prompts to players, e.g. asking them to play again.
+    Games and prompts have pools of their own: a game waits on its prompts, so sharing one pool would let running
+    games take every thread their prompts need.
+    """
+    MAX_GAMES = 64  # games played at once
+    MAX_QUEUED_GAMES = 256  # games waiting for a thread, beyond which games are turned away
+    MAX_PROMPTS = 128  # blocking prompts waiting for an answer at once
+
+    def __init__(self, max_games=MAX_GAMES, max_queued_games=MAX_QUEUED_GAMES, max_prompts=MAX_PROMPTS):
+        self.games = BoundedExecutor('games', max_games, max_queued_games)
+        self.prompts = BoundedExecutor('prompts', max_prompts)
+
+    def __repr__(self):
+        return f"<SessionExecutor games={self.games} prompts={self.prompts} />"
+
+    def shutdown(self, wait=True):
+        self.games.shutdown(wait)
+        self.prompts.shutdown(wait)
+
+
+def get_executor():
+    """
+    Return: the SessionExecutor shared by everything not given one of its own, created with the default limits.
+    """
+    global _executor
+
+    if _executor is None:
+        _executor = SessionExecutor()
+    return _executor
@@ -1,71 +1,134 @@
-from threading import Lock, Thread
-import concurrent.futures as F
+import logging
+import socket as S
 import time
 
+import model.metrics as M
 import model.protocol as P
+from model.clock import SYSTEM_CLOCK
+from model.logger import Logger
 from model.player import Player
+from server.board import BoardUpdates
+from server.broadcast import broadcast
+from server.broadcast import broadcast_deferred
+from server.deadlines import PromptDeadlines
+from server.executor import SessionExecutor
+from server.executor import get_executor
 from server.hangman import Hangman
 
+SRC = 'server/game.py'
+
+logger = Logger.create_logger('GAME', logging.INFO, to_file=True)
 
-class Game(Thread):
-    UNKNOWN = "*"
 
-    def __init__(self, group, lock: Lock):
-        super().__init__()
+class Game:
+    """
+    A game of hangman for one group, played start to finish by run(): on a thread of the server's SessionExecutor,
+    or on the calling thread in tests.
+    Every prompt has a deadline and a bounded number of retries (see server/deadlines.py), so a player who stalls
+    holds up their game for a while at most, never for good.
+    """
+    UNKNOWN = "*"
+    MIN_PLAYERS = 2  # a choosing player and a guessing player
+
+    def __init__(self, group, clock=SYSTEM_CLOCK, executor: SessionExecutor = None, deadlines: PromptDeadlines = None):
+        """
+        Initialise the game.
+        :param group: the group to play with.
+        :param clock: the clock to pause on, see model/clock.py. A VirtualClock plays without pausing.
+        :param executor: the executor whose prompt threads ask every player to play again at once.
+                         Default: the executor shared by the process.
+        :param deadlines: how long players have to answer, and what happens when they do not.
+                          Default: PromptDeadlines(), skipping their turn.
+        """
         self.group = group
-        self.lock = lock
+        self.clock = clock
+        self.executor = executor if executor is not None else get_executor()
+        self.deadlines = deadlines if deadlines is not None else PromptDeadlines()
         self.current_player = None
+        self.guessing_player = None
+        self.board = None  # the BoardUpdates of the current round
+        self.unanswered = 0  # prompts missed in a row, by any player
         self.thread_finished = False
         self.game_over = False
+        self.start_latency = None
 
     def __repr__(self):
         return f"<Game id={id(self)} players={self.group.players} />"
 
     def run(self):
         self.play()
-        with self.lock:
-            self.clean_up()
+        self.clean_up()
 
     def play(self):
         # Main game/thread loop
-        while not self.game_over:
+        # The group is in game, so no other thread changes its players: no lock is needed while playing.
+        while not self.game_over and not self.is_abandoned:
             self.current_player = self.group.next_player(self.current_player)
 
-            with self.lock:
-                self.tell_game_started()
-                max_tries, word = self.request_current_player_info()
+            self.tell_game_started()
+            max_tries, word, missed = self.request_current_player_info()
 
-            hangman = Hangman(word, max_tries)
+            if word is not None:
+                hangman = Hangman(word, max_tries)
 
-            with self.lock:
-                self.game_part_guessing(hangman)
+                if not self.game_part_guessing(hangman):
+                    break
                 self.communicate_win_or_loss(hangman.tries, hangman.max_tries)
+            elif missed == PromptDeadlines.FORFEIT:
+                self.communicate_win_or_loss(0, 0)  # the choosing player gave up their word: the others win
+            else:
+                continue  # skipped, or the choosing player was evicted: the next player chooses
 
-                if not self.request_continue_game():
-                    self.game_over = True
+            if not self.request_continue_game():
+                self.game_over = True
         # End main game/thread loop
 
     @property
     def get_group(self):
         return self.group
 
+    @property
+    def is_abandoned(self):
+        """
+        Return: True if too few players are left to play, or if every one of them missed a prompt in a row.
+        """
+        players = len(self.group.players)
+        return players < Game.MIN_PLAYERS or self.unanswered >= players
+
     def tell_game_started(self):
         self.tell_all_players(P.GAME_START)
-        time.sleep(0.5)
+
+        if self.start_latency is None and self.group.ready_since is not None:
+            self.start_latency = time.perf_counter() - self.group.ready_since
+            logger.info(f"{self} started {self.start_latency * 1000:.1f} ms after its lobby filled up.")
+        self.clock.sleep(P.turn_delay(self.group.players))
         to_send = P.construct_choosing_player(self.current_player)
         self.tell_all_but_current_player(to_send)
 
     def game_part_guessing(self, hangman: Hangman):
-        guessing_player = self.group.select_first_guessing_player(self.current_player)
+        """
+        Let the guessing players guess in turn until the word is found or the tries run out.
+        Return: False if the round cannot be finished, too few players being left.
+        """
+        self.guessing_player = self.group.select_first_guessing_player(self.current_player)
+        self.board = BoardUpdates(hangman)
 
         while not hangman.has_winner and hangman.tries <= hangman.max_tries:
-            guessing_player = self.group.next_guessing_player(self.current_player, guessing_player)
+            if self.is_abandoned:
+                return False
+            self.guessing_player = self.group.next_guessing_player(self.current_player, self.guessing_player)
+
+            self.tell_board()
+            self.clock.sleep(P.turn_delay(self.group.players))
 
-            self.tell_all_players(P.construct_move(hangman.guessed_letters))
-            time.sleep(0.5)
+            guess, missed = self.request_guess(self.guessing_player, hangman.max_tries, hangman.tries)
 
-            guess = self.request_guess(guessing_player, hangman.max_tries, hangman.tries)
-            guessing_player.tell(P.construct_correct(hangman.guess(guess)))
+            if guess is not None:
+                self.guessing_player.defer(P.construct_correct(hangman.guess(guess)))
+            elif missed == PromptDeadlines.FORFEIT:
+                hangman.forfeit()
+                self.guessing_player.defer(P.construct_correct(False))
+        return True
 
     def communicate_win_or_loss(self, turns, max_tries):
         scores = [score for score in [player.score for player in self.group.players]]
@@ -78,75 +141,157 @@ class Game(Thread):
             self.tell_current_player(P.won(scores))
 
     def request_guess(self, guessing_player: Player, max_tries: int, tries: int):
-        self.tell_all_players(P.construct_turn(guessing_player, max_tries - tries))
-
-        response = guessing_player.listen()
-        commands = P.decode_split_commands(response)
-
-        if len(commands) != 1:
-            raise ValueError
-
-        guess = P.decode_guess(commands[0])
+        """
+        Return: a tuple (guess, missed), guess None if the guessing player gave none, missed then being what was
+                done about it, see PromptDeadlines.
+        """
+        turn = P.construct_turn(guessing_player, max_tries - tries)
+        guess, cause = self._ask(guessing_player, PromptDeadlines.GUESS, lambda: self.tell_all_players(turn),
+                                 P.decode_guess, M.TURN_RESPONSE_SECONDS)
 
         if guess is not None:
-            return guess
-
-        guessing_player.tell(P.INVALID_INPUT)
-        self.request_guess(guessing_player, max_tries, tries)
+            return guess, None
+        return None, self._missed(guessing_player, PromptDeadlines.GUESS, cause)
 
     def request_continue_game(self):
-        with F.ThreadPoolExecutor() as executor:
-            futures = [f for f in [executor.submit(p.play_again_thread) for p in self.group.players]]
-            responses = [f.result() for f in futures]
+        futures = [self.executor.prompts.submit(self._request_continue, player) for player in self.group.players]
+        responses = [future.result() for future in futures]
 
         return all(responses)
 
-    def _request_max_tries(self):
-        self.tell_current_player(P.REQUEST_MAX_TRIES)
-
-        response = self.current_player.listen()
-        commands = P.decode_split_commands(response)
+    def _request_continue(self, player: Player):
+        answer, cause = self._ask(player, PromptDeadlines.CONTINUE, lambda: player.tell(P.CONTINUE_PLAYING),
+                                  lambda command: P.decode_continue(command) is True)
 
-        if len(commands) == 1:
-            max_tries = P.decode_max_tries(commands[0])
-            return max_tries
+        if answer is None:
+            self.deadlines.missed(self, player, PromptDeadlines.CONTINUE, cause)
+        return bool(answer)
 
-        self.tell_current_player(P.INVALID_INPUT)
-        self._request_max_tries()
+    def _request_max_tries(self):
+        return self._ask(self.current_player, PromptDeadlines.MAX_TRIES,
+                         lambda: self.tell_current_player(P.REQUEST_MAX_TRIES), P.decode_max_tries)
 
     def _request_secret_word(self):
-        self.tell_current_player(P.YOUR_TURN)
-
-        response = self.current_player.listen()
-        commands = P.decode_split_commands(response)
+        secret_word, cause = self._ask(self.current_player, PromptDeadlines.SECRET,
+                                       lambda: self.tell_current_player(P.YOUR_TURN), P.decode_secret_word)
 
-        if len(commands) == 1:
-            secret_word = P.decode_secret_word(commands[0])
-
-            if secret_word is not None:
-                word = [letter for letter in secret_word.lower()]
-                return word
-
-        self.tell_current_player(P.INVALID_INPUT)
-        self._request_secret_word()
+        if secret_word is None:
+            return None, cause
+        return [letter for letter in secret_word.lower()], None
 
     def request_current_player_info(self):
-        return self._request_max_tries(), self._request_secret_word()
+        """
+        Ask the choosing player for the max tries, then for the secret word.
+        Return: a tuple (max_tries, word, missed), word None if the choosing player did not give both, missed then
+                being what was done about it, see PromptDeadlines.
+        """
+        choosing_player = self.current_player
+        max_tries, cause = self._request_max_tries()
+
+        if max_tries is not None:
+            word, cause = self._request_secret_word()
+
+            if word is not None:
+                return max_tries, word, None
+
+        prompt = PromptDeadlines.MAX_TRIES if max_tries is None else PromptDeadlines.SECRET
+        return None, None, self._missed(choosing_player, prompt, cause)
+
+    def _ask(self, player: Player, prompt: str, ask, decode, latency=None):
+        """
+        Prompt a player until they answer validly, for at most self.deadlines.retries times and until the prompt's
+        deadline. Every invalid answer is told INVALID_INPUT, then prompted again.
+        :param prompt: the prompt, as named in PromptDeadlines, e.g. PromptDeadlines.GUESS.
+        :param ask: a function sending the prompt.
+        :param decode: the decoder of the command expected, see P.decode_answer.
+        :param latency: a histogram observing how long the player took to answer, if any.
+        Return: a tuple (answer, cause), answer None if there was no valid one, cause then being
+                PromptDeadlines.DEADLINE, RETRIES or DISCONNECTED.
+        """
+        deadline = self.clock.now() + self.deadlines.timeout(prompt)
+
+        for _ in range(self.deadlines.retries):
+            ask()
+            asked = time.perf_counter()
+
+            try:
+                response = self._listen(player, deadline)
+            except S.timeout:
+                return None, PromptDeadlines.DEADLINE
+
+            if response is None:
+                return None, PromptDeadlines.DISCONNECTED
+            if latency is not None:
+                latency.observe(time.perf_counter() - asked)
+
+            answer = P.decode_answer(response, decode)
+
+            if answer is not None:
+                if prompt != PromptDeadlines.CONTINUE:
+                    self.unanswered = 0  # answers to play again come in on the prompt threads
+                return answer, None
+            player.tell(P.INVALID_INPUT)
+
+        return None, PromptDeadlines.RETRIES
+
+    def _listen(self, player: Player, deadline: float):
+        """
+        Wait until deadline for the player's next message, sending them the board on the way if they ask for it.
+        The board is only read from a player while they are prompted, so a request for it may wait until then.
+        Return: the message, see Player.listen.
+        """
+        while True:
+            response = player.listen(deadline - self.clock.now())
+
+            if response != P.REQUEST_BOARD:
+                return response
+            if self.board is not None:
+                player.tell(self.board.snapshot())
+
+    def _missed(self, player: Player, prompt: str, cause: str):
+        """
+        Act on a player not answering a prompt of the round, as self.deadlines has it.
+        Return: what was done, PromptDeadlines.SKIP, FORFEIT or EVICT.
+        """
+        self.unanswered += 1
+        missed = self.deadlines.missed(self, player, prompt, cause)
+
+        if missed == PromptDeadlines.EVICT:
+            self._evict(player, cause)
+        return missed
+
+    def _evict(self, player: Player, cause: str):
+        """
+        Disconnect a player and play on without them. The turns move on as if they had just had theirs.
+        """
+        players = self.group.players
+        guessing_players = [p for p in players if p != self.current_player]
+
+        if player == self.current_player:
+            self.current_player = players[players.index(player) - 1]
+        elif player == self.guessing_player:
+            self.guessing_player = guessing_players[guessing_players.index(player) - 1]
+
+        logger.warning(f"Evicting {player} from {self} ({cause}). src={SRC}/_evict:257")
+        M.PLAYERS_EVICTED.inc(1, cause)
+        self.group.evict(player)
+        player.disconnect()
+
+    def tell_board(self):
+        for players, message in self.board.updates(self.group.players):
+            broadcast_deferred(players, message)  # sent with the turn announced next, to clients that fuse
 
     def tell_all_players(self, message):
-        for player in self.group.players:
-            player.tell(message)
+        broadcast(self.group.players, message)
 
     def tell_current_player(self, message):
         self.current_player.tell(message)
 
     def tell_all_but_current_player(self, message):
-        for player in self.group.players:
-            if player != self.current_player:
-                player.tell(message)
+        broadcast([player for player in self.group.players if player != self.current_player], message)
 
     def clean_up(self):
+        broadcast(self.group.players, P.FORCE_DISCONNECT)
         for player in self.group.players:
-            player.tell(P.FORCE_DISCONNECT)
-            player.get_connection.close()
+            player.close()
         self.thread_finished = True
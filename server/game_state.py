@@ -0,0 +1,399 @@
+from collections import deque
+import logging
+import time
+
+import model.metrics as M
+import model.protocol as P
+from model.clock import SYSTEM_CLOCK
+from model.logger import Logger
+from model.player import Player
+from server.board import BoardUpdates
+from server.broadcast import broadcast
+from server.broadcast import broadcast_deferred
+from server.deadlines import PromptDeadlines
+from server.hangman import Hangman
+
+SRC = 'server/game_state.py'
+
+logger = Logger.create_logger('GAME_STATE', logging.INFO, to_file=True)
+
+
+class GameStateMachine:
+    """
+    The same game as server.game.Game, plays the same messages in the same order, but never blocks: it is driven by
+    the messages its players send (on_message), the end of its pauses (on_timer) and lost connections
+    (on_disconnect), so one thread can drive many games at once, see server/threads/reactor_thread.py.
+    Messages a player sends before the game asks for them are kept until it does, exactly like the blocking Game reads
+    them from the connection later. Prompts expire on the same timer as the pauses, see server/deadlines.py.
+    """
+    STARTING = 'starting'  # pausing after GAME_START
+    MAX_TRIES = 'max_tries'  # waiting for the choosing player's max tries
+    SECRET = 'secret'  # waiting for the choosing player's secret word
+    MOVING = 'moving'  # pausing after a move was shown
+    GUESSING = 'guessing'  # waiting for the guessing player's guess
+    CONTINUING = 'continuing'  # waiting for every player to answer whether to play again
+    OVER = 'over'
+    PROMPTS = {MAX_TRIES: PromptDeadlines.MAX_TRIES, SECRET: PromptDeadlines.SECRET, GUESSING: PromptDeadlines.GUESS,
+               CONTINUING: PromptDeadlines.CONTINUE}
+    MIN_PLAYERS = 2  # a choosing player and a guessing player
+
+    def __init__(self, group, clock=SYSTEM_CLOCK, deadlines: PromptDeadlines = None):
+        """
+        Initialise the game.
+        :param group: the group to play with.
+        :param clock: the clock the pauses and deadlines are timed on, see model/clock.py.
+        :param deadlines: how long players have to answer, and what happens when they do not.
+                          Default: PromptDeadlines(), skipping their turn.
+        """
+        self.group = group
+        self.clock = clock
+        self.deadlines = deadlines if deadlines is not None else PromptDeadlines()
+        self.state = None
+        self.wake_at = None  # clock.now() at which on_timer is due: the end of a pause or the deadline of a prompt
+        self.current_player = None
+        self.guessing_player = None
+        self.max_tries = None
+        self.hangman = None
+        self.board = None  # the BoardUpdates of the current round
+        self.inbox = {id(player): deque() for player in group.players}
+        self.answers = {}  # id(player) -> whether they want to play again, while CONTINUING
+        self.prompted = {}  # id(player) -> the times the current prompt was sent to them
+        self.reprompt = None  # sends the current prompt again
+        self.unanswered = 0  # prompts missed in a row, by any player
+        self.evicted = []  # the players removed from the game, until the reactor stops watching them
+        self.asked = None  # time.perf_counter() when the current turn was announced
+        self.thread_finished = False  # named after Game's, as the GroupManager cleans up both
+        self.start_latency = None
+
+    def __repr__(self):
+        return f"<GameStateMachine id={id(self)} state={self.state} players={self.group.players} />"
+
+    @property
+    def get_group(self):
+        return self.group
+
+    @property
+    def awaiting(self):
+        """
+        Return: the players whose next message the game is waiting for.
+        """
+        if self.state in (GameStateMachine.MAX_TRIES, GameStateMachine.SECRET):
+            return [self.current_player]
+        if self.state == GameStateMachine.GUESSING:
+            return [self.guessing_player]
+        if self.state == GameStateMachine.CONTINUING:
+            return [player for player in self.group.players if id(player) not in self.answers]
+        return []
+
+    @property
+    def is_abandoned(self):
+        """
+        Return: True if too few players are left to play, or if every one of them missed a prompt in a row.
+        """
+        players = len(self.group.players)
+        return players < GameStateMachine.MIN_PLAYERS or self.unanswered >= players
+
+    def start(self):
+        """
+        Start the first round.
+        :return: None
+        """
+        self._start_round()
+
+    def on_message(self, player: Player, message: str):
+        """
+        Take a message a player sent, and act on it if the game is waiting for it. Requests for the board are answered
+        right away, whatever the game is waiting for.
+        :return: None
+        """
+        if self.state == GameStateMachine.OVER or not self._plays(player):
+            return
+        if message == P.REQUEST_BOARD:
+            if self.board is not None:
+                player.tell(self.board.snapshot())
+            return
+
+        self.inbox[id(player)].append(message)
+        self._process()
+
+    def on_timer(self):
+        """
+        End the current pause, or expire the current prompt.
+        @requires self.clock.now() >= self.wake_at
+        :return: None
+        """
+        self.wake_at = None
+
+        if self.state == GameStateMachine.STARTING:
+            self.tell_all_but_current_player(P.construct_choosing_player(self.current_player))
+            self._prompt(GameStateMachine.MAX_TRIES, lambda: self.current_player.tell(P.REQUEST_MAX_TRIES))
+        elif self.state == GameStateMachine.MOVING:
+            self._prompt(GameStateMachine.GUESSING, self._announce_turn)
+        elif self.state == GameStateMachine.CONTINUING:
+            for player in self.awaiting:
+                self._on_continue(player, None, PromptDeadlines.DEADLINE)
+        elif self.state != GameStateMachine.OVER:
+            self._missed(self.awaiting[0], PromptDeadlines.DEADLINE)
+        self._process()
+
+    def on_disconnect(self, player: Player):
+        """
+        Evict a player who disconnected, and play on without them if enough players are left.
+        :return: None
+        """
+        if self.state == GameStateMachine.OVER or not self._plays(player):
+            return
+
+        if player in self.awaiting:
+            if self.state == GameStateMachine.CONTINUING:
+                self._on_continue(player, None, PromptDeadlines.DISCONNECTED)
+            else:
+                self._missed(player, PromptDeadlines.DISCONNECTED)
+            self._process()
+            return
+
+        chose = player == self.current_player
+        up_next = self.state == GameStateMachine.MOVING and player == self.guessing_player
+        self._evict(player, PromptDeadlines.DISCONNECTED)
+        self.answers.pop(id(player), None)
+
+        if self.is_abandoned:
+            self.finish()
+        elif self.state == GameStateMachine.CONTINUING:
+            self._decide()
+        elif chose:
+            self._start_round()  # the round cannot be scored without its choosing player
+        elif up_next:
+            self.guessing_player = self.group.next_guessing_player(self.current_player, self.guessing_player)
+        self._process()
+
+    def finish(self):
+        """
+        Disconnect every player, and mark the game as over.
+        :return: None
+        """
+        if self.state == GameStateMachine.OVER:
+            return
+
+        self.state = GameStateMachine.OVER
+        self.wake_at = None
+        broadcast(self.group.players, P.FORCE_DISCONNECT)
+        for player in self.group.players:
+            player.close()
+        self.thread_finished = True
+
+    def _process(self):
+        """
+        Act on every message waiting in the inbox of a player the game is waiting for, until it waits for one that
+        has not arrived yet, or pauses.
+        """
+        progressed = True
+
+        while progressed:
+            progressed = False
+
+            for player in self.awaiting:
+                messages = self.inbox[id(player)]
+
+                if messages:
+                    self._handle(player, messages.popleft())
+                    progressed = True
+                    break
+
+    def _handle(self, player: Player, message: str):
+        if self.state == GameStateMachine.MAX_TRIES:
+            self._on_max_tries(player, message)
+        elif self.state == GameStateMachine.SECRET:
+            self._on_secret_word(player, message)
+        elif self.state == GameStateMachine.GUESSING:
+            self._on_guess(player, message)
+        elif self.state == GameStateMachine.CONTINUING:
+            self._on_continue(player, P.decode_answer(message, lambda command: P.decode_continue(command) is True))
+
+    def _prompt(self, state: str, ask):
+        """
+        Wait for the answer to a prompt, until its deadline.
+        :param ask: a function sending the prompt, again after every invalid answer.
+        """
+        self.state = state
+        self.wake_at = self.clock.now() + self.deadlines.timeout(GameStateMachine.PROMPTS[state])
+        self.prompted = {id(player): 1 for player in self.awaiting}
+        self.reprompt = ask
+        ask()
+
+    def _answered(self, player: Player, answer):
+        """
+        Tell a player their answer was invalid and prompt them again, or count the prompt as missed once they are out
+        of retries.
+        Return: True if the answer is valid.
+        """
+        if answer is not None:
+            if self.state != GameStateMachine.CONTINUING:
+                self.unanswered = 0
+            return True
+
+        player.tell(P.INVALID_INPUT)
+
+        if self.prompted[id(player)] >= self.deadlines.retries:
+            if self.state == GameStateMachine.CONTINUING:
+                self._on_continue(player, None, PromptDeadlines.RETRIES)
+            else:
+                self._missed(player, PromptDeadlines.RETRIES)
+            return False
+
+        self.prompted[id(player)] += 1
+        if self.state == GameStateMachine.CONTINUING:
+            player.tell(P.CONTINUE_PLAYING)
+        else:
+            self.reprompt()
+        return False
+
+    def _missed(self, player: Player, cause: str):
+        """
+        Act on the player prompted not answering, as self.deadlines has it, and move the game on.
+        """
+        prompt = GameStateMachine.PROMPTS[self.state]
+        self.unanswered += 1
+        missed = self.deadlines.missed(self, player, prompt, cause)
+
+        if missed == PromptDeadlines.EVICT:
+            self._evict(player, cause)
+
+        if self.state == GameStateMachine.GUESSING:
+            if missed == PromptDeadlines.FORFEIT:
+                self.hangman.forfeit()
+                player.defer(P.construct_correct(False))
+            self._next_turn()
+        elif missed == PromptDeadlines.FORFEIT:
+            self._end_round(0, 0)  # the choosing player gave up their word: the others win
+        else:
+            self._start_round()  # skipped, or the choosing player was evicted: the next player chooses
+
+    def _evict(self, player: Player, cause: str):
+        """
+        Disconnect a player and play on without them. The turns move on as if they had just had theirs.
+        """
+        players = self.group.players
+        guessing_players = [p for p in players if p != self.current_player]
+
+        if player == self.current_player:
+            self.current_player = players[players.index(player) - 1]
+        elif player == self.guessing_player:
+            self.guessing_player = guessing_players[guessing_players.index(player) - 1]
+
+        logger.warning(f"Evicting {player} from {self} ({cause}). src={SRC}/_evict:276")
+        M.PLAYERS_EVICTED.inc(1, cause)
+        self.group.evict(player)
+        self.evicted.append(player)
+        player.disconnect()
+
+    def _plays(self, player: Player):
+        return any(p is player for p in self.group.players)
+
+    def _start_round(self):
+        if self.is_abandoned:
+            self.finish()
+            return
+
+        self.current_player = self.group.next_player(self.current_player)
+        self.tell_all_players(P.GAME_START)
+
+        if self.start_latency is None and self.group.ready_since is not None:
+            self.start_latency = time.perf_counter() - self.group.ready_since
+            logger.info(f"{self} started {self.start_latency * 1000:.1f} ms after its lobby filled up.")
+        self._pause(GameStateMachine.STARTING)
+
+    def _pause(self, state: str):
+        self.state = state
+        self.wake_at = self.clock.now() + P.turn_delay(self.group.players)  # due at once when all pipeline
+
+    def _on_max_tries(self, player: Player, message: str):
+        max_tries = P.decode_answer(message, P.decode_max_tries)
+
+        if self._answered(player, max_tries):
+            self.max_tries = max_tries
+            self._prompt(GameStateMachine.SECRET, lambda: self.tell_current_player(P.YOUR_TURN))
+
+    def _on_secret_word(self, player: Player, message: str):
+        secret_word = P.decode_answer(message, P.decode_secret_word)
+
+        if not self._answered(player, secret_word):
+            return
+
+        self.hangman = Hangman([letter for letter in secret_word.lower()], self.max_tries)
+        self.board = BoardUpdates(self.hangman)
+        self.guessing_player = self.group.select_first_guessing_player(self.current_player)
+        self._next_turn()
+
+    def _next_turn(self):
+        if self.hangman.has_winner or self.hangman.tries > self.hangman.max_tries:
+            self._end_round(self.hangman.tries, self.hangman.max_tries)
+            return
+        if self.is_abandoned:
+            self.finish()
+            return
+
+        self.guessing_player = self.group.next_guessing_player(self.current_player, self.guessing_player)
+        self.tell_board()
+        self._pause(GameStateMachine.MOVING)
+
+    def _announce_turn(self):
+        self.tell_all_players(P.construct_turn(self.guessing_player, self.hangman.max_tries - self.hangman.tries))
+        self.asked = time.perf_counter()
+
+    def _on_guess(self, player: Player, message: str):
+        M.TURN_RESPONSE_SECONDS.observe(time.perf_counter() - self.asked)
+        guess = P.decode_answer(message, P.decode_guess)
+
+        if self._answered(player, guess):
+            player.defer(P.construct_correct(self.hangman.guess(guess)))
+            self._next_turn()
+
+    def _end_round(self, tries: int, max_tries: int):
+        scores = [player.score for player in self.group.players]
+
+        if tries <= max_tries:
+            self.tell_all_but_current_player(P.won(scores))
+            self.tell_current_player(P.lost(scores))
+        else:
+            self.current_player.increase_score()
+            self.tell_all_but_current_player(P.lost(scores))
+            self.tell_current_player(P.won(scores))
+
+        self.answers = {}
+        self._prompt(GameStateMachine.CONTINUING, lambda: broadcast(self.group.players, P.CONTINUE_PLAYING))
+
+    def _on_continue(self, player: Player, answer, cause=None):
+        """
+        :param answer: whether the player wants to play again, None if they did not answer validly.
+        :param cause: why they did not answer, if they had their last chance: not answering counts as no.
+        """
+        if cause is not None:
+            self.deadlines.missed(self, player, PromptDeadlines.CONTINUE, cause)
+        elif not self._answered(player, answer):
+            return
+
+        self.answers[id(player)] = bool(answer)
+        self._decide()
+
+    def _decide(self):
+        if len(self.answers) < len(self.group.players):
+            return
+
+        if all(self.answers.values()):
+            self._start_round()
+        else:
+            self.finish()
+
+    def tell_board(self):
+        for players, message in self.board.updates(self.group.players):
+            broadcast_deferred(players, message)  # sent with the turn announced next, to clients that fuse
+
+    def tell_all_players(self, message):
+        broadcast(self.group.players, message)
+
+    def tell_current_player(self, message):
+        self.current_player.tell(message)
+
+    def tell_all_but_current_player(self, message):
+        broadcast([player for player in self.group.players if player != self.current_player], message)
@@ -1,4 +1,5 @@
 import random
+from threading import RLock
 
 from model.player import Player
 import model.protocol as P
@@ -9,6 +10,8 @@ class Group:
         self.players = []
         self.min_players = min_players
         self.in_game = False
+        self.lock = RLock()
+        self.ready_since = None  # time.perf_counter() when the last player needed joined
 
     def __repr__(self):
         return f"<Group id={id(self)}, players={self.players}, min_players={self.min_players}, in_game={self.in_game} />"
@@ -49,13 +52,27 @@ class Group:
         return guessing_players[(guessing_players.index(current_guessing) + 1) % length]
 
     def start(self):
-        self.in_game = True
+        with self.lock:
+            self.in_game = True
 
     def add(self, player: list):
-        self.players.extend(player)
+        with self.lock:
+            self.players.extend(player)
 
     def remove(self, player: Player):
-        self.players.remove(player)
+        with self.lock:
+            self.players.remove(player)
+
+    def evict(self, player: Player):
+        """
+        @ensures this exact player object is no longer in the group; players with the same name are kept.
+        """
+        with self.lock:
+            self.players = [p for p in self.players if p is not player]
+
+    @property
+    def is_ready(self):
+        return self.count >= self.min_players
 
     def select_first_guessing_player(self, current_player: Player):
         guessing_players = [p for p in self.players if p != current_player]
@@ -66,4 +83,4 @@ class Group:
         for player in self.players:
             if player.is_connected:
                 player.tell(P.FORCE_DISCONNECT)
-            player.get_connection.close()
+            player.close()
@@ -1,38 +1,70 @@
+import string
+
+
 class Hangman:
     UNKNOWN = '*'
 
     def __init__(self, secret, max_tries=10):
+        """
+        Key arguments: secret, the word or phrase to guess, as a string or a list of characters.
+                      max_tries, the number of guesses the guessing players get.
+        Whitespace and punctuation, like the spaces in a phrase, are revealed from the start. Letters and digits
+        have to be guessed.
+        """
         self.secret = secret
         self.max_tries = max_tries
-        self.guessed_letters = [Hangman.UNKNOWN] * len(self.secret)
+        self.guessed_letters = list(secret)
         self.tries = 0
+        self.positions = {}  # letter -> the positions it occurs at in secret
+        self.guessed = 0  # bitmask of the letters guessed so far, by code point
+        self.unrevealed = 0
+        self.last_revealed = []  # the positions revealed by the last guess
+
+        for position, character in enumerate(secret):
+            if character.isspace() or character in string.punctuation:
+                continue
+
+            if character in self.positions:
+                self.positions[character].append(position)
+            else:
+                self.positions[character] = [position]
+            self.guessed_letters[position] = Hangman.UNKNOWN
+            self.unrevealed += 1
 
     def guess(self, letter: str):
         """
         Key arguments: letter, a string denoting the letter guessed.
         @requires len(letter) == 1
-        @ensures will determine an updated list for guessed_letters
-        Return: a tuple indicating whether the guess was correct (1st) and what the result is (2nd)
+        @ensures will reveal every occurrence of letter in guessed_letters, in the time it takes to write them.
+                 Guessing a letter again costs a try, but reveals nothing.
+        Return: True if letter occurs in the secret, False otherwise.
         """
-        result = []
         self.tries += 1
+        positions = self.positions.get(letter)
+        bit = 1 << ord(letter)
 
-        guessed = [x if x == letter else Hangman.UNKNOWN for x in self.secret]
-        guessed = zip(self.guessed_letters, guessed)
+        if positions is None or self.guessed & bit:
+            self.last_revealed = []
+        else:
+            for position in positions:
+                self.guessed_letters[position] = letter
+            self.unrevealed -= len(positions)
+            self.last_revealed = positions
 
-        for x, y in guessed:
-            if x == Hangman.UNKNOWN and y != Hangman.UNKNOWN:
-                result.append(y)
-            else:
-                result.append(x)
+        self.guessed |= bit
+        return positions is not None
 
-        self.guessed_letters = result
-        return letter in self.secret
+    def forfeit(self):
+        """
+        @ensures costs a try, like a wrong guess, without guessing a letter.
+        """
+        self.tries += 1
+        self.last_revealed = []
 
     @property
     def has_winner(self):
         """
-        Check if the game was won. 
-        Return: True if guessed_letters matches secret.
+        Check if the game was won.
+        Return: True if every letter of the secret has been revealed.
         """
-        return self.guessed_letters == self.secret
+        return self.unrevealed == 0
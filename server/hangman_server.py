@@ -1,79 +1,388 @@
+import asyncio
+import multiprocessing
+import multiprocessing.connection
 import socket
 import logging
+import time
 from threading import Event
-from threading import Lock
 
+from model.async_player import AsyncPlayer
 from model.logger import Logger as L
+import model.metrics as M
+import model.outbound as O
 from model.player import Player
+import model.protocol as P
+from server.admission import AdmissionControl
+from server.coroutines.group_manager_coroutine import AsyncGroupManager
+from server.coroutines.new_connection_coroutine import AsyncConnectionHandler
+from server.deadlines import PromptDeadlines
+from server.executor import SessionExecutor
+from server.liveness import LivenessMonitor
+from server.lobby_registry import LobbyRegistry
 from server.threads.group_manager_thread import GroupManager
+from server.threads.liveness_thread import LivenessThread
+from server.threads.metrics_thread import MetricsThread
 from server.threads.new_connection_thread import ConnectionHandler
+from server.threads.reactor_thread import ReactorThread
 from server.threads.server_input import ServerInput
+from server.threads.server_input import ShutdownListener
+from server.threads.writer_thread import WriterThread
 
 SRC = 'server/hangman_server.py'
 
+# Workers are spawned rather than forked: a child forked while ServerInput blocks in input() would deadlock on the
+# lock of the stdin it inherited.
+WORKER_CONTEXT = multiprocessing.get_context('spawn')
+
 
 class HangmanServer:
     """
     This class represents a server hosting a game of Hangman.
-    Once started, it will listen for connections and forward them to threads to deal with them.
+    Once started, it will listen for connections and forward them to threads (or coroutines) to deal with them.
     """
-    def __init__(self, host='', port=5050, max_connections=5):
+    THREADED = 'threaded'
+    ASYNCIO = 'asyncio'
+    REACTOR = 'reactor'
+    MODES = (THREADED, ASYNCIO, REACTOR)
+    BACKLOG = 128  # connections accepted by the kernel, waiting for the server to take them
+    ASYNCIO_BACKLOG = 1024  # one event loop accepts thousands of clients, so it needs a deeper accept queue
+    RESTART_DELAY = 1  # in seconds, before restarting a crashed worker
+    CHECK_INTERVAL = 0.5  # in seconds, between the supervisor's checks for shutdown
+
+    def __init__(self, host='', port=5050, max_connections=BACKLOG, mode=THREADED, workers=1, log_sampling=1,
+                 metrics_port=None, max_games=SessionExecutor.MAX_GAMES,
+                 max_queued_games=SessionExecutor.MAX_QUEUED_GAMES, deadlines: PromptDeadlines = None,
+                 admission: AdmissionControl = None, max_outbound_bytes=O.MAX_BYTES, on_overflow=O.DISCONNECT):
         """
         Initialise the server.
         :param host: the host's IPv4 address to bind the server to.
         :param port: the port to bind the server to. Default = 5050.
-        :param max_connections: the maximum number of connections the server will queue before dropping the next.
+        :param max_connections: the listen backlog: the most connections the kernel queues for the server to accept
+                                before dropping the next. Default = HangmanServer.BACKLOG.
+        :param mode: the engine to run. HangmanServer.THREADED (default) starts a thread per connection and game.
+                     HangmanServer.ASYNCIO runs the handshake, lobbies and games as coroutines on one event loop.
+                     HangmanServer.REACTOR runs the handshake and lobbies like THREADED, but plays every game as a
+                     GameStateMachine on one reactor thread.
+        :param workers: the number of worker processes sharing the port, each running the configured mode with its
+                        own lobbies and games. Default = 1, serving from this process. Requires SO_REUSEPORT.
+        :param log_sampling: log 1 in every log_sampling messages sent or received. Default = 1, logging them all.
+        :param metrics_port: serve the metrics in the Prometheus text format on this local port, at /metrics.
+                             Worker processes serve their own, on metrics_port + 1, metrics_port + 2, ...
+                             Default = None, serving none.
+        :param max_games: in threaded mode, the most games played at once, each on a thread of a shared pool.
+        :param max_queued_games: in threaded mode, the most games waiting for a thread of that pool. Lobbies filling
+                                 up beyond that are turned away.
+        :param deadlines: how long players have to answer the prompts of a game, and what happens when they do not.
+                          Default: PromptDeadlines().
+        :param admission: the limits on handshakes and on the accept rate, beyond which new connections are shed.
+                          Default: AdmissionControl().
+        :param max_outbound_bytes: the most bytes queued for a client that does not read fast enough, beyond which
+                                   on_overflow applies. Default = 256 KiB.
+        :param on_overflow: what to do with such a client: O.DISCONNECT it (default), or O.DROP_BOARDS superseded
+                            first. The asyncio mode always disconnects it.
         """
+        if mode not in HangmanServer.MODES:
+            raise ValueError(f'Unknown server mode: {mode}. Expected one of {HangmanServer.MODES}')
+        if workers < 1:
+            raise ValueError(f'A server needs at least 1 worker, got {workers}')
+        if on_overflow not in O.POLICIES:
+            raise ValueError(f'Unknown overflow policy: {on_overflow}. Expected one of {O.POLICIES}')
+
         self.logger_file = L.create_logger('SERVER_MAIN', logging.INFO, to_file=True)
         self.logger_info = L.create_logger('SERVER_MAIN_COMM', logging.INFO, to_file=False)
         self.host = host
         self.port = port
         self.address = (host, port)
-        self.groups = []
+        self.lobbies = LobbyRegistry()
         self.events = []
         self.max_connections = max_connections
+        self.mode = mode
+        self.workers = workers
+        self.log_sampling = log_sampling
+        self.metrics_port = metrics_port
+        self.max_games = max_games
+        self.max_queued_games = max_queued_games
+        self.deadlines = deadlines if deadlines is not None else PromptDeadlines()
+        self.admission = admission if admission is not None else AdmissionControl()
+        self.max_outbound_bytes = max_outbound_bytes
+        self.on_overflow = on_overflow
+        self.running_workers = []  # (process, pipe) per worker, while supervising
+        L.set_sampling(log_sampling)
+
+        if workers > 1 and not hasattr(socket, 'SO_REUSEPORT'):
+            self.logger_file.warning(f"SO_REUSEPORT is not supported on this platform. "
+                                     f"Serving from a single process... src={SRC}/__init__:55")
+            self.workers = 1
 
     def start(self):
         """
-        Start the server.
+        Start the server in the configured mode, either in this process or in self.workers worker processes.
         :return: None
         """
-        self.logger_file.info(f"Starting server... src={SRC}/main:40")
+        if self.workers > 1:
+            shutdown = Event()
+            input_thread = ServerInput(_WorkerCloser(shutdown), self.events, self.request_stats)
+            input_thread.daemon = True
+            input_thread.start()
+
+            self.supervise(shutdown)
+            return
+
+        self.logger_file.info(f"Starting server in {self.mode} mode... src={SRC}/main:40")
         sock = self.setup_socket()
 
-        lock = Lock()
+        if self.mode == HangmanServer.ASYNCIO:
+            asyncio.run(self.serve_asyncio(sock))
+        else:
+            self.serve_threaded(sock)
+
+    def supervise(self, shutdown):
+        """
+        Run self.workers worker processes, each binding its own socket to the port with SO_REUSEPORT, so the kernel
+        spreads new connections over them. Workers that crash are restarted until shutdown is set; then CLOSE is sent
+        to every worker over its pipe, and this returns once they have exited.
+        Lobbies are per worker: players only meet players whose connection landed on the same worker.
+        :param shutdown: threading.Event, set to stop every worker.
+        :return: None
+        """
+        self.logger_file.info(f"Starting {self.workers} workers in {self.mode} mode... src={SRC}/supervise:95")
+        workers = self.running_workers
+        workers.extend(self._spawn_worker(index) for index in range(self.workers))
+
+        while not shutdown.is_set():
+            multiprocessing.connection.wait([worker.sentinel for worker, _ in workers],
+                                            timeout=HangmanServer.CHECK_INTERVAL)
+
+            for index, (worker, pipe) in enumerate(workers):
+                if worker.is_alive() or shutdown.is_set():
+                    continue
+
+                self.logger_file.error(f"Worker {worker.pid} exited with code {worker.exitcode}. "
+                                       f"Restarting... src={SRC}/supervise:106")
+                pipe.close()
+                time.sleep(HangmanServer.RESTART_DELAY)
+                workers[index] = self._spawn_worker(index)
+
+        for worker, pipe in workers:
+            try:
+                pipe.send('CLOSE')
+            except OSError:
+                pass  # the worker already exited
+            pipe.close()
+
+        for worker, _ in workers:
+            worker.join()
+        self.logger_file.critical(f"All workers stopped... Terminating server... src={SRC}/supervise:112")
+
+    def request_stats(self):
+        """
+        Have every worker print its metrics: the supervisor itself serves no one.
+        :return: None
+        """
+        for worker, pipe in list(self.running_workers):
+            try:
+                pipe.send('STATS')
+            except OSError:
+                pass  # the worker exited, and is being restarted
+
+    def _spawn_worker(self, index: int):
+        """
+        Start a worker process.
+        :param index: the worker's number, from 0, deciding the port it serves its metrics on and its log files.
+        Return: a tuple (process, pipe), with pipe the sending end of the worker's command pipe.
+        """
+        receiving, sending = WORKER_CONTEXT.Pipe(duplex=False)
+        metrics_port = None if self.metrics_port is None else self.metrics_port + 1 + index
+        worker = WORKER_CONTEXT.Process(target=_run_worker,
+                                         args=(self.host, self.port, self.max_connections, self.mode,
+                                               self.log_sampling, receiving, metrics_port, self.max_games,
+                                               self.max_queued_games, self.deadlines, self.admission,
+                                               self.max_outbound_bytes, self.on_overflow, index))
+        worker.start()
+        receiving.close()
+        return worker, sending
 
-        input_thread = ServerInput(sock, self.events)
+    def serve_threaded(self, sock: socket.socket, supervisor=None):
+        """
+        Accept connections and run their handshakes on the pool of self.admission, shedding those beyond its limits,
+        and play each Game on a thread of a shared pool, or every game on one reactor thread in HangmanServer.REACTOR
+        mode. The accepting thread holds no lock and starts no thread: a burst of connections costs it an accept and
+        a queued task each. Every connection gets an outbound queue, written by one writer thread.
+        :param sock: socket.socket, the listening server socket.
+        :param supervisor: in a worker process, the pipe the supervisor sends CLOSE over, replacing the terminal.
+        :return: None
+        """
+        if supervisor is None:
+            input_thread = ServerInput(sock, self.events)
+        else:
+            input_thread = ShutdownListener(sock, self.events, supervisor)
         input_thread.start()
 
-        queue_managing_thread = GroupManager(self.groups, lock, self.add_terminal_event)
+        self.start_metrics()
+
+        liveness = LivenessMonitor(self.lobbies)
+        liveness_thread = LivenessThread(liveness, self.add_terminal_event)
+        liveness_thread.start()
+
+        writer = WriterThread(self.add_terminal_event, self.max_outbound_bytes, self.on_overflow)
+        writer.start()
+
+        reactor = None
+        if self.mode == HangmanServer.REACTOR:
+            reactor = ReactorThread(self.add_terminal_event)
+            reactor.start()
+
+        executor = SessionExecutor(self.max_games, self.max_queued_games)
+        queue_managing_thread = GroupManager(self.lobbies, self.add_terminal_event, liveness, executor, reactor,
+                                             self.deadlines)
         queue_managing_thread.start()
 
         self.logger_file.info('Server ready... src={SRC}/main:53')
         self.logger_info.info("Ready...")
 
+        admission = self.admission
         while True:
             try:
                 connection, address = sock.accept()
                 self.logger_file.info(f'{address[0]}:{address[1]} just connected. src={SRC}/main:59')
                 self.logger_info.info(f"{address[0]}:{address[1]} just connected.")
+                M.CONNECTIONS.inc()
 
-                with lock:
-                    connection_handler = ConnectionHandler(Player(connection=connection), lock, self.groups)
-                    connection_handler.start()
+                player = Player(connection=connection)
+                writer.attach(player)
+                reason = admission.admit()
+                if reason is None:
+                    reason = admission.start(ConnectionHandler(player, self.lobbies, liveness,
+                                                               admission.handshake_timeout))
+                if reason is not None:
+                    HangmanServer.shed(player, reason)
 
             except socket.error:
                 self.logger_file.critical("Socket closed... Terminating server... src={SRC}/main:67")
                 break
 
-    def setup_socket(self):
+        admission.shutdown(wait=False)
+
+    @staticmethod
+    def shed(player: Player, reason: str):
+        """
+        Tell a connection the server is too busy to take it, and close it.
+        :param reason: why it was shed, see AdmissionControl.
+        :return: None
+        """
+        AdmissionControl.shed(reason)
+        try:
+            player.tell(P.BUSY)
+        except socket.error:
+            pass  # the client did not wait for it
+        player.close()
+
+    async def serve_asyncio(self, sock: socket.socket, supervisor=None):
+        """
+        Accept connections, perform handshakes, queue players and play games as coroutines on one event loop.
+        :param sock: socket.socket, the listening server socket.
+        :param supervisor: in a worker process, the pipe the supervisor sends CLOSE over, replacing the terminal.
+        :return: None
+        """
+        HangmanServer.raise_file_limit()
+        loop = asyncio.get_running_loop()
+        terminal_event = asyncio.Event()
+
+        admission = self.admission
+        handshaking = 0
+
+        async def on_connect(reader, writer):
+            nonlocal handshaking
+            address = writer.get_extra_info('peername')
+            self.logger_file.info(f'{address[0]}:{address[1]} just connected. src={SRC}/serve_asyncio:122')
+            M.CONNECTIONS.inc()
+            player = AsyncPlayer(reader, writer, max_buffered=self.max_outbound_bytes)
+
+            reason = admission.admit(handshaking)
+            if reason is not None:
+                AdmissionControl.shed(reason)
+                await player.tell(P.BUSY)
+                player.close()
+                return
+
+            handshaking += 1
+            try:
+                await asyncio.wait_for(AsyncConnectionHandler(player, self.lobbies).run(), admission.handshake_timeout)
+            except asyncio.TimeoutError:
+                AdmissionControl.shed(AdmissionControl.TIMEOUT)
+                player.close()
+            finally:
+                handshaking -= 1
+
+        closer = _LoopCloser(loop, terminal_event)
+        if supervisor is None:
+            input_thread = ServerInput(closer, self.events)
+            input_thread.daemon = True
+        else:
+            input_thread = ShutdownListener(closer, self.events, supervisor)
+        input_thread.start()
+
+        self.start_metrics()
+
+        manager = AsyncGroupManager(self.lobbies, terminal_event, self.deadlines)
+        manager_task = asyncio.create_task(manager.run())
+
+        backlog = max(self.max_connections, HangmanServer.ASYNCIO_BACKLOG)
+        server = await asyncio.start_server(on_connect, sock=sock, backlog=backlog)
+        self.logger_file.info(f'Server ready... src={SRC}/serve_asyncio:134')
+        self.logger_info.info("Ready...")
+
+        async with server:
+            await terminal_event.wait()
+
+        self.logger_file.critical(f"Socket closed... Terminating server... src={SRC}/serve_asyncio:140")
+        await manager_task
+
+    def start_metrics(self):
+        """
+        Have the metrics read the server's lobbies, and serve them on self.metrics_port if one was given.
+        :return: None
+        """
+        M.watch_lobbies(self.lobbies)
+
+        if self.metrics_port is None:
+            return
+
+        try:
+            metrics_thread = MetricsThread(self.metrics_port, self.add_terminal_event)
+        except OSError:
+            self.logger_file.error(f"Could not serve metrics on port {self.metrics_port}. src={SRC}/start_metrics:268")
+            return
+        metrics_thread.start()
+
+    @staticmethod
+    def raise_file_limit():
+        """
+        Raise the soft limit on open file descriptors to the hard limit, so one process can hold 10k+ connections.
+        Does nothing on platforms without the resource module.
+        :return: None
+        """
+        try:
+            import resource
+        except ImportError:
+            return
+
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    def setup_socket(self, reuse_port=False):
         """
         Create a server-socket, set it up and enable it to listen.
+        :param reuse_port: allow other processes to bind their own socket to the same port (SO_REUSEPORT).
         :return: socket.socket, the created server socket.
         """
         s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.logger_file.info(f"Socket opened... src={SRC}/set_up:23")
 
+        if reuse_port:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
         try:
             s.bind(self.address)
         except OSError:
@@ -94,3 +403,60 @@ class HangmanServer:
         :return: None
         """
         self.events.append(event)
+
+
+class _LoopCloser:
+    """
+    Stand-in for the server socket and terminal events handed to ServerInput in asyncio mode.
+    ServerInput runs on its own thread, so closing the listening socket directly would pull it from under the
+    event loop. Instead, both close() and set() schedule the shutdown on the loop.
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop, terminal_event: asyncio.Event):
+        self.loop = loop
+        self.terminal_event = terminal_event
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.terminal_event.set)
+
+    def set(self):
+        self.close()
+
+    def shutdown(self, how):
+        self.close()
+
+
+class _WorkerCloser:
+    """
+    Stand-in for the server socket and terminal events handed to ServerInput by the supervisor of worker processes.
+    The supervisor does not listen itself: closing sets its shutdown event, which it passes on to every worker.
+    """
+    def __init__(self, shutdown):
+        self.shutdown_event = shutdown
+
+    def close(self):
+        self.shutdown_event.set()
+
+    def set(self):
+        self.close()
+
+    def shutdown(self, how):
+        self.close()
+
+
+def _run_worker(host, port: int, max_connections: int, mode: str, log_sampling: int, supervisor, metrics_port=None,
+                max_games=SessionExecutor.MAX_GAMES, max_queued_games=SessionExecutor.MAX_QUEUED_GAMES, deadlines=None,
+                admission=None, max_outbound_bytes=O.MAX_BYTES, on_overflow=O.DISCONNECT, index=0):
+    """
+    The entry point of a worker process: serve on a socket of its own, bound to the shared port, until the supervisor
+    sends CLOSE. The worker logs to files of its own, e.g. server.worker0.log.
+    """
+    L.set_worker(index)
+    server = HangmanServer(host, port, max_connections, mode, log_sampling=log_sampling, metrics_port=metrics_port,
+                           max_games=max_games, max_queued_games=max_queued_games, deadlines=deadlines,
+                           admission=admission, max_outbound_bytes=max_outbound_bytes, on_overflow=on_overflow)
+    sock = server.setup_socket(reuse_port=True)
+
+    if mode == HangmanServer.ASYNCIO:
+        asyncio.run(server.serve_asyncio(sock, supervisor))
+    else:
+        server.serve_threaded(sock, supervisor)
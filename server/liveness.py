@@ -0,0 +1,233 @@
+from threading import Lock
+import math
+import selectors
+import socket as S
+
+import model.metrics as M
+import model.protocol as P
+from model.clock import SYSTEM_CLOCK
+
+
+class TimingWheel:
+    """
+    A hashed timing wheel: schedules items a number of ticks ahead in O(1), and hands out the items that are due
+    at each tick. Items further ahead than one turn of the wheel wait for the right number of rounds.
+    """
+
+    def __init__(self, slots=64, tick=P.LIVENESS_TICK):
+        self.tick = tick
+        self.slots = [{} for _ in range(slots)]  # per slot: key -> (item, rounds left)
+        self.slot_of = {}
+        self.position = 0
+
+    def __len__(self):
+        return len(self.slot_of)
+
+    def schedule(self, key, item, delay: float):
+        """
+        Schedule item to be due delay seconds from now, replacing any earlier schedule for key.
+        """
+        self.cancel(key)
+
+        ticks = max(1, math.ceil(delay / self.tick))
+        slot = (self.position + ticks) % len(self.slots)
+        self.slots[slot][key] = (item, (ticks - 1) // len(self.slots))
+        self.slot_of[key] = slot
+
+    def cancel(self, key):
+        slot = self.slot_of.pop(key, None)
+
+        if slot is not None:
+            del self.slots[slot][key]
+
+    def advance(self):
+        """
+        Move the wheel one tick ahead.
+        Return: the items that became due.
+        """
+        self.position = (self.position + 1) % len(self.slots)
+        slot = self.slots[self.position]
+        due = []
+
+        for key, (item, rounds) in list(slot.items()):
+            if rounds == 0:
+                due.append(item)
+                del slot[key]
+                del self.slot_of[key]
+            else:
+                slot[key] = (item, rounds - 1)
+
+        return due
+
+
+class LivenessMonitor:
+    """
+    Keeps track of whether the players waiting in lobbies are still connected.
+    - Closed connections are noticed by polling all lobby sockets at once, without blocking.
+    - Heartbeats are spread out over time by a timing wheel: each player gets one every P.HEARTBEAT_INTERVAL seconds.
+    - A player whose heartbeat cannot be written for P.LIVENESS_TIMEOUT seconds is considered gone.
+    Dead players are evicted from their lobby one by one; the rest of the lobby keeps waiting.
+    """
+
+    def __init__(self, lobbies, heartbeat_interval=P.HEARTBEAT_INTERVAL, timeout=P.LIVENESS_TIMEOUT,
+                 clock=SYSTEM_CLOCK):
+        """
+        Initialise the monitor.
+        :param lobbies: the LobbyRegistry to evict dead players from.
+        :param heartbeat_interval: seconds between heartbeats to the same player.
+        :param timeout: seconds a player may go without a successful heartbeat before being evicted.
+        :param clock: the clock to measure that time with, see model/clock.py.
+        """
+        self.lobbies = lobbies
+        self.heartbeat_interval = heartbeat_interval
+        self.timeout = timeout
+        self.clock = clock
+        self.lock = Lock()
+        self.selector = selectors.DefaultSelector()
+        self.wheel = TimingWheel()
+        self.tracked = {}  # id(player) -> (player, group)
+        self.last_seen = {}  # id(player) -> self.clock.now()
+        self.evicted = 0
+
+    def __repr__(self):
+        return f"<LivenessMonitor tracked={len(self.tracked)} evicted={self.evicted} />"
+
+    def track(self, player, group):
+        """
+        Start watching a player who just joined a lobby.
+        """
+        key = id(player)
+
+        with self.lock:
+            self.tracked[key] = (player, group)
+            self.last_seen[key] = self.clock.now()
+            self.wheel.schedule(key, player, self.heartbeat_interval)
+
+            try:
+                self.selector.register(player.get_connection, selectors.EVENT_READ, player)
+            except (KeyError, ValueError, OSError):
+                pass
+
+    def untrack(self, player):
+        """
+        Stop watching a player, e.g. because their game started.
+        """
+        key = id(player)
+
+        with self.lock:
+            if self.tracked.pop(key, None) is None:
+                return
+
+            self.last_seen.pop(key, None)
+            self.wheel.cancel(key)
+
+            try:
+                self.selector.unregister(player.get_connection)
+            except (KeyError, ValueError, OSError):
+                pass
+
+    def untrack_group(self, group):
+        for player in list(group.players):
+            self.untrack(player)
+
+    def check(self):
+        """
+        Perform one tick: evict players whose connection closed, and send the heartbeats that are due.
+        Never blocks on a single player.
+        :return: list, the players evicted.
+        """
+        dead = self._closed_connections()
+
+        with self.lock:
+            due = self.wheel.advance()
+
+        for player in due:
+            if not self._heartbeat(player):
+                dead.append(player)
+
+        for player in dead:
+            self._evict(player)
+        return dead
+
+    def _closed_connections(self):
+        with self.lock:
+            try:
+                ready = self.selector.select(timeout=0)
+            except (OSError, ValueError):
+                ready = []
+
+        closed = []
+        for key, _ in ready:
+            player = key.data
+
+            try:
+                if player.get_connection.recv(1, S.MSG_PEEK):
+                    self._seen(player)  # the client sent something: it is alive
+                    continue
+            except BlockingIOError:
+                continue
+            except OSError:
+                pass
+
+            closed.append(player)
+        return closed
+
+    def _heartbeat(self, player):
+        """
+        Send a heartbeat without blocking, and schedule the next one.
+        The heartbeat is sent whole before the group's game can start, so that no frame of the game lands in it: with
+        an outbound queue, in one push, and otherwise holding the group's lock until the last byte is written.
+        Return: False if the player should be considered gone.
+        """
+        key = id(player)
+
+        with self.lock:
+            if key not in self.tracked:
+                return True
+            group = self.tracked[key][1]
+
+        with group.lock:
+            if group.in_game:
+                self.untrack(player)
+                return True
+
+            frame = player.codec.encode(P.HEARTBEAT)
+            M.record_sent(P.HEARTBEAT, len(frame))
+
+            if player.outbound is not None:
+                player.send(frame)
+                taken = not player.outbound.frames
+            else:
+                rest = player.send_without_blocking(frame)
+                taken = len(rest) < len(frame)
+                if rest and taken:
+                    player.send(rest)  # never leave half a frame behind
+
+        if taken:
+            self._seen(player)
+
+        with self.lock:
+            if key not in self.tracked:
+                return True
+            if self.clock.now() - self.last_seen[key] > self.timeout:
+                return False
+            self.wheel.schedule(key, player, self.heartbeat_interval)
+        return True
+
+    def _seen(self, player):
+        with self.lock:
+            if id(player) in self.last_seen:
+                self.last_seen[id(player)] = self.clock.now()
+
+    def _evict(self, player):
+        with self.lock:
+            entry = self.tracked.get(id(player))
+
+        if entry is None:
+            return
+
+        self.untrack(player)
+
+        if self.lobbies.evict(player, entry[1]):
+            self.evicted += 1
+            player.close()
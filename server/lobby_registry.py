@@ -0,0 +1,130 @@
+from threading import Lock
+import time
+
+import model.metrics as M
+from server.group import Group
+from server.matchmaking import MatchmakingIndex
+
+
+class LobbyRegistry:
+    """
+    The thread-safe collection of groups (lobbies and running games) on the server.
+    The registry's own lock only guards the collection and its matchmaking index, and is never held during network
+    I/O. Each group guards its own players with its own lock, so games proceed in parallel and placing a player in a
+    lobby never waits on gameplay.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.groups = {}
+        self.index = MatchmakingIndex()
+        self.subscribers = []
+
+    def __repr__(self):
+        return f"<LobbyRegistry groups={len(self)} />"
+
+    def __len__(self):
+        with self.lock:
+            return len(self.groups)
+
+    def __iter__(self):
+        return iter(self.snapshot())
+
+    def snapshot(self):
+        """
+        Return: a list of the groups, safe to iterate while other threads add or remove groups.
+        """
+        with self.lock:
+            return list(self.groups.values())
+
+    def place(self, player):
+        """
+        Add a player to the longest-waiting open lobby of their preferred size, or to a new lobby if there is none.
+        Subscribers are notified if this fills the lobby.
+        :param player: the player to place.
+        :return: Group, the lobby the player joined.
+        """
+        with self.lock:
+            group = self.index.find(player.preferred_players)
+
+            if group is None:
+                group = Group(min_players=player.preferred_players)
+                self.groups[id(group)] = group
+                self.index.open(group)
+
+            player.queued_since = time.perf_counter()
+            group.add([player])
+            self.index.joined(group)
+            ready = group.is_ready
+
+            if ready:
+                group.ready_since = player.queued_since
+
+        if ready:
+            for subscriber in self.subscribers:
+                subscriber(group)
+        return group
+
+    def subscribe(self, callback):
+        """
+        Have callback called with a lobby as soon as a placement makes it ready to start.
+        The callback runs on the placing thread, outside the registry's lock, so it should only hand the lobby off.
+        :param callback: a function taking the ready Group.
+        :return: None
+        """
+        self.subscribers.append(callback)
+
+    def start_if_ready(self, group):
+        """
+        Mark a lobby as in game if it has enough players, atomically with respect to place.
+        :param group: the lobby to check.
+        :return: bool, True if the group was started by this call.
+        """
+        with self.lock:
+            if group.in_game or not group.is_ready:
+                return False
+            group.start()
+            self.index.close(group)
+
+        started = time.perf_counter()
+        for player in group.players:
+            if player.queued_since is not None:
+                M.LOBBY_WAIT_SECONDS.observe(started - player.queued_since)
+        return True
+
+    def evict(self, player, group):
+        """
+        Remove a single player from a lobby that has not started, reopening the lobby to new players.
+        The lobby is removed from the registry once its last player is evicted.
+        :param player: the player to evict.
+        :param group: the lobby the player is waiting in.
+        :return: bool, True if the player was evicted; False if the game already started.
+        """
+        with self.lock:
+            if group.in_game:
+                return False
+
+            group.evict(player)
+            self.index.left(group)
+
+            if group.count == 0:
+                self.index.close(group)
+                self.groups.pop(id(group), None)
+            return True
+
+    def remove(self, group):
+        """
+        Remove a group from the registry.
+        :param group: the group to remove.
+        :return: bool, True if the group was registered.
+        """
+        with self.lock:
+            self.index.close(group)
+            return self.groups.pop(id(group), None) is not None
+
+    def queue_depth(self):
+        """
+        Return: a dict mapping each lobby size to the number of open lobbies and players waiting in them.
+        """
+        with self.lock:
+            return self.index.depth()
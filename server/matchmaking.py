@@ -0,0 +1,72 @@
+from collections import OrderedDict
+
+
+class MatchmakingIndex:
+    """
+    An index of open lobbies (not in game and not full), bucketed by lobby size.
+    A lobby's size is the preferred number of players of whoever opened it, and players are matched to lobbies of
+    their own preferred size. Placing a player therefore only looks at the oldest open lobby of one bucket: O(1),
+    regardless of how many lobbies are open.
+    Not thread-safe on its own; LobbyRegistry guards it with its lock.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.waiting = {}
+
+    def __repr__(self):
+        return f"<MatchmakingIndex buckets={self.depth()} />"
+
+    def find(self, size: int):
+        """
+        Return: the longest-waiting open lobby of the given size, or None if there is none.
+        """
+        bucket = self.buckets.get(size)
+
+        if not bucket:
+            return None
+        return next(iter(bucket.values()))
+
+    def open(self, group):
+        """
+        Make a lobby available for matchmaking. Does nothing if it already is.
+        """
+        bucket = self.buckets.setdefault(group.min_players, OrderedDict())
+
+        if id(group) not in bucket:
+            bucket[id(group)] = group
+            self.waiting[group.min_players] = self.waiting.get(group.min_players, 0) + group.count
+
+    def joined(self, group):
+        """
+        Record that a player joined an open lobby, and close the lobby once it is full.
+        """
+        self.waiting[group.min_players] += 1
+
+        if group.count >= group.min_players:
+            self.close(group)
+
+    def left(self, group):
+        """
+        Record that a player left a lobby, and reopen the lobby if it was full but has not started.
+        """
+        if id(group) in self.buckets.get(group.min_players, {}):
+            self.waiting[group.min_players] -= 1
+        elif not group.in_game:
+            self.open(group)
+
+    def close(self, group):
+        """
+        Take a lobby out of matchmaking, e.g. because it is full, started or removed. Does nothing if it is not open.
+        """
+        bucket = self.buckets.get(group.min_players, {})
+
+        if bucket.pop(id(group), None) is not None:
+            self.waiting[group.min_players] -= group.count
+
+    def depth(self):
+        """
+        Return: a dict mapping each lobby size to the number of open lobbies and players waiting in them.
+        """
+        return {size: {'lobbies': len(bucket), 'players': self.waiting.get(size, 0)}
+                for size, bucket in sorted(self.buckets.items())}
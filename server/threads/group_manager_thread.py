@@ -1,11 +1,21 @@
+from queue import Empty
+from queue import Queue
 from threading import Event
 from threading import Thread
-from threading import Lock
 import logging
+import time
 
 import model.protocol as P
 from model.logger import Logger
+from server.deadlines import PromptDeadlines
+from server.executor import ExecutorFull
+from server.executor import SessionExecutor
+from server.executor import get_executor
 from server.game import Game
+from server.game_state import GameStateMachine
+from server.liveness import LivenessMonitor
+from server.lobby_registry import LobbyRegistry
+from server.threads.reactor_thread import ReactorThread
 
 SRC = 'server/threads/group_manager_thread'
 
@@ -13,19 +23,27 @@ SRC = 'server/threads/group_manager_thread'
 class GroupManager(Thread):
     """A thread for managing the different groups or lobbies"""
 
-    def __init__(self, assigned_groups: list, lock: Lock, add_event_to_server):
+    def __init__(self, lobbies: LobbyRegistry, add_event_to_server, liveness: LivenessMonitor = None,
+                 executor: SessionExecutor = None, reactor: ReactorThread = None, deadlines: PromptDeadlines = None):
         """
         Initialise the group manager.
-        :param assigned_groups: the groups this manager will manage.
-        :param lock: a thread lock to ensure the Game thread does not access its group at the same time as this manager.
+        :param lobbies: the registry of groups this manager will manage.
         :param add_event_to_server: a reference to the corresponding server's add_terminal_event method.
+        :param liveness: the monitor watching lobby members, told to stop watching players whose game starts.
+        :param executor: the executor to play games on. Default: the executor shared by the process.
+        :param reactor: if given, play every game as a GameStateMachine on this reactor thread instead.
+        :param deadlines: the deadlines of every game's prompts. Default: PromptDeadlines().
         """
         super().__init__()
         self.terminal_event = Event()
-        self.groups = assigned_groups
+        self.lobbies = lobbies
         self.logger = Logger.create_logger(self.__repr__(), logging.INFO, to_file=True)
         self.games = []
-        self.lock = lock
+        self.ready_groups = Queue()
+        self.liveness = liveness
+        self.executor = executor if executor is not None else get_executor()
+        self.reactor = reactor
+        self.deadlines = deadlines
 
         add_event_to_server(self.terminal_event)
 
@@ -34,36 +52,77 @@ class GroupManager(Thread):
 
     def run(self):
         """
-        Check whether each group is ready to start a game.
-        Start a game for a particular group if it is ready.
-        Check if players have disconnected from a game, terminate connections and remove group if so.
-        Clean up any games and groups that have finished.
+        Start a game for a group the moment the lobby registry reports it ready.
+        Every P.CYCLE_TIMEOUT seconds, also sweep all groups as a safety net: start any ready group that was missed
+        and clean up any games and groups that have finished. Disconnected lobby members are evicted one by one by
+        the LivenessThread, not here.
+        No lock is held while talking to players, so neither games nor new connections wait on this thread.
         :return: None
         """
+        self.lobbies.subscribe(self.ready_groups.put)
+        next_sweep = time.monotonic()
+
         while not self.is_terminal_event_set:
-            with self.lock:
-                for group in [g for g in self.groups if not g.in_game]:
-                    if not self.all_players_connected:
-                        self.logger.info(f"""Players from {group} are no longer connected. Clearing group...
-                                          src={SRC}/run:21""")
-                        group.close_all()
-                        self.groups.remove(group)
-                        continue
+            timeout = next_sweep - time.monotonic()
 
-                    if GroupManager.is_ready(group):
-                        group.start()
-                        self.logger.info(f"{group}, ready... src={SRC}/run:28")
+            if timeout > 0:
+                try:
+                    self.start_game(self.ready_groups.get(timeout=timeout))
+                except Empty:
+                    pass
+                continue
 
-                        game_thread = Game(group, self.lock)
-                        self.games.append(game_thread)
-                        game_thread.start()
+            self.sweep()
+            next_sweep = time.monotonic() + P.CYCLE_TIMEOUT
+        self.logger.warning('Shutting down manager thread. src={SRC}/run:45')
 
-                        self.logger.info("Game started... src={SRC}/run:35")
+    def start_game(self, group):
+        """
+        Start a game for a group, unless it is not ready or another call already started it.
+        :param group: the group to start a game for.
+        :return: None
+        """
+        if self.lobbies.start_if_ready(group):
+            self.logger.info(f"{group}, ready... src={SRC}/start_game:70")
 
-                self.clean_finished_games()
+            if self.liveness is not None:
+                self.liveness.untrack_group(group)
 
-            self.terminal_event.wait(P.CYCLE_TIMEOUT)
-        self.logger.warning('Shutting down manager thread. src={SRC}/run:45')
+            if self.reactor is not None:
+                game = GameStateMachine(group, deadlines=self.deadlines)
+                self.games.append(game)
+                self.reactor.submit(game)
+                self.logger.info(f"Game submitted to {self.reactor}... src={SRC}/start_game:85")
+                return
+
+            game = Game(group, executor=self.executor, deadlines=self.deadlines)
+
+            try:
+                self.executor.games.submit(game.run).add_done_callback(self._log_failure)
+            except ExecutorFull:
+                self.logger.error(f"Too many games waiting for a thread. Turning away {group}... "
+                                  f"src={SRC}/start_game:81")
+                group.close_all()
+                self.lobbies.remove(group)
+                return
+
+            self.games.append(game)
+            self.logger.info(f"Game submitted to {self.executor.games}... src={SRC}/start_game:87")
+
+    def _log_failure(self, future):
+        if future.exception() is not None:
+            self.logger.error(f"A game failed: {future.exception()!r} src={SRC}/_log_failure:91")
+
+    def sweep(self):
+        """
+        Start a game for every lobby that is ready, then clean up finished games.
+        :return: None
+        """
+        for group in [g for g in self.lobbies if not g.in_game]:
+            self.start_game(group)
+
+        self.clean_finished_games()
+        self.logger.info(f"Matchmaking queue depth: {self.lobbies.queue_depth()}, {self.liveness} src={SRC}/sweep:96")
 
     @property
     def manager_id(self):
@@ -71,29 +130,23 @@ class GroupManager(Thread):
 
     @property
     def responsible_groups(self):
-        return self.groups.copy()
+        return self.lobbies.snapshot()
 
     @property
     def is_terminal_event_set(self):
         return self.terminal_event.isSet()
 
-    @property
-    def all_players_connected(self):
-        list_of_lists = [g.players for g in self.responsible_groups]
-        players = [p for players in list_of_lists for p in players]
-        return all([player.is_connected for player in players])
-
     @staticmethod
     def is_ready(group):
-        return group.count >= group.min_players
+        return group.is_ready
 
     def clean_finished_games(self):
         for game in [g for g in self.games if g.thread_finished]:
-            try:
-                self.games.remove(game)
-                self.groups.remove(game.get_group)
+            self.games.remove(game)
+
+            if self.lobbies.remove(game.get_group):
                 self.logger.info(f'Game {game} is over. Cleaned up {game} and {game.get_group}')
-            except ValueError:
+            else:
                 self.logger.error(
                     f'{game} not found or corresponding group not found... src={SRC}/run:42')
 
@@ -0,0 +1,35 @@
+from threading import Event
+from threading import Thread
+import logging
+
+from model.logger import Logger
+from server.liveness import LivenessMonitor
+
+SRC = 'server/threads/liveness_thread'
+
+
+class LivenessThread(Thread):
+    """A thread checking, every P.LIVENESS_TICK seconds, that the players waiting in lobbies are still connected"""
+
+    def __init__(self, monitor: LivenessMonitor, add_event_to_server):
+        """
+        Initialise the liveness thread.
+        :param monitor: the LivenessMonitor to tick.
+        :param add_event_to_server: a reference to the corresponding server's add_terminal_event method.
+        """
+        super().__init__()
+        self.daemon = True
+        self.monitor = monitor
+        self.terminal_event = Event()
+        self.logger = Logger.create_logger(self.__repr__(), logging.INFO, to_file=True)
+
+        add_event_to_server(self.terminal_event)
+
+    def __repr__(self):
+        return f'<LivenessThread, id={id(self)}>'
+
+    def run(self):
+        while not self.terminal_event.wait(self.monitor.wheel.tick):
+            for player in self.monitor.check():
+                self.logger.info(f"{player} is no longer connected. Evicted from lobby... src={SRC}/run:36")
+        self.logger.warning(f'Shutting down liveness thread. src={SRC}/run:37')
@@ -0,0 +1,66 @@
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from threading import Event
+from threading import Thread
+import logging
+
+import model.metrics as M
+from model.logger import Logger
+
+SRC = 'server/threads/metrics_thread'
+
+
+class MetricsThread(Thread):
+    """A thread serving the process' metrics over HTTP, in the Prometheus text format, at /metrics"""
+    HOST = '127.0.0.1'  # local only: the metrics are for the operator, not for players
+    POLL_INTERVAL = 0.5  # in seconds, between checks for shutdown
+
+    def __init__(self, port: int, add_event_to_server, registry: M.MetricsRegistry = M.REGISTRY, host=HOST):
+        """
+        Initialise the metrics thread, binding its port right away so a port in use is reported to the caller.
+        :param port: the port to serve on. 0 picks a free one, see self.port.
+        :param add_event_to_server: a reference to the corresponding server's add_terminal_event method.
+        :param registry: the metrics to serve.
+        :param host: the address to bind to.
+        """
+        super().__init__()
+        self.daemon = True
+        self.terminal_event = Event()
+        self.logger = Logger.create_logger(self.__repr__(), logging.INFO, to_file=True)
+        self.server = HTTPServer((host, port), _handler(registry))
+        self.server.timeout = MetricsThread.POLL_INTERVAL
+        self.port = self.server.server_address[1]
+
+        add_event_to_server(self.terminal_event)
+
+    def __repr__(self):
+        return f'<MetricsThread, id={id(self)}>'
+
+    def run(self):
+        self.logger.info(f"Serving metrics on http://{self.server.server_address[0]}:{self.port}/metrics "
+                         f"src={SRC}/run:41")
+        while not self.terminal_event.is_set():
+            self.server.handle_request()
+
+        self.server.server_close()
+        self.logger.warning(f'Shutting down metrics thread. src={SRC}/run:46')
+
+
+def _handler(registry: M.MetricsRegistry):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # scrapes are too frequent to log
+
+    return MetricsHandler
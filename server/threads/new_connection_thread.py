@@ -1,93 +1,222 @@
-import time
 import logging
 import socket as S
-from threading import Thread
-from threading import Lock
+import time
 
 from model.logger import Logger
+import model.metrics as M
 import model.protocol as P
+from model.codec import negotiated_codec
 from model.player import Player
 from model.result import Result
-from server.group import Group
+from server.admission import AdmissionControl
+from server.liveness import LivenessMonitor
+from server.lobby_registry import LobbyRegistry
 
 SRC = 'server/threads/new_connection'
 
 
-class ConnectionHandler(Thread):
-    def __init__(self, player: Player, lock: Lock, groups: list):
-        super().__init__()
+class ConnectionHandler:
+    """
+    Performs the handshake with a freshly accepted connection and queues the player in a lobby, in one of three ways:
+    - pipelined: the client sent its player record without waiting for WELCOME, and is answered with WELCOME and
+      ADDING_TO_QUEUE in one send, bundled in one frame if it accepted P.FUSED. A single round trip.
+    - acknowledged: the client answers WELCOME with READY, and is asked for its record at once.
+    - paced: the client is left MESSAGE_DELAY to take in WELCOME before being asked for its record.
+    Given a timeout, the whole handshake has to be over within it of the connection being accepted; clients that are
+    still not queued then are disconnected.
+    Runs on a thread of the handshake pool, see AdmissionControl.start.
+    """
+    CAPABILITIES = [P.BINARY, P.PIPELINE, P.DELTA, P.FUSED]
+    PIPELINED, ACKNOWLEDGED, PACED = 'pipelined', 'acknowledged', 'paced'
+    logger = Logger.create_logger('ConnectionHandler', logging.INFO, to_file=True)  # shared, see Player.logger
+
+    def __init__(self, player: Player, lobbies: LobbyRegistry, liveness: LivenessMonitor = None, timeout=None):
         self.player = player
-        self.logger = Logger.create_logger(self.__repr__(), logging.INFO, to_file=True)
-        self.lock = lock
-        self.groups = groups
+        self.lobbies = lobbies
+        self.liveness = liveness
+        self.accepted_at = time.perf_counter()
+        self.deadline = None if timeout is None else self.accepted_at + timeout
+        self.remote = None
 
     def __repr__(self):
-        addr, port = self.player.get_connection.getpeername()
-        return f'<ConnectionHandler remote={addr}:{port}/>'
+        if self.remote is None:
+            try:
+                addr, port = self.player.get_connection.getpeername()
+                self.remote = f'{addr}:{port}'
+            except S.error:
+                return '<ConnectionHandler remote=closed/>'
+        return f'<ConnectionHandler remote={self.remote}/>'
 
     def run(self):
         method = 'run'
-        with self.lock:
-            try:
-                self._handshake()
-                time.sleep(P.MESSAGE_DELAY)
-                self._request_player()
-
-                self.logger.info(f"Waiting for client response...  src={SRC}/{method}:59")
-                response = self.player.listen()
+        try:
+            response = self._early_record()
 
+            if response is not None and self._is_player_record(P.decode_split_commands(response)):
+                flow = ConnectionHandler.PIPELINED
+                commands = P.decode_split_commands(response)
+                self._identify_player(commands[0])
+                self._welcome_to_queue(commands[1:])
+            else:
+                self._handshake()
+                if response is None:
+                    response = self._await_ready()
+
+                if response is None or response == P.READY:
+                    flow = ConnectionHandler.PACED if response is None else ConnectionHandler.ACKNOWLEDGED
+                    self._request_player()
+                    self.logger.info(f"{self} Waiting for client response...  src={SRC}/{method}:59")
+                    response = self._listen()
+                else:
+                    flow = ConnectionHandler.PIPELINED  # the record was sent early, but came in after WELCOME
+
+                if response is None:
+                    raise ConnectionResetError('Connection closed by client')
                 commands = P.decode_split_commands(response)
                 corrections = 0
 
-                while len(commands) != 1 and corrections < P.MAX_REQUEST_CORRECTIONS:
-                    self._retry_request(self._request_player, corrections)
+                while not self._is_player_record(commands) and corrections < P.MAX_REQUEST_CORRECTIONS:
+                    commands, corrections = self._retry_request(self._request_player, corrections)
 
                 if corrections >= P.MAX_REQUEST_CORRECTIONS:
                     self.logger.warning(
-                        f"Max request attempts exceeded. Throwing out connection... src={SRC}/{method}:77")
+                        f"{self} Max request attempts exceeded. Throwing out connection... src={SRC}/{method}:77")
                     self.player.disconnect()
                     return
 
-                self.logger.info(f"Constructing player... src={SRC}/{method}:82")
-                self.player = self._construct_player(commands[0]).result
+                self._identify_player(commands[0])
+                self._negotiate(commands[1:])
+                self._add_player_to_queue()
 
-                while not self._add_to_group().success:
-                    self.logger.info(f"Creating new lobby... src={SRC}/{method}:87")
-                    self.groups.append(Group(min_players=self.player.preferred_players))
+            group = self.lobbies.place(self.player)
+            M.HANDSHAKE_SECONDS.observe(time.perf_counter() - self.accepted_at)
+            M.HANDSHAKES.inc(1, flow)
 
-            except S.error as error:
-                conn_addr, conn_port = self.player.get_connection.getpeername()
-                self.logger.warning(f"Connection with {conn_addr}:{conn_port} closed. src={SRC}/{method}:54")
+            if self.liveness is not None and not group.in_game:
+                self.liveness.track(self.player, group)
+            self.logger.info(f"{self} Placed {self.player} in {group} ({flow})... src={SRC}/{method}:87")
+
+        except S.timeout:
+            self.logger.warning(f"{self} Handshake timed out. Throwing out connection... src={SRC}/{method}:96")
+            AdmissionControl.shed(AdmissionControl.TIMEOUT)
+            self.player.close()
+        except S.error as error:
+            self.logger.warning(f"{self} Connection closed: {error}. src={SRC}/{method}:54")
+            self.player.close()
+
+    def _listen(self, timeout=None):
+        """
+        Wait for the client's next message, for at most timeout seconds and never past the handshake's deadline.
+        Return: the message, or None if the connection was closed.
+        Raises socket.timeout if none arrived in time.
+        """
+        if self.deadline is not None:
+            remaining = self.deadline - time.perf_counter()
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return self.player.listen(timeout)
+
+    def _early_record(self):
+        """
+        Return: the first message of the client, if it sent one without waiting for WELCOME, e.g. its player record,
+                and it arrived within EARLY_RECORD_WAIT. None otherwise.
+        """
+        try:
+            return self._listen(P.EARLY_RECORD_WAIT)
+        except S.timeout:
+            return None
 
     def _handshake(self):
         method = '_handshake'
-        self.logger.info(f"Performing handshake...  src={SRC}/{method}:53")
-        self.player.tell(P.WELCOME)
+        self.logger.info(f"{self} Performing handshake...  src={SRC}/{method}:53")
+        self.player.tell(P.construct_welcome(ConnectionHandler.CAPABILITIES))
+
+    def _await_ready(self):
+        """
+        Leave the client MESSAGE_DELAY to take in WELCOME before the next message. Clients that accepted PIPELINE
+        acknowledge it with READY instead, and are sent the next one at once.
+        Return: the client's first message, READY or e.g. a player record sent without waiting to be asked.
+                None if the client sent nothing within MESSAGE_DELAY.
+        """
+        method = '_await_ready'
+        try:
+            response = self._listen(P.MESSAGE_DELAY)
+        except S.timeout:
+            return None
+
+        self.logger.info(f"{self} Client ready: {response == P.READY}... src={SRC}/{method}:70")
+        return response
+
+    def _welcome_to_queue(self, commands: list):
+        """
+        Answer a player record sent without waiting for WELCOME: agree on the capabilities it accepts, and tell the
+        client both: in one BUNDLE sent as text if it accepted P.FUSED, after which both ends switch codecs.
+        Otherwise, WELCOME is sent as text, and ADDING_TO_QUEUE in the codec agreed on, written at once: clients switch
+        codecs as soon as they read WELCOME, just as when they send their record after it.
+        :param commands: the commands following the player record.
+        :return: None
+        """
+        method = '_welcome_to_queue'
+        accepted = self._agree(commands)
+
+        if P.FUSED in self.player.capabilities:
+            self.logger.info(f"{self} Welcoming and queueing in one frame...  src={SRC}/{method}:135")
+            self.player.tell(P.construct_bundle([P.construct_welcome(accepted), P.ADDING_TO_QUEUE]))
+            self._switch_codec()
+            return
+
+        self.logger.info(f"{self} Welcoming and queueing in one send...  src={SRC}/{method}:140")
+        welcome = self.player.codec.encode(P.construct_welcome(accepted))
+        self._switch_codec()
+        queued = self.player.codec.encode(P.ADDING_TO_QUEUE)
+
+        M.record_sent(P.construct_welcome(accepted), len(welcome))
+        M.record_sent(P.ADDING_TO_QUEUE, len(queued))
+        self.player.send(welcome + queued)
+
+    def _negotiate(self, commands: list):
+        """
+        Agree on the capabilities the client accepted in its player record, and switch codecs accordingly.
+        Clients that do not know about capabilities send none, and keep talking text.
+        :param commands: the commands following the player record.
+        :return: None
+        """
+        self._agree(commands)
+        self._switch_codec()
+
+    def _agree(self, commands: list):
+        """
+        Return: the capabilities offered that the client accepted in the commands following its player record, sorted.
+        """
+        method = '_agree'
+        accepted = P.decode_capabilities(commands[0]) if commands else []
+        self.player.capabilities = set(accepted) & set(ConnectionHandler.CAPABILITIES)
+        self.logger.info(f"{self} Agreed on capabilities {self.player.capabilities}... src={SRC}/{method}:108")
+        return sorted(self.player.capabilities)
+
+    def _switch_codec(self):
+        codec = negotiated_codec(self.player.capabilities)
+        if codec is not self.player.codec:
+            self.player.set_codec(codec)
 
     def _request_player(self):
         method = '_request_player'
-        self.logger.info(f'Requesting player data... src={SRC}/{method}:56')
+        self.logger.info(f'{self} Requesting player data... src={SRC}/{method}:56')
         self.player.tell(P.REQUEST_PLAYER)
 
-    def _construct_player(self, command):
-        result = P.decode_player(command)
-
-        if not result.success:
-            return Result.get_negative()
-
-        name, number_of_players = result.result
-        return Result.get_positive(Player(self.player.get_connection, name, number_of_players))
-
-    def _add_to_group(self):
-        result = self._check_available_groups()
-
-        if not result.success:
-            return Result.get_negative()
-
-        self._add_player_to_queue()
-        result.result.add([self.player])
-
-        return Result.get_positive()
+    @staticmethod
+    def _is_player_record(commands: list):
+        if len(commands) == 2:
+            return P.decode_player(commands[0]).success and commands[1].startswith(P.CAPABILITIES)
+        return len(commands) == 1 and P.decode_player(commands[0]).success
+
+    def _identify_player(self, command: str):
+        """
+        Name the connection's player after their record. The Player is kept, with anything the client already sent.
+        @requires P.decode_player(command).success
+        """
+        method = '_identify_player'
+        self.logger.info(f"{self} Identifying player... src={SRC}/{method}:82")
+        self.player.name, self.player.preferred_players = P.decode_player(command).result
 
     def _add_player_to_queue(self):
         self.player.tell(P.ADDING_TO_QUEUE)
@@ -95,14 +224,16 @@ class ConnectionHandler(Thread):
     def _retry_request(self, to_retry, corrections=0):
         method = '_retry_request'
         corrections += 1
-        self.logger.warning(f"Input not recognised. Retrying... src={SRC}/{method}:68")
+        self.logger.warning(f"{self} Input not recognised. Retrying... src={SRC}/{method}:68")
         self._send_invalid_input()
 
         to_retry()
 
-        self.logger.info(f"Waiting for client retry...  src={SRC}/{method}:72")
-        response = self.player.listen()
+        self.logger.info(f"{self} Waiting for client retry...  src={SRC}/{method}:72")
+        response = self._listen()
 
+        if response is None:
+            raise ConnectionResetError('Connection closed by client')
         commands = P.decode_split_commands(response)
         return commands, corrections
 
@@ -112,10 +243,3 @@ class ConnectionHandler(Thread):
             return Result.get_positive()
         except S.error as error:
             return Result.get_negative(error)
-
-    def _check_available_groups(self):
-        for group in self.groups:
-            if group.count + 1 <= group.min_players and group.count + 1 <= self.player.preferred_players:
-                return Result.get_positive(group)
-
-        return Result.get_negative()
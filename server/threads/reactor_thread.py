@@ -0,0 +1,173 @@
+from queue import Empty
+from queue import SimpleQueue
+from threading import Event
+from threading import Thread
+import heapq
+import itertools
+import logging
+import selectors
+import socket as S
+
+from model.logger import Logger
+from server.game_state import GameStateMachine
+
+SRC = 'server/threads/reactor_thread'
+
+
+class ReactorThread(Thread):
+    """
+    A single thread stepping many GameStateMachines at once: it waits on every player's connection with a selector,
+    and on the pause of every game with a heap of timers, and hands each game what happened to it.
+    Games never block this thread on a read; a player that does not answer only holds up their own game.
+    """
+    POLL_INTERVAL = 0.5  # in seconds, the longest the thread waits before checking for shutdown
+
+    def __init__(self, add_event_to_server):
+        """
+        Initialise the reactor thread.
+        :param add_event_to_server: a reference to the corresponding server's add_terminal_event method.
+        """
+        super().__init__()
+        self.daemon = True
+        self.terminal_event = Event()
+        self.logger = Logger.create_logger(self.__repr__(), logging.INFO, to_file=True)
+        self.selector = selectors.DefaultSelector()
+        self.submitted = SimpleQueue()  # games handed over by other threads, not yet started
+        self.timers = []  # heap of (wake_at, sequence number, game); entries no longer scheduled are skipped
+        self.scheduled = {}  # game -> (wake_at, sequence number) of its timer in the heap, until that one fires
+        self.sequence = itertools.count()
+        self.games = set()
+        self.wake_up, self.waker = S.socketpair()  # a byte written to waker interrupts the selector
+
+        self.wake_up.setblocking(False)
+        self.waker.setblocking(False)
+        self.selector.register(self.wake_up, selectors.EVENT_READ, None)
+        add_event_to_server(self.terminal_event)
+
+    def __repr__(self):
+        return f'<ReactorThread, id={id(self)}>'
+
+    def submit(self, game: GameStateMachine):
+        """
+        Have the reactor start and play a game. Safe to call from any thread.
+        :param game: the game to play, not yet started.
+        :return: None
+        """
+        self.submitted.put(game)
+        try:
+            self.waker.send(b'\0')
+        except BlockingIOError:
+            pass  # the reactor has wake-ups pending already
+
+    def run(self):
+        while not self.terminal_event.is_set():
+            for key, _ in self.selector.select(self._timeout()):
+                if key.data is None:
+                    self._drain_wake_ups()
+                else:
+                    self._receive(*key.data)
+
+            self._start_submitted()
+            self._fire_timers()
+
+        self.logger.warning(f'Shutting down reactor thread with {len(self.games)} games. src={SRC}/run:71')
+
+    def _timeout(self):
+        if not self.timers:
+            return ReactorThread.POLL_INTERVAL
+        return min(ReactorThread.POLL_INTERVAL, max(0.0, self.timers[0][0] - self.timers[0][2].clock.now()))
+
+    def _drain_wake_ups(self):
+        try:
+            while self.wake_up.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _start_submitted(self):
+        while True:
+            try:
+                game = self.submitted.get_nowait()
+            except Empty:
+                return
+
+            self.games.add(game)
+            closed = []
+            for player in game.group.players:
+                try:
+                    self.selector.register(player.get_connection, selectors.EVENT_READ, (game, player))
+                except (ValueError, OSError):
+                    closed.append(player)  # the connection was closed before the game started
+
+            self._step(game, game.start)
+            for player in closed:
+                self._step(game, game.on_disconnect, player)
+
+            if game not in self.games:
+                continue  # over already, too few players being left
+            for player in game.group.players:
+                if player.get_frame_reader.frames:  # sent before the game started, and already read
+                    self._receive(game, player)
+
+    def _receive(self, game: GameStateMachine, player):
+        messages = player.receive()
+
+        if messages is None:
+            self._step(game, game.on_disconnect, player)
+            return
+
+        for message in messages:
+            self._step(game, game.on_message, player, message)
+
+    def _fire_timers(self):
+        while self.timers and self.timers[0][0] <= self.timers[0][2].clock.now():
+            wake_at, sequence, game = heapq.heappop(self.timers)
+
+            if game in self.games and self.scheduled.get(game) == (wake_at, sequence):
+                del self.scheduled[game]
+                self._step(game, game.on_timer)
+
+    def _step(self, game: GameStateMachine, event, *arguments):
+        """
+        Hand an event to a game, then schedule its next pause, or forget about it once it is over.
+        A game that raises is ended, rather than taking every other game down with the reactor.
+        The timer is scheduled unless the one in the heap is due at the same time: a timer that fired is no longer
+        scheduled, so a pause due at once, e.g. when every player pipelines, is not taken for the one that just ended.
+        """
+        if game not in self.games:
+            return
+
+        try:
+            event(*arguments)
+        except Exception as error:
+            self.logger.error(f"{game} failed: {error!r}. Ending it... src={SRC}/_step:131")
+            self._finish(game)
+
+        while game.evicted:
+            self._unwatch(game.evicted.pop())
+
+        if game.thread_finished:
+            self._forget(game)
+        elif game.wake_at is not None and self.scheduled.get(game, (None,))[0] != game.wake_at:
+            self.scheduled[game] = (game.wake_at, next(self.sequence))
+            heapq.heappush(self.timers, (game.wake_at, self.scheduled[game][1], game))
+
+    def _finish(self, game: GameStateMachine):
+        try:
+            game.finish()
+        except Exception as error:
+            self.logger.error(f"Could not end {game}: {error!r} src={SRC}/_finish:143")
+            game.thread_finished = True
+
+    def _forget(self, game: GameStateMachine):
+        self.games.discard(game)
+        self.scheduled.pop(game, None)
+
+        for player in game.group.players:
+            self._unwatch(player)
+
+    def _unwatch(self, player):
+        try:
+            self.selector.unregister(player.get_connection)
+        except (KeyError, ValueError):
+            pass
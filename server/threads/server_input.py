@@ -1,16 +1,26 @@
 from socket import socket
+from socket import SHUT_RDWR
 from threading import Thread
 from threading import Event
 import logging
+import os
 
+import model.metrics as M
 from model.logger import Logger
 
 
 class ServerInput(Thread):
-    def __init__(self, server_socket: socket, events: list):
+    def __init__(self, server_socket: socket, events: list, stats=None):
+        """
+        Initialise the terminal thread.
+        :param server_socket: the socket CLOSE closes.
+        :param events: the terminal events CLOSE sets.
+        :param stats: called on STATS. Default: print this process' metrics.
+        """
         super().__init__()
         self.socket = server_socket
         self.events = events
+        self.stats = stats if stats is not None else log_stats
         self.logger = Logger.create_logger('SERVER_INPUT', logging.INFO, to_file=True)
 
     def run(self):
@@ -20,7 +30,58 @@ class ServerInput(Thread):
             command = input()
             self.logger.info(f'Received command: {command}')
             if command == 'CLOSE':
-                self.socket.close()
-                for event in self.events:
-                    event.set()
+                close_server(self.socket, self.events)
                 break
+            elif command == 'STATS':
+                self.stats()
+
+
+class ShutdownListener(Thread):
+    """
+    Stands in for ServerInput in a worker process, which has no terminal of its own:
+    waits for the supervisor's commands on a pipe. STATS prints the worker's metrics; CLOSE closes the worker.
+    """
+    def __init__(self, server_socket: socket, events: list, supervisor):
+        super().__init__(daemon=True)
+        self.socket = server_socket
+        self.events = events
+        self.supervisor = supervisor
+        self.logger = Logger.create_logger('SERVER_INPUT', logging.INFO, to_file=True)
+
+    def run(self):
+        command = None
+
+        while command != 'CLOSE':
+            try:
+                command = self.supervisor.recv()
+            except (EOFError, OSError):
+                command = 'CLOSE'  # the supervisor is gone
+
+            self.logger.info(f'Received command: {command} from supervisor')
+            if command == 'STATS':
+                log_stats()
+
+        close_server(self.socket, self.events)
+
+
+def log_stats():
+    """
+    Print the metrics of this process to the console, in the same format the metrics endpoint serves.
+    :return: None
+    """
+    Logger.create_logger('STATS', logging.INFO).info(f'Process {os.getpid()}:\n{M.REGISTRY.render()}')
+
+
+def close_server(server_socket: socket, events: list):
+    """
+    Close the listening socket and set every terminal event, so that all threads wind down.
+    :return: None
+    """
+    try:
+        server_socket.shutdown(SHUT_RDWR)  # wakes up the thread blocked in accept(), which close() alone does not
+    except OSError:
+        pass
+
+    server_socket.close()
+    for event in events:
+        event.set()
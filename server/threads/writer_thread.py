@@ -0,0 +1,128 @@
+from queue import Empty
+from queue import SimpleQueue
+from threading import Event
+from threading import Thread
+import logging
+import selectors
+import socket as S
+
+import model.outbound as O
+from model.logger import Logger
+from model.outbound import OutboundQueue
+from model.player import Player
+
+SRC = 'server/threads/writer_thread'
+
+
+class WriterThread(Thread):
+    """
+    A single thread writing what the players' connections could not take right away: it waits on every connection
+    with frames queued (see OutboundQueue) with a selector, and writes all of them in one send as soon as it is
+    writable. Games and broadcasts only ever queue frames, so a client that stops reading holds up no one but itself.
+    """
+    POLL_INTERVAL = 0.5  # in seconds, the longest the thread waits before checking for shutdown and lingering closes
+
+    def __init__(self, add_event_to_server, max_bytes=O.MAX_BYTES, policy=O.DISCONNECT):
+        """
+        Initialise the writer thread.
+        :param add_event_to_server: a reference to the corresponding server's add_terminal_event method.
+        :param max_bytes: the most bytes queued per connection.
+        :param policy: what to do with a connection whose queue overflows, see OutboundQueue.
+        """
+        super().__init__()
+        self.daemon = True
+        self.terminal_event = Event()
+        self.logger = Logger.create_logger(self.__repr__(), logging.INFO, to_file=True)
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.selector = selectors.DefaultSelector()
+        self.watched = SimpleQueue()  # queues handed over by other threads, not yet registered
+        self.closing = set()  # queues whose owner closed the connection, still registered
+        self.wake_up, self.waker = S.socketpair()  # a byte written to waker interrupts the selector
+
+        self.wake_up.setblocking(False)
+        self.waker.setblocking(False)
+        self.selector.register(self.wake_up, selectors.EVENT_READ, None)
+        add_event_to_server(self.terminal_event)
+
+    def __repr__(self):
+        return f'<WriterThread, id={id(self)}>'
+
+    def attach(self, player: Player):
+        """
+        Give a player's connection an outbound queue written by this thread. Does nothing on platforms without
+        non-blocking sends, where players keep writing to their socket themselves.
+        :return: None
+        """
+        if O.NO_WAIT is not None:
+            player.outbound = OutboundQueue(player.get_connection, self, self.max_bytes, self.policy)
+
+    def watch(self, queue: OutboundQueue):
+        """
+        Have the thread write the frames of a queue, or close its socket. Safe to call from any thread.
+        :return: None
+        """
+        self.watched.put(queue)
+        try:
+            self.waker.send(b'\0')
+        except BlockingIOError:
+            pass  # the writer has wake-ups pending already
+
+    def run(self):
+        while not self.terminal_event.is_set():
+            for key, _ in self.selector.select(WriterThread.POLL_INTERVAL):
+                if key.data is None:
+                    self._drain_wake_ups()
+                else:
+                    self._write(key.data)
+
+            self._register_watched()
+
+            for queue in [queue for queue in self.closing if queue.done]:
+                self._close(queue)
+
+        self.logger.warning(f'Shutting down writer thread. src={SRC}/run:84')
+
+    def _drain_wake_ups(self):
+        try:
+            while self.wake_up.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _register_watched(self):
+        while True:
+            try:
+                queue = self.watched.get_nowait()
+            except Empty:
+                return
+
+            try:
+                self.selector.register(queue.connection, selectors.EVENT_WRITE, queue)
+            except KeyError:
+                pass  # registered already
+            except (ValueError, OSError):
+                continue  # closed already
+
+            if queue.closing_at is not None or queue.abandoned:
+                self.closing.add(queue)
+
+    def _write(self, queue: OutboundQueue):
+        if queue.flush():
+            return
+
+        if queue.done:
+            self._close(queue)
+        elif queue.closing_at is None:
+            self._unwatch(queue)  # until it queues frames again
+
+    def _unwatch(self, queue: OutboundQueue):
+        try:
+            self.selector.unregister(queue.connection)
+        except (KeyError, ValueError):
+            pass
+
+    def _close(self, queue: OutboundQueue):
+        self._unwatch(queue)
+        self.closing.discard(queue)
+        queue.connection.close()
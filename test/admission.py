@@ -0,0 +1,137 @@
+import logging
+import socket
+import time
+from threading import Event
+
+import model.metrics as M
+import model.protocol as P
+from model.clock import VirtualClock
+from model.frame_reader import FrameReader
+from model.player import Player
+from server.admission import AdmissionControl
+from server.admission import RateLimiter
+from server.hangman_server import HangmanServer
+from server.lobby_registry import LobbyRegistry
+from server.threads.new_connection_thread import ConnectionHandler
+from test.pipeline import connect
+
+logger = logging.getLogger("test_admission")
+logger.setLevel(logging.INFO)
+
+
+def run():
+    check(test_rate_limiter_refills())
+    check(test_full_pool_sheds())
+    check(test_handshake_times_out())
+    check(test_shed_connection_told_busy())
+
+
+class BlockedHandshake:
+    """A handshake that does not finish until released."""
+
+    def __init__(self):
+        self.started = Event()
+        self.released = Event()
+
+    def run(self):
+        self.started.set()
+        self.released.wait(5)
+
+
+def shed(reason: str):
+    return M.CONNECTIONS_SHED.collect().get((reason,), 0)
+
+
+def frames(connection: socket.socket):
+    """
+    Return: the messages received on connection until the server closed it.
+    """
+    reader, messages = FrameReader(connection), []
+    try:
+        while True:
+            messages.append(reader.next_frame())
+    except (socket.error, ValueError):
+        return messages
+
+
+def test_rate_limiter_refills():
+    start_test('test_rate_limiter_refills')
+
+    clock = VirtualClock()
+    limiter = RateLimiter(10, burst=3, clock=clock)
+    burst = [limiter.take() for _ in range(4)]
+
+    clock.advance(0.1)
+    refilled = [limiter.take(), limiter.take()]
+
+    clock.advance(60)
+    return burst == [True, True, True, False] and refilled == [True, False] and \
+        [limiter.take() for _ in range(4)] == [True, True, True, False]
+
+
+def test_full_pool_sheds():
+    start_test('test_full_pool_sheds')
+
+    admission = AdmissionControl(max_handshakes=1, max_queued_handshakes=1)
+    handshakes = [BlockedHandshake() for _ in range(3)]
+
+    running = admission.start(handshakes[0])
+    handshakes[0].started.wait(1)
+    queued, refused = admission.start(handshakes[1]), admission.start(handshakes[2])
+
+    for handshake in handshakes:
+        handshake.released.set()
+    admission.shutdown()
+
+    # coroutines keep count of their own handshakes
+    return running is None and queued is None and refused == AdmissionControl.HANDSHAKES and \
+        not handshakes[2].started.is_set() and admission.admit(handshaking=1) is None and \
+        admission.admit(handshaking=2) == AdmissionControl.HANDSHAKES
+
+
+def test_handshake_times_out():
+    start_test('test_handshake_times_out')
+
+    server_side, client_side = connect()
+    before = shed(AdmissionControl.TIMEOUT)
+    handler = ConnectionHandler(Player(connection=server_side), LobbyRegistry(), timeout=0.05)
+
+    start = time.perf_counter()
+    handler.run()  # against a client that never answers
+    seconds = time.perf_counter() - start
+
+    received = frames(client_side)
+    client_side.close()
+    return seconds < P.MESSAGE_DELAY and handler.player.closed and shed(AdmissionControl.TIMEOUT) == before + 1 and \
+        received == [P.construct_welcome(ConnectionHandler.CAPABILITIES), P.REQUEST_PLAYER]
+
+
+def test_shed_connection_told_busy():
+    start_test('test_shed_connection_told_busy')
+
+    server_side, client_side = socket.socketpair()
+    before = shed(AdmissionControl.RATE)
+    admission = AdmissionControl(accept_rate=1, accept_burst=1, clock=VirtualClock())
+
+    reasons = [admission.admit(), admission.admit()]
+    HangmanServer.shed(Player(connection=server_side), reasons[1])
+
+    received = frames(client_side)
+    client_side.close()
+    return reasons == [None, AdmissionControl.RATE] and received == [P.BUSY] and \
+        shed(AdmissionControl.RATE) == before + 1
+
+
+def check(method: bool):
+    if method:
+        logger.warning("PASSED \n")
+    else:
+        logger.warning("FAILED \n")
+
+
+def start_test(name):
+    logger.warning(f"TESTING: {name}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,160 @@
+import logging
+import random
+import socket
+
+import client.interpreters as I
+import model.protocol as P
+from model.frame_reader import FrameReader
+from model.player import Player
+from server.deadlines import PromptDeadlines
+from server.game import Game
+from server.game_state import GameStateMachine
+from test.harness import drive
+from test.harness import finished
+from test.harness import set_up_game
+
+logger = logging.getLogger("test_board")
+logger.setLevel(logging.INFO)
+
+PHRASE = 'the quick brown fox'
+
+
+def run():
+    check(test_deltas_rebuild_board())
+    check(test_skipped_turn_sends_no_delta())
+    check(test_board_sent_on_request())
+    check(test_client_requests_board_on_gap())
+
+
+def play(names, delta, engine, deadlines=None, **bot_options):
+    """
+    Play a game of ScriptedBots on engine, the players named in delta having accepted P.DELTA.
+    Return: a dict, name -> the messages the bot received, or None if the game did not finish.
+    """
+    game, bots = set_up_game(names, engine=engine, deadlines=deadlines,
+                             capabilities={name: [P.DELTA] for name in delta}, **bot_options)
+
+    random.seed(1)
+    if engine is GameStateMachine:
+        drive(game)
+    else:
+        game.run()
+
+    if not all(finished(bot) for bot in bots):
+        return None
+    return {bot.name: bot.transcript for bot in bots}
+
+
+def boards(transcript: list):
+    """
+    Return: a list of the boards the client was shown, as MOVE_MADE or rebuilt from BOARD and BOARD_DELTA, and a
+            list of the tries every BOARD and BOARD_DELTA was numbered with.
+    """
+    shown, sequences, board = [], [], None
+
+    for message in transcript:
+        if message.startswith(P.MOVE_MADE + P.ASSIGNMENT):
+            shown.append(P.decode_move(message)[1])
+            continue
+        elif message.startswith(P.BOARD + P.ASSIGNMENT):
+            sequence, board = P.decode_board(message)
+        elif message.startswith(P.BOARD_DELTA + P.ASSIGNMENT):
+            sequence, letter, positions = P.decode_delta(message)
+            for position in positions:
+                board[position] = letter
+        else:
+            continue
+
+        shown.append(list(board))
+        sequences.append(sequence)
+    return shown, sequences
+
+
+def board_bytes(transcript: list):
+    """
+    Return: the bytes of the board messages in transcript, headers aside (the binary codec shrinks those to 2 bytes).
+    """
+    commands = (P.MOVE_MADE + P.ASSIGNMENT, P.BOARD + P.ASSIGNMENT, P.BOARD_DELTA + P.ASSIGNMENT)
+    return sum(len(message.encode()) for message in transcript if message.startswith(commands))
+
+
+def test_deltas_rebuild_board():
+    start_test('test_deltas_rebuild_board')
+
+    names = ('pascal', 'alina', 'ada')
+    games = [play(names, ('pascal', 'ada'), engine, secret=PHRASE) for engine in (Game, GameStateMachine)]
+
+    if None in games or games[0] != games[1]:
+        return False
+
+    game = games[1]
+    shown = {name: boards(transcript)[0] for name, transcript in game.items()}
+    return shown['pascal'] == shown['alina'] == shown['ada'] and \
+        board_bytes(game['ada']) < board_bytes(game['alina']) / 2
+
+
+def test_skipped_turn_sends_no_delta():
+    start_test('test_skipped_turn_sends_no_delta')
+
+    games = [play(('pascal', 'alina'), ('alina',), engine, PromptDeadlines(), silent={P.TURN})
+             for engine in (Game, GameStateMachine)]
+
+    if None in games or games[0] != games[1]:
+        return False
+
+    # pascal is sent the unchanged board again after alina's turn was skipped, alina is not
+    legacy, _ = boards(games[1]['pascal'])
+    shown, sequences = boards(games[1]['alina'])
+    return len(shown) == len(legacy) - 1 and sequences == list(range(len(sequences)))
+
+
+def test_board_sent_on_request():
+    start_test('test_board_sent_on_request')
+
+    for engine in (Game, GameStateMachine):
+        game = play(('pascal', 'alina'), ('alina',), engine, secret=PHRASE, request_board=True)
+        if game is None:
+            return False
+
+        transcript = game['alina']
+        first_delta = next(index for index, message in enumerate(transcript) if message.startswith(P.BOARD_DELTA))
+        requested = [message for message in transcript[first_delta:] if message.startswith(P.BOARD + P.ASSIGNMENT)]
+
+        # answered before the next turn is played, with the board as it was then
+        shown, sequences = boards(transcript)
+        if not requested or P.decode_board(requested[0])[0] != sequences[1] or shown[1] != shown[2]:
+            return False
+    return True
+
+
+def test_client_requests_board_on_gap():
+    start_test('test_client_requests_board_on_gap')
+
+    client_side, server_side = socket.socketpair()
+    player = Player(connection=client_side)
+
+    shown = I.process_board(payload=P.construct_board(0, list('*a*')), player=player)
+    updated = I.process_delta(payload=P.construct_delta(1, 'b', [0]), player=player)
+    I.process_delta(payload=P.construct_delta(3, 'c', [2]), player=player)  # 2 went missing
+    ignored = I.process_delta(payload=P.construct_delta(4, 'd', [1]), player=player)
+
+    requested = FrameReader(server_side).next_frame()
+    client_side.close()
+    server_side.close()
+    return shown == (True, 'Word: * a *') and updated == (True, 'Word: b a *') and ignored == (True, None) and \
+        requested == P.REQUEST_BOARD and I.board == list('ba*')
+
+
+def check(method: bool):
+    if method:
+        logger.warning("PASSED \n")
+    else:
+        logger.warning("FAILED \n")
+
+
+def start_test(name):
+    logger.warning(f"TESTING: {name}")
+
+
+if __name__ == "__main__":
+    run()
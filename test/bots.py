@@ -0,0 +1,116 @@
+from threading import Thread
+import socket as S
+import time
+
+import model.protocol as P
+from model.frame_reader import FrameReader
+
+
+class ScriptedBot(Thread):
+    """
+    A headless client for tests: answers every prompt of the server from a script, and records what it received.
+    The first time it is sent one of the prompts in `invalid` (P.REQUEST_MAX_TRIES, P.YOUR_TURN or P.TURN), it answers
+    with a malformed message instead. The first time it is sent one of the prompts in `silent` (the same, or
+    P.CONTINUE_PLAYING), it does not answer at all. With pipeline set, it accepts P.PIPELINE if WELCOME offers it.
+    With request_board set, it asks for the BOARD on its first BOARD_DELTA, as if it had missed one.
+    A BUNDLE is recorded as received, and its messages answered in turn. With early_record set, it sends its player
+    record as soon as it starts, accepting P.FUSED, rather than waiting to be asked.
+    """
+    INVALID_ANSWERS = {
+        P.REQUEST_MAX_TRIES: f'{P.construct_max_tries(10)}{P.DELIM}{P.construct_max_tries(10)}',
+        P.YOUR_TURN: P.construct_secret_word('x' * 50),
+        P.TURN: f'{P.GUESS}{P.ASSIGNMENT}ab',
+        P.CONTINUE_PLAYING: f'{P.CONTINUE_PLAYING}{P.ASSIGNMENT}2',
+    }
+
+    def __init__(self, connection: S.socket, name: str, secret='ab', guesses='abcdefghijklmnopqrstuvwxyz',
+                 max_tries=10, rounds=1, preferred_players=2, invalid=(), silent=(), pipeline=False,
+                 request_board=False, early_record=False):
+        super().__init__(daemon=True)
+        self.connection = connection
+        self.name = name
+        self.secret = secret
+        self.guesses = guesses
+        self.max_tries = max_tries
+        self.rounds = rounds
+        self.preferred_players = preferred_players
+        self.invalid = set(invalid)
+        self.silent = set(silent)
+        self.pipeline = pipeline
+        self.request_board = request_board
+        self.early_record = early_record
+        self.accepted = [P.FUSED] if early_record else []  # the capabilities accepted in the player record
+        self.reader = None  # created by run(): bots answered in-process (see test/harness.py) never read
+        self.transcript = []
+        self.received_at = []  # time.perf_counter() per message in the transcript
+        self.guessed = 0
+        self.rounds_played = 0
+
+    def __repr__(self):
+        return f"<ScriptedBot name={self.name} />"
+
+    def run(self):
+        self.reader = FrameReader(self.connection)
+        try:
+            if self.early_record:
+                self.tell_record()
+
+            while True:
+                message = self.reader.next_frame()
+                self.transcript.append(message)
+                self.received_at.append(time.perf_counter())
+
+                if not self.answer(message):
+                    break
+        except (S.error, ValueError):
+            pass
+        finally:
+            self.connection.close()
+
+    def answer(self, message: str):
+        """
+        Respond to a message of the server.
+        Return: False once the server disconnected the bot.
+        """
+        if message.startswith(P.BUNDLE + P.ASSIGNMENT):
+            return all([self.answer(bundled) for bundled in P.decode_bundle(message)])
+
+        commands = P.decode_split_commands(message)
+        command = commands[0].split(P.ASSIGNMENT)[0]
+        mine = command != P.TURN or P.decode_turn(commands[1:])[0] == self.name
+
+        if command in self.silent and mine:
+            self.silent.discard(command)
+        elif command in self.invalid and mine:
+            self.invalid.discard(command)
+            self.tell(ScriptedBot.INVALID_ANSWERS[command])
+        elif command == P.WELCOME and self.early_record:
+            pass  # the record is already on its way
+        elif command == P.WELCOME and self.pipeline and P.PIPELINE in P.decode_capabilities(commands[-1]):
+            self.accepted = [P.PIPELINE]
+            self.tell(P.READY)
+        elif command == P.BOARD_DELTA and self.request_board:
+            self.request_board = False
+            self.tell(P.REQUEST_BOARD)
+        elif command == P.REQUEST_PLAYER:
+            self.tell_record()
+        elif command == P.REQUEST_MAX_TRIES:
+            self.tell(P.construct_max_tries(self.max_tries))
+        elif command == P.YOUR_TURN:
+            self.tell(P.construct_secret_word(self.secret))
+        elif command == P.TURN and P.decode_turn(commands[1:])[0] == self.name:
+            self.tell(P.construct_guess(self.guesses[self.guessed % len(self.guesses)])[1])
+            self.guessed += 1
+        elif command == P.CONTINUE_PLAYING:
+            self.rounds_played += 1
+            self.tell(P.construct_continue('y' if self.rounds_played < self.rounds else 'n'))
+        elif command == P.FORCE_DISCONNECT:
+            return False
+        return True
+
+    def tell_record(self):
+        record = f'{P.PLAYER}{P.ASSIGNMENT}{self.name}{P.LIST_DELIMITER}{self.preferred_players}'
+        self.tell(record + P.DELIM + P.construct_capabilities(self.accepted) if self.accepted else record)
+
+    def tell(self, message: str):
+        self.connection.sendall(P.write_frame(message))
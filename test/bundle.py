@@ -0,0 +1,113 @@
+import logging
+import random
+
+import model.protocol as P
+from server.game import Game
+from server.game_state import GameStateMachine
+from test.harness import drive
+from test.harness import finished
+from test.harness import set_up_game
+
+logger = logging.getLogger("test_bundle")
+logger.setLevel(logging.INFO)
+
+NAMES = ('pascal', 'alina', 'ada')
+
+
+def run():
+    check(test_bundle_round_trip())
+    check(test_turn_updates_fused())
+    check(test_mixed_group_fused())
+
+
+def play(engine, capabilities: dict):
+    """
+    Play a game of ScriptedBots named NAMES on engine.
+    :param capabilities: a dict, name -> the capabilities that player agreed on.
+    Return: a dict, name -> the frames the bot received, or None if the game did not finish.
+    """
+    game, bots = set_up_game(NAMES, engine=engine, capabilities=capabilities, secret='hangman', rounds=2)
+
+    random.seed(1)
+    if engine is GameStateMachine:
+        drive(game)
+    else:
+        game.run()
+
+    if not all(finished(bot) for bot in bots):
+        return None
+    return {bot.name: bot.transcript for bot in bots}
+
+
+def unbundled(frames: list):
+    """
+    Return: the messages in frames, as if every one of them had been sent in a frame of its own.
+    """
+    messages = []
+    for frame in frames:
+        messages.extend(P.decode_bundle(frame) if frame.startswith(P.BUNDLE + P.ASSIGNMENT) else [frame])
+    return messages
+
+
+def alone(frames: list, command: str):
+    """
+    Return: the number of frames holding nothing but a message of command.
+    """
+    return len([frame for frame in frames if frame.partition(P.DELIM)[0].partition(P.ASSIGNMENT)[0] == command])
+
+
+def test_bundle_round_trip():
+    start_test('test_bundle_round_trip')
+
+    messages = [P.construct_correct(True), P.construct_move(list('a:b;c')), 'T;P=alina,2;7', '']
+    malformed = [f'{P.BUNDLE}{P.ASSIGNMENT}5:C=1', f'{P.BUNDLE}{P.ASSIGNMENT}x:C=1', f'{P.BUNDLE}{P.ASSIGNMENT}3C=1',
+                 P.construct_correct(True)]
+
+    return P.decode_bundle(P.construct_bundle(messages)) == messages and \
+        all(P.decode_bundle(message) is None for message in malformed)
+
+
+def test_turn_updates_fused():
+    start_test('test_turn_updates_fused')
+
+    fused = {name: [P.FUSED] for name in NAMES}
+
+    for engine in (Game, GameStateMachine):
+        legacy, game = play(engine, {}), play(engine, fused)
+        if legacy is None or game is None:
+            return False
+
+        for name in NAMES:
+            # the same messages, but the board and the result of a guess only in the frame of the next prompt
+            if unbundled(game[name]) != legacy[name] or alone(game[name], P.MOVE_MADE) or \
+                    alone(game[name], P.CORRECT):
+                return False
+            fused_away = alone(legacy[name], P.MOVE_MADE) + alone(legacy[name], P.CORRECT)
+            if len(game[name]) != len(legacy[name]) - fused_away:
+                return False
+    return True
+
+
+def test_mixed_group_fused():
+    start_test('test_mixed_group_fused')
+
+    legacy = play(Game, {})
+    games = [play(engine, {'ada': [P.FUSED, P.DELTA]}) for engine in (Game, GameStateMachine)]
+
+    return None not in games and games[0] == games[1] and games[0]['pascal'] == legacy['pascal'] and \
+        games[0]['alina'] == legacy['alina'] and not alone(games[0]['ada'], P.BOARD_DELTA)
+
+
+def check(method: bool):
+    if method:
+        logger.warning("PASSED \n")
+    else:
+        logger.warning("FAILED \n")
+
+
+def start_test(name):
+    logger.warning(f"TESTING: {name}")
+
+
+if __name__ == "__main__":
+    run()
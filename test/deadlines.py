@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import random
+import socket
+
+import model.metrics as M
+import model.protocol as P
+from model.async_player import AsyncPlayer
+from model.player import Player
+from server.coroutines.game_coroutine import AsyncGame
+from server.deadlines import PromptDeadlines
+from server.game import Game
+from server.game_state import GameStateMachine
+from server.group import Group
+from test.bots import ScriptedBot
+from test.harness import drive
+from test.harness import finished
+from test.harness import set_up_game
+
+logger = logging.getLogger("test_deadlines")
+logger.setLevel(logging.INFO)
+
+ASYNC_TIMEOUT = 0.2  # in seconds, the deadline of every prompt in AsyncGame, which waits on the event loop's clock
+
+
+def run():
+    check(test_listen_times_out())
+    check(test_silent_guesser_skipped())
+    check(test_silent_guesser_forfeits())
+    check(test_silent_guesser_evicted())
+    check(test_silent_chooser_skipped())
+    check(test_retries_bounded())
+    check(test_silent_game_abandoned())
+    check(test_async_continue_retried())
+
+
+def play(names, deadlines, silent):
+    """
+    Play the same game on Game, GameStateMachine and AsyncGame, with the bots named in silent not answering their
+    first prompt of that kind.
+    :param silent: a dict, name -> the prompts the bot does not answer the first time, see ScriptedBot.
+    Return: a list of three dicts, one per engine, of the messages each player received, by name.
+    """
+    transcripts = []
+
+    for engine in (Game, GameStateMachine):
+        game, bots = set_up_game(names, engine=engine, deadlines=deadlines)
+        for bot in bots:
+            bot.silent = set(silent.get(bot.name, ()))
+
+        random.seed(1)
+        if engine is GameStateMachine:
+            drive(game)
+        else:
+            game.run()
+
+        if not all(finished(bot) for bot in bots):
+            return [None, None, None]
+        transcripts.append({bot.name: bot.transcript for bot in bots})
+    return transcripts + [play_async(names, deadlines, silent)]
+
+
+def play_async(names, deadlines, silent, **bot_options):
+    """
+    Play a game on AsyncGame, against ScriptedBots over socket pairs, with every deadline ASYNC_TIMEOUT.
+    :param bot_options: passed on to every ScriptedBot, e.g. invalid.
+    Return: a dict of the messages each player received, by name, or None if the game did not finish.
+    """
+    deadlines = PromptDeadlines({prompt: ASYNC_TIMEOUT for prompt in PromptDeadlines.TIMEOUTS}, deadlines.retries,
+                                deadlines.on_expiry)
+
+    async def run():
+        group, bots = Group(min_players=len(names)), []
+
+        for name in names:
+            server_side, client_side = socket.socketpair()
+            player = AsyncPlayer(*await asyncio.open_connection(sock=server_side), name=name)
+            player.capabilities = {P.PIPELINE}  # no pauses between turns
+            group.add([player])
+            bots.append(ScriptedBot(client_side, name, silent=silent.get(name, ()), **bot_options))
+
+        group.start()
+        [bot.start() for bot in bots]
+        random.seed(1)
+        await asyncio.wait_for(AsyncGame(group, deadlines).run(), 10)
+        return bots
+
+    bots = asyncio.run(run())
+    [bot.join(1) for bot in bots]
+    if not all(finished(bot) for bot in bots):
+        return None
+    return {bot.name: bot.transcript for bot in bots}
+
+
+def expired(prompt: str, cause=PromptDeadlines.DEADLINE):
+    return M.PROMPTS_EXPIRED.collect().get((prompt, cause), 0)
+
+
+def test_listen_times_out():
+    start_test('test_listen_times_out')
+
+    server_side, client_side = socket.socketpair()
+    player = Player(connection=server_side)
+
+    try:
+        player.listen(0.05)
+        return False
+    except socket.timeout:
+        pass
+
+    client_side.sendall(P.write_frame(P.construct_guess('a')[1]))
+    answered = player.listen(0.05) == P.construct_guess('a')[1]
+    blocking = server_side.gettimeout() is None
+    client_side.close()
+    return answered and blocking and player.listen(0.05) is None
+
+
+def test_silent_guesser_skipped():
+    start_test('test_silent_guesser_skipped')
+
+    before = expired(PromptDeadlines.GUESS)
+    game, machine, coroutine = play(('pascal', 'alina'), PromptDeadlines(), {'alina': [P.TURN]})
+
+    turns = [message for message in machine['alina'] if message.startswith(P.TURN + P.DELIM)]
+    return game == machine == coroutine and turns[0] == turns[1] and expired(PromptDeadlines.GUESS) == before + 3
+
+
+def test_silent_guesser_forfeits():
+    start_test('test_silent_guesser_forfeits')
+
+    game, machine, coroutine = play(('pascal', 'alina'), PromptDeadlines(on_expiry=PromptDeadlines.FORFEIT),
+                                    {'alina': [P.TURN]})
+
+    # the second turn is announced with a try less, after a wrong "guess" nobody made
+    turns = [message for message in machine['alina'] if message.startswith(P.TURN + P.DELIM)]
+    return game == machine == coroutine and P.decode_turn(turns[1].split(P.DELIM)[1:])[1] == 9
+
+
+def test_silent_guesser_evicted():
+    start_test('test_silent_guesser_evicted')
+
+    before = M.PLAYERS_EVICTED.collect().get((PromptDeadlines.DEADLINE,), 0)
+    deadlines = PromptDeadlines(on_expiry=PromptDeadlines.EVICT)
+    game, machine, coroutine = play(('pascal', 'alina', 'ada'), deadlines, {'alina': [P.TURN]})
+
+    # alina is disconnected on their first turn, and the other two finish the round without them
+    evicted = machine['alina'][-1] == P.FORCE_DISCONNECT and machine['alina'][-2].startswith(P.TURN + P.DELIM)
+    played_on = any(message.startswith(P.WIN) for message in machine['ada'])
+    return game == machine == coroutine and evicted and played_on and \
+        M.PLAYERS_EVICTED.collect().get((PromptDeadlines.DEADLINE,), 0) == before + 3
+
+
+def test_silent_chooser_skipped():
+    start_test('test_silent_chooser_skipped')
+
+    game, machine, coroutine = play(('pascal', 'alina'), PromptDeadlines(), {'pascal': [P.REQUEST_MAX_TRIES]})
+
+    # pascal is skipped, and alina chooses the word instead
+    return game == machine == coroutine and machine['pascal'].count(P.GAME_START) == 2 and \
+        P.REQUEST_MAX_TRIES in machine['alina'] and any(m.startswith(P.WIN) for m in machine['pascal'])
+
+
+def test_retries_bounded():
+    start_test('test_retries_bounded')
+
+    before = expired(PromptDeadlines.GUESS, PromptDeadlines.RETRIES)
+    transcripts = []
+
+    for engine in (Game, GameStateMachine):
+        game, bots = set_up_game(engine=engine, deadlines=PromptDeadlines(retries=1), invalid=[P.TURN])
+        random.seed(1)
+        if engine is GameStateMachine:
+            drive(game)
+        else:
+            game.run()
+        transcripts.append([bot.transcript for bot in bots])
+    coroutine = play_async(('pascal', 'alina'), PromptDeadlines(retries=1), {}, invalid=[P.TURN])
+
+    # the invalid guess is the last chance: the turn is skipped instead of asked again
+    alina = transcripts[1][1]
+    invalid = alina.index(P.INVALID_INPUT)
+    return transcripts[0] == transcripts[1] == list(coroutine.values()) and alina[invalid + 1].startswith(P.MOVE_MADE) \
+        and expired(PromptDeadlines.GUESS, PromptDeadlines.RETRIES) == before + 3
+
+
+def test_silent_game_abandoned():
+    start_test('test_silent_game_abandoned')
+
+    game, machine, coroutine = play(('pascal', 'alina'), PromptDeadlines(),
+                                    {'pascal': [P.REQUEST_MAX_TRIES], 'alina': [P.REQUEST_MAX_TRIES]})
+
+    # neither player chooses a word: the game ends rather than asking them in turn forever
+    return game == machine == coroutine and all(messages[-1] == P.FORCE_DISCONNECT and
+                                                P.YOUR_TURN not in messages for messages in machine.values())
+
+
+def test_async_continue_retried():
+    start_test('test_async_continue_retried')
+
+    coroutine = play_async(('pascal', 'alina'), PromptDeadlines(), {}, invalid=[P.CONTINUE_PLAYING])
+
+    # an invalid answer to play again is told so and asked again, as every other prompt
+    alina = coroutine['alina']
+    invalid = alina.index(P.INVALID_INPUT)
+    return alina[invalid - 1] == P.CONTINUE_PLAYING and alina[invalid + 1] == P.CONTINUE_PLAYING and \
+        alina[-1] == P.FORCE_DISCONNECT
+
+
+def check(method: bool):
+    if method:
+        logger.warning("PASSED \n")
+    else:
+        logger.warning("FAILED \n")
+
+
+def start_test(name):
+    logger.warning(f"TESTING: {name}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+
+import model.protocol as P
+from model.async_player import AsyncPlayer
+from model.frame_reader import FrameReader
+
+logger = logging.getLogger("test_frame_reader")
+logger.setLevel(logging.INFO)
+
+
+class ChunkedConnection:
+    """A fake connection handing out pre-defined chunks, one per recv_into call."""
+    def __init__(self, chunks: list):
+        self.chunks = chunks
+        self.reads = 0
+
+    def recv_into(self, buffer):
+        self.reads += 1
+        if not self.chunks:
+            return 0
+        chunk = self.chunks.pop(0)
+        if len(chunk) > len(buffer):
+            chunk, rest = chunk[:len(buffer)], chunk[len(buffer):]
+            self.chunks.insert(0, rest)
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+
+def run():
+    check(test_split_header())
+    check(test_split_message())
+    check(test_coalesced_frames())
+    check(test_one_read_per_receive())
+    check(test_frame_larger_than_buffer())
+    check(test_buffer_reused())
+    check(test_closed_connection())
+    check(test_async_listen_keeps_split_frame())
+
+
+def frames(*messages):
+    return b''.join(P.write_frame(message) for message in messages)
+
+
+def test_split_header():
+    start_test('test_split_header')
+
+    data = frames(P.WELCOME)
+    reader = FrameReader(ChunkedConnection([data[:10], data[10:40], data[40:]]))
+
+    return reader.next_frame() == P.WELCOME
+
+
+def test_split_message():
+    start_test('test_split_message')
+
+    data = frames('M=*,*,*,e,*')
+    reader = FrameReader(ChunkedConnection([data[:P.HEADER + 3], data[P.HEADER + 3:]]))
+
+    return reader.receive() == [] and reader.receive() == ['M=*,*,*,e,*']
+
+
+def test_coalesced_frames():
+    start_test('test_coalesced_frames')
+
+    data = frames(P.GAME_START, 'T;P=alina,2;10', P.YOUR_TURN)
+    reader = FrameReader(ChunkedConnection([data[:-2], data[-2:]]))
+
+    first = reader.receive()
+    second = reader.receive()
+
+    return first == [P.GAME_START, 'T;P=alina,2;10'] and second == [P.YOUR_TURN]
+
+
+def test_one_read_per_receive():
+    start_test('test_one_read_per_receive')
+
+    connection = ChunkedConnection([frames(P.HEARTBEAT, P.HEARTBEAT)])
+    reader = FrameReader(connection)
+
+    first = reader.next_frame()
+    second = reader.receive()
+
+    return first == P.HEARTBEAT and second == [P.HEARTBEAT] and connection.reads == 1
+
+
+def test_frame_larger_than_buffer():
+    start_test('test_frame_larger_than_buffer')
+
+    message = 'M=' + ','.join(['*'] * 100)
+    data = frames(message, P.HEARTBEAT)
+    reader = FrameReader(ChunkedConnection([data[i:i + 16] for i in range(0, len(data), 16)]), size=32)
+
+    return reader.next_frame() == message and reader.next_frame() == P.HEARTBEAT
+
+
+def test_buffer_reused():
+    start_test('test_buffer_reused')
+
+    data = frames(*['T;P=alina,2;10'] * 50)
+    reader = FrameReader(ChunkedConnection([data[i:i + 50] for i in range(0, len(data), 50)]), size=128)
+    buffer = reader.buffer
+
+    received = [reader.next_frame() for _ in range(50)]
+
+    return received == ['T;P=alina,2;10'] * 50 and reader.buffer is buffer
+
+
+def test_closed_connection():
+    start_test('test_closed_connection')
+
+    reader = FrameReader(ChunkedConnection([frames(P.WELCOME)[:20]]))
+
+    try:
+        reader.next_frame()
+    except ConnectionResetError:
+        return True
+    return False
+
+
+def test_async_listen_keeps_split_frame():
+    start_test('test_async_listen_keeps_split_frame')
+
+    async def listen():
+        reader = asyncio.StreamReader()
+        player = AsyncPlayer(reader, None)
+        frame = frames('T;P=alina,2;10', P.WELCOME)
+        timed_out = []
+
+        for chunk in (frame[:2], frame[2:P.HEADER + 3], frame[P.HEADER + 3:P.HEADER + 9]):  # cut in the header, then the body
+            reader.feed_data(chunk)
+            try:
+                await player.listen(0.01)
+            except asyncio.TimeoutError:
+                timed_out.append(chunk)
+
+        reader.feed_data(frame[P.HEADER + 9:])
+        return len(timed_out) == 3 and [await player.listen(0.01), await player.listen(0.01)]
+
+    return asyncio.run(listen()) == ['T;P=alina,2;10', P.WELCOME]
+
+
+def check(method: bool):
+    global logger
+
+    if method:
+        logger.warning("PASSED \n")
+    else:
+        logger.warning("FAILED \n")
+
+
+def start_test(name):
+    global logger
+    logger.warning(f"TESTING: {name}")
+
+
+if __name__ == "__main__":
+    run()
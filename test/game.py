@@ -1,11 +1,16 @@
 import logging
+import random
 
-from server.game import Game
 from model.player import Player
+from server.game import Game
+from server.group import Group
+from server.hangman import Hangman
 
 game = None
+hangman = None
 player_1 = None
 player_2 = None
+player_3 = None
 
 logger = logging.getLogger("test_game")
 logger.setLevel(logging.INFO)
@@ -13,26 +18,27 @@ logger.setLevel(logging.INFO)
 
 def run ():
     set_up()
-    game.guessed_letters = [Game.UNKNOWN for x in game.word]
     check(test_has_no_winner())
 
     set_up()
-    game.guessed_letters = [x for x in game.word]
+    for letter in 'name':
+        hangman.guess(letter)
     check(test_has_winner())
 
     set_up()
-    game.guessed_letters = [Game.UNKNOWN for x in game.word]
     check(test_guess_correct())
 
     set_up()
-    game.guessed_letters = [Game.UNKNOWN for x in game.word]
     check(test_guess_incorrect())
 
     set_up()
-    check(test_next_guessing_player_current_is_none())
+    check(test_next_guessing_player_current_is_first())
 
     set_up()
-    check(test_next_guessing_player_current_not_none())
+    check(test_next_guessing_player_current_not_first())
+
+    set_up()
+    check(test_select_first_guessing_player())
 
     set_up()
     check(test_next_player())
@@ -40,92 +46,110 @@ def run ():
 
 def set_up ():
     global game
+    global hangman
     global player_1
     global player_2
+    global player_3
 
     player_1 = Player(name="Pascal")
     player_2 = Player(name="Alina")
-    game = Game([player_1, player_2])
-    game.word = ['n', 'a', 'm', 'e']
+    player_3 = Player(name="Ada")
+    group = Group(min_players=3)
+    group.add([player_1, player_2, player_3])
+    game = Game(group)
+    hangman = Hangman(['n', 'a', 'm', 'e'])
 
 
 def test_next_player ():
     global game
     start_test('test_next_player')
 
-    first = game.next_player()
+    first = game.group.next_player(None)
     game.current_player = first
     first_correct = first == Player(name="Pascal")
 
-    second = game.next_player()
-    game.current_player  = second
+    second = game.group.next_player(game.current_player)
+    game.current_player = second
     second_correct = second == Player(name="Alina")
 
-    last = game.next_player() == Player(name="Pascal")
+    third = game.group.next_player(game.current_player)
+    game.current_player = third
+    third_correct = third == Player(name="Ada")
+
+    last = game.group.next_player(game.current_player) == Player(name="Pascal")
 
-    return first_correct and second_correct and last
+    return first_correct and second_correct and third_correct and last
 
 
 def test_has_no_winner ():
-    global game
+    global hangman
     start_test("test_has_no_winner")
 
-    return not game.has_winner
+    return not hangman.has_winner
 
 
 def test_has_winner ():
-    global game
+    global hangman
     start_test("test_has_winner")
 
-    return game.has_winner
+    return hangman.has_winner
 
 
 def test_guess_correct ():
-    global game
+    global hangman
     start_test("test_guess_correct")
 
-    correct, result = game.guess('n')
+    correct = hangman.guess('n')
 
-    return correct and result[0] == 'n'
+    return correct and hangman.guessed_letters[0] == 'n'
 
 
 def test_guess_incorrect ():
-    global game
+    global hangman
     start_test('test_guess_incorrect')
 
-    correct, result = game.guess('r')
+    correct = hangman.guess('r')
 
-    return not correct and 'r' not in result
+    return not correct and 'r' not in hangman.guessed_letters
 
 
-def test_next_guessing_player_current_is_none ():
+def test_next_guessing_player_current_is_first ():
     global game
-    start_test('test_next_guessing_player_current_is_none')
+    start_test('test_next_guessing_player_current_is_first')
 
-    current = game.players[0]
-    next_player_1 = game.next_guessing_player(current)
-    next_player_2 = game.next_guessing_player(next_player_1)
+    game.current_player = player_1
+    next_player_1 = game.group.next_guessing_player(game.current_player, player_2)
+    next_player_2 = game.group.next_guessing_player(game.current_player, next_player_1)
 
-    current_correct = current == Player(name="Pascal")
-    player_1_correct = next_player_1 == Player(name="Alina")
-    player_2_correct = next_player_2 == Player(name="Pascal")
+    player_1_correct = next_player_1 == Player(name="Ada")
+    player_2_correct = next_player_2 == Player(name="Alina")
 
-    return current_correct and player_1_correct and player_2_correct
+    return player_1_correct and player_2_correct
 
 
-def test_next_guessing_player_current_not_none ():
+def test_next_guessing_player_current_not_first ():
     global game
-    start_test('test_next_guessing_player_current_not_none')
+    start_test('test_next_guessing_player_current_not_first')
 
-    game.current_player = game.players[0]
-    next_player_1 = game.next_guessing_player(game.players[1])
-    next_player_2 = game.next_guessing_player(next_player_1)
+    game.current_player = player_2
+    next_player_1 = game.group.next_guessing_player(game.current_player, player_1)
+    next_player_2 = game.group.next_guessing_player(game.current_player, next_player_1)
 
-    current_correct = game.current_player == Player(name="Pascal")
-    player_1_correct = next_player_1 == Player(name="Alina")
-    player_2_correct = next_player_2 == Player(name="Alina")
+    player_1_correct = next_player_1 == Player(name="Ada")
+    player_2_correct = next_player_2 == Player(name="Pascal")
+
+    return player_1_correct and player_2_correct
+
+
+def test_select_first_guessing_player ():
+    global game
+    start_test('test_select_first_guessing_player')
+
+    game.current_player = player_3
+    random.seed(0)
+    selected = {game.group.select_first_guessing_player(game.current_player).name for _ in range(50)}
 
-    return current_correct and player_1_correct and player_2_correct
+    return selected == {"Pascal", "Alina"}
 
 
 def check(method:bool):
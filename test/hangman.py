@@ -0,0 +1,82 @@
+import logging
+
+from server.hangman import Hangman
+
+logger = logging.getLogger("test_hangman")
+logger.setLevel(logging.INFO)
+
+
+def run():
+    check(test_guess_reveals_all_occurrences())
+    check(test_guess_incorrect())
+    check(test_repeated_guess())
+    check(test_phrase_can_be_won())
+    check(test_digits_guessed())
+
+
+def test_guess_reveals_all_occurrences():
+    start_test('test_guess_reveals_all_occurrences')
+
+    hangman = Hangman(list('banana'))
+    correct = hangman.guess('a')
+
+    return correct and hangman.guessed_letters == list('*a*a*a') and hangman.last_revealed == [1, 3, 5]
+
+
+def test_guess_incorrect():
+    start_test('test_guess_incorrect')
+
+    hangman = Hangman(list('banana'))
+    correct = hangman.guess('r')
+
+    return not correct and hangman.guessed_letters == list('******') and hangman.tries == 1
+
+
+def test_repeated_guess():
+    start_test('test_repeated_guess')
+
+    hangman = Hangman(list('banana'))
+    hangman.guess('n')
+    correct = hangman.guess('n')
+
+    return correct and hangman.last_revealed == [] and hangman.tries == 2 and not hangman.has_winner
+
+
+def test_phrase_can_be_won():
+    start_test('test_phrase_can_be_won')
+
+    hangman = Hangman(list('to be'))
+    revealed_from_start = hangman.guessed_letters == list('** **')
+    [hangman.guess(letter) for letter in 'tobe']
+
+    return revealed_from_start and hangman.has_winner and hangman.guessed_letters == list('to be')
+
+
+def test_digits_guessed():
+    start_test('test_digits_guessed')
+
+    hangman = Hangman(list('r2-d2'))
+    hidden = hangman.guessed_letters == list('**-**')
+    correct = hangman.guess('2')
+    revealed = hangman.guessed_letters == list('*2-*2')
+    [hangman.guess(letter) for letter in 'rd']
+
+    return hidden and correct and revealed and hangman.has_winner
+
+
+def check(method: bool):
+    global logger
+
+    if method:
+        logger.warning("PASSED \n")
+    else:
+        logger.warning("FAILED \n")
+
+
+def start_test(name):
+    global logger
+    logger.warning(f"TESTING: {name}")
+
+
+if __name__ == "__main__":
+    run()
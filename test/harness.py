@@ -0,0 +1,183 @@
+from concurrent.futures import Future
+from threading import RLock
+import socket as S
+
+import model.protocol as P
+from model.clock import VirtualClock
+from model.codec import TextCodec
+from model.player import Player
+from server.game import Game
+from server.game_state import GameStateMachine
+from server.group import Group
+from test.bots import ScriptedBot
+
+
+class FakeConnection:
+    """
+    An in-memory stand-in for the server's end of a client socket, with a ScriptedBot at the other end.
+    Every frame the server sends is answered by the bot right away, on the sending thread, so the answer is waiting
+    by the time the server listens for it: a Game plays start to finish on the calling thread, without a network,
+    other threads or real time passing.
+    """
+
+    def __init__(self, name: str, **bot_options):
+        self.incoming = bytearray()  # sent by the bot, not yet received by the server
+        self.outgoing = bytearray()  # sent by the server, not yet parsed into whole frames
+        self.lock = RLock()
+        self.closed = False
+        self.timeout = None
+        self.bot = ScriptedBot(_BotEnd(self), name, **bot_options)
+
+    def __repr__(self):
+        return f"<FakeConnection bot={self.bot.name} />"
+
+    def sendall(self, data: bytes):
+        if self.closed:
+            raise BrokenPipeError('FakeConnection is closed')
+
+        with self.lock:
+            self.outgoing += data
+            messages, start, end = [], 0, len(self.outgoing)
+
+            with memoryview(self.outgoing) as view:
+                while start < end:
+                    message, frame_end = TextCodec.parse_frame(self.outgoing, view, start, end)
+                    if message is None:
+                        break
+                    messages.append(message)
+                    start = frame_end
+            del self.outgoing[:start]
+
+            for message in messages:
+                self.bot.transcript.append(message)
+                if not self.bot.answer(message):
+                    self.closed = True
+
+    def send(self, data: bytes, flags=0):
+        self.sendall(data)
+        return len(data)
+
+    def recv_into(self, buffer, nbytes=0):
+        with self.lock:
+            if not self.incoming and not self.closed and self.timeout is not None:
+                raise S.timeout('timed out')  # the bot did not answer: no real time needs to pass to know it
+
+            size = min(nbytes or len(buffer), len(buffer), len(self.incoming))
+            buffer[:size] = self.incoming[:size]
+            del self.incoming[:size]
+            return size  # 0, like a closed socket, if the bot has nothing to say
+
+    def recv(self, size: int, flags=0):
+        with self.lock:
+            data = bytes(self.incoming[:size])
+            if not flags & S.MSG_PEEK:
+                del self.incoming[:size]
+            return data
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def gettimeout(self):
+        return self.timeout
+
+    def getpeername(self):
+        return 'harness', id(self)
+
+    def close(self):
+        self.closed = True
+
+
+class InlineExecutor:
+    """
+    A stand-in for the SessionExecutor of a Game played in-process: prompts run right away, on the calling thread.
+    The bots behind FakeConnections answer as soon as they are prompted, so no prompt waits on another one.
+    """
+
+    def __init__(self):
+        self.prompts = self
+
+    def submit(self, function, *arguments):
+        future = Future()
+        try:
+            future.set_result(function(*arguments))
+        except BaseException as error:
+            future.set_exception(error)
+        return future
+
+
+class _BotEnd:
+    """The bot's end of a FakeConnection: what the bot sends is queued for the server to receive."""
+
+    def __init__(self, connection: FakeConnection):
+        self.connection = connection
+
+    def sendall(self, data: bytes):
+        with self.connection.lock:
+            self.connection.incoming += data
+
+    def close(self):
+        pass
+
+
+def set_up_game(names=('pascal', 'alina'), clock=None, engine=Game, deadlines=None, capabilities=None,
+                **bot_options):
+    """
+    Seat one ScriptedBot per name in a started Group, each behind a FakeConnection.
+    :param names: the names of the players.
+    :param clock: the clock the game pauses on. Default: a new VirtualClock.
+    :param engine: the class playing the game, Game or GameStateMachine.
+    :param deadlines: the game's PromptDeadlines. Default: the engine's.
+    :param capabilities: a dict, name -> the capabilities that player agreed on. Default: none, as for old clients.
+    :param bot_options: passed on to every ScriptedBot, e.g. secret or rounds.
+    :return: a tuple (game, bots).
+    """
+    group = Group(min_players=len(names))
+    connections = [FakeConnection(name, **bot_options) for name in names]
+
+    players = [Player(connection=connection, name=connection.bot.name) for connection in connections]
+    for player in players:
+        player.capabilities = set((capabilities or {}).get(player.name, ()))
+
+    group.add(players)
+    group.start()
+    options = {'executor': InlineExecutor()} if engine is Game else {}
+    game = engine(group, clock=clock or VirtualClock(), deadlines=deadlines, **options)
+    return game, [connection.bot for connection in connections]
+
+
+def play_game(names=('pascal', 'alina'), clock=None, **bot_options):
+    """
+    Play a complete game in-process, on the calling thread.
+    :return: a tuple (game, bots), once the game is over and the players were disconnected.
+    """
+    game, bots = set_up_game(names, clock, **bot_options)
+    game.run()
+    return game, bots
+
+
+def drive(machine: GameStateMachine):
+    """
+    Play a GameStateMachine start to finish on the calling thread, the way the reactor would: hand it whatever the
+    bots answered, and once they have nothing more to say, skip its clock ahead to the end of its pause.
+    :return: None
+    """
+    machine.start()
+
+    while not machine.thread_finished:
+        waiting = [player for player in machine.group.players if player.get_connection.incoming]
+
+        for player in waiting:
+            for message in player.receive():
+                machine.on_message(player, message)
+
+        if waiting:
+            continue
+        if machine.wake_at is None:
+            raise RuntimeError(f'{machine} waits for a message no bot will send')
+
+        machine.clock.advance(machine.wake_at - machine.clock.now())
+        machine.on_timer()
+
+
+def finished(bot: ScriptedBot):
+    return bool(bot.transcript) and bot.transcript[-1] == P.FORCE_DISCONNECT
@@ -0,0 +1,126 @@
+import logging
+import socket
+
+import model.protocol as P
+from model.player import Player
+from server.liveness import LivenessMonitor
+from server.liveness import TimingWheel
+from server.lobby_registry import LobbyRegistry
+from test.outbound import FILLER
+from test.outbound import fill
+from test.outbound import frames
+from test.outbound import slow_player
+from test.outbound import start_writer
+
+logger = logging.getLogger("test_liveness")
+logger.setLevel(logging.INFO)
+
+
+def run():
+    check(test_timing_wheel())
+    check(test_closed_connection_evicted())
+    check(test_heartbeats_spread())
+    check(test_heartbeat_queued_whole())
+
+
+def test_timing_wheel():
+    start_test('test_timing_wheel')
+
+    wheel = TimingWheel(slots=4, tick=1)
+    wheel.schedule('soon', 'soon', 1)
+    wheel.schedule('late', 'late', 6)
+    wheel.schedule('cancelled', 'cancelled', 2)
+    wheel.cancel('cancelled')
+
+    due = [wheel.advance() for _ in range(7)]
+    return due == [['soon'], [], [], [], [], ['late'], []] and len(wheel) == 0
+
+
+def set_up_lobby(lobbies, monitor, names):
+    pairs = []
+
+    for name in names:
+        server_side, client_side = socket.socketpair()
+        player = Player(connection=server_side, name=name, preferred_players=3)
+        monitor.track(player, lobbies.place(player))
+        pairs.append((player, client_side))
+    return pairs
+
+
+def test_closed_connection_evicted():
+    start_test('test_closed_connection_evicted')
+
+    lobbies = LobbyRegistry()
+    monitor = LivenessMonitor(lobbies)
+    (alina, alina_client), (pascal, pascal_client) = set_up_lobby(lobbies, monitor, ['alina', 'pascal'])
+    group = lobbies.snapshot()[0]
+
+    pascal_client.close()
+    evicted = monitor.check()
+
+    # the lobby keeps alina and is open again: the next player of the same size joins it
+    newcomer = Player(name='newcomer', preferred_players=3)
+    same_lobby = lobbies.place(newcomer) is group
+    alina_client.close()
+
+    return evicted == [pascal] and group.players == [alina, newcomer] and same_lobby and len(monitor.tracked) == 1
+
+
+def test_heartbeats_spread():
+    start_test('test_heartbeats_spread')
+
+    lobbies = LobbyRegistry()
+    monitor = LivenessMonitor(lobbies, heartbeat_interval=monitor_ticks(2))
+    pairs = set_up_lobby(lobbies, monitor, ['alina', 'pascal'])
+
+    first, second = monitor.check(), monitor.check()
+    received = [client.recv(1024, socket.MSG_DONTWAIT) for _, client in pairs]
+    [client.close() for _, client in pairs]
+
+    # one heartbeat each after two ticks, and nobody evicted
+    return first == [] and second == [] and all(frame.endswith(b'HB') for frame in received)
+
+
+def test_heartbeat_queued_whole():
+    start_test('test_heartbeat_queued_whole')
+
+    lobbies = LobbyRegistry()
+    monitor = LivenessMonitor(lobbies, heartbeat_interval=monitor_ticks(1))
+    writer, terminal = start_writer()
+    player, client = slow_player(writer)
+    player.preferred_players = 3
+    monitor.track(player, lobbies.place(player))
+
+    told = fill(player)
+    monitor.check()
+    player.tell(P.GAME_START)
+
+    client.settimeout(1)
+    received = frames(client)
+    terminal.set()
+    client.close()
+
+    # behind the frames queued, the heartbeat is queued whole, ahead of what the game tells next
+    return received == [FILLER] * told + [P.HEARTBEAT, P.GAME_START]
+
+
+def monitor_ticks(ticks):
+    return ticks * TimingWheel().tick
+
+
+def check(method: bool):
+    global logger
+
+    if method:
+        logger.warning("PASSED \n")
+    else:
+        logger.warning("FAILED \n")
+
+
+def start_test(name):
+    global logger
+    logger.warning(f"TESTING: {name}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,133 @@
+import gc
+import logging
+import os
+import socket
+import time
+
+from model.logger import Logger
+from model.player import Player
+
+logger = logging.getLogger("test_logger")
+logger.setLevel(logging.INFO)
+
+CONNECTIONS = 10000
+FD_DIRECTORY = '/proc/self/fd'
+SETTLE_SECONDS = 1  # the open-fd count has to stay the same that long before counting
+SETTLE_TIMEOUT = 15  # in seconds, the longest to wait for the connections of earlier tests to close
+
+
+def run():
+    check(test_open_files_constant())
+    check(test_sampling())
+    check(test_worker_log_files())
+
+
+def connect(index: int):
+    """
+    Do what the server does for every connection: create a Player and a logger of its own for the handler,
+    exchange a message, and close the connection.
+    """
+    server_side, client_side = socket.socketpair()
+    Logger.create_logger(f'<ConnectionHandler remote=test:{index}/>', logging.INFO, to_file=True).info('Connected')
+
+    player = Player(connection=server_side, name=f'player{index}')
+    player.tell('HI')
+    Player(connection=client_side).listen()
+
+    server_side.close()
+    client_side.close()
+
+
+def open_files():
+    """
+    Wait for the connections of earlier tests to close, e.g. those their writer threads linger on.
+    Return: the number of open file descriptors, once it stopped changing.
+    """
+    deadline = time.monotonic() + SETTLE_TIMEOUT
+    count, since = None, time.monotonic()
+
+    while time.monotonic() < deadline:
+        gc.collect()
+        current = len(os.listdir(FD_DIRECTORY))
+        if current != count:
+            count, since = current, time.monotonic()
+        elif time.monotonic() - since >= SETTLE_SECONDS:
+            break
+        time.sleep(0.1)
+    return count
+
+
+def test_open_files_constant():
+    start_test('test_open_files_constant')
+
+    if not os.path.isdir(FD_DIRECTORY):
+        logger.warning(f"{FD_DIRECTORY} is not available on this platform, skipping...")
+        return True
+
+    connect(-1)  # opens the log files, once
+    before = open_files()
+
+    for index in range(CONNECTIONS):
+        connect(index)
+
+    return open_files() == before
+
+
+def test_sampling():
+    start_test('test_sampling')
+
+    wire_logger = Logger.create_wire_logger('TEST')
+    passed = []
+    wire_logger.addHandler(ListHandler(passed))
+
+    Logger.set_sampling(10, 'TEST')
+    for index in range(100):
+        wire_logger.info('Sending: %s', index)
+    wire_logger.error('Could not write to client!')
+    Logger.set_sampling(1, 'TEST')
+
+    return len(passed) == 11 and passed[-1].levelno == logging.ERROR
+
+
+def test_worker_log_files():
+    start_test('test_worker_log_files')
+
+    Logger.set_worker(7)
+    Logger.create_logger('WORKER_TEST', logging.INFO, to_file=True).warning('Written by worker 7')
+
+    deadline = time.monotonic() + 5
+    while not os.path.exists('server.worker7.log') and time.monotonic() < deadline:  # written by the listener thread
+        time.sleep(0.01)
+    written = os.path.exists('server.worker7.log')
+
+    Logger.set_worker()
+    if written:
+        os.remove('server.worker7.log')
+    return written and Logger.file_targets['server.log'].baseFilename == os.path.abspath('server.log')
+
+
+class ListHandler(logging.Handler):
+    def __init__(self, records: list):
+        super().__init__()
+        self.records = records
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def check(method: bool):
+    global logger
+
+    if method:
+        logger.warning("PASSED \n")
+    else:
+        logger.warning("FAILED \n")
+
+
+def start_test(name):
+    global logger
+    logger.warning(f"TESTING: {name}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,115 @@
+from threading import Thread
+import logging
+import urllib.request
+
+import model.metrics as M
+import model.protocol as P
+from model.metrics import MetricsRegistry
+from model.player import Player
+from server.threads.metrics_thread import MetricsThread
+from test.harness import play_game
+
+logger = logging.getLogger("test_metrics")
+logger.setLevel(logging.INFO)
+
+
+def run():
+    check(test_counter_sums_threads())
+    check(test_histogram_rendered())
+    check(test_opcodes())
+    check(test_game_recorded())
+    check(test_endpoint())
+
+
+def test_counter_sums_threads():
+    start_test('test_counter_sums_threads')
+
+    registry = MetricsRegistry()
+    counter = registry.counter('test_total', 'A test counter.', ['opcode'])
+
+    def count():
+        for _ in range(1000):
+            counter.inc(1, P.GUESS)
+
+    threads = [Thread(target=count) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc(5, P.TURN)  # from a thread still alive, next to the folded cells of the finished ones
+
+    return counter.collect() == {(P.GUESS,): 8000, (P.TURN,): 5} and len(counter.cells) == 1
+
+
+def test_histogram_rendered():
+    start_test('test_histogram_rendered')
+
+    registry = MetricsRegistry()
+    histogram = registry.histogram('test_seconds', 'A test histogram.', buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 2):
+        histogram.observe(value)
+
+    return registry.render().splitlines() == [
+        '# HELP test_seconds A test histogram.',
+        '# TYPE test_seconds histogram',
+        'test_seconds_bucket{le="0.1"} 2',
+        'test_seconds_bucket{le="1"} 3',
+        'test_seconds_bucket{le="+Inf"} 4',
+        'test_seconds_sum 2.65',
+        'test_seconds_count 4',
+    ]
+
+
+def test_opcodes():
+    start_test('test_opcodes')
+
+    return (M.opcode(P.construct_turn(Player(name='alina'), 3)) == P.TURN
+            and M.opcode(P.INVALID_INPUT) == 'ERR' and M.opcode('G=a') == P.GUESS
+            and M.opcode('made up') == M.OTHER)
+
+
+def test_game_recorded():
+    start_test('test_game_recorded')
+
+    def turns():
+        return sum(M.TURN_RESPONSE_SECONDS.collect().get((), [0, 0])[:-1])  # the bucket counts, without the sum
+
+    def disconnects():
+        return M.MESSAGES_SENT.collect().get((P.FORCE_DISCONNECT,), 0)
+
+    turns_before, disconnects_before = turns(), disconnects()
+    play_game()
+
+    return turns() > turns_before and disconnects() == disconnects_before + 2
+
+
+def test_endpoint():
+    start_test('test_endpoint')
+
+    events = []
+    metrics_thread = MetricsThread(0, events.append)
+    metrics_thread.start()
+
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{metrics_thread.port}/metrics', timeout=5) as response:
+            body = response.read().decode()
+    finally:
+        events[0].set()
+        metrics_thread.join()
+
+    return '# TYPE hangman_messages_sent_total counter' in body and 'hangman_turn_response_seconds_count' in body
+
+
+def check(method: bool):
+    if method:
+        logger.warning("PASSED \n")
+    else:
+        logger.warning("FAILED \n")
+
+
+def start_test(name):
+    logger.warning(f"TESTING: {name}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,180 @@
+import logging
+import socket
+from threading import Thread
+
+import model.metrics as M
+import model.outbound as O
+import model.protocol as P
+from model.frame_reader import FrameReader
+from model.player import Player
+from server.broadcast import broadcast
+from server.threads.writer_thread import WriterThread
+from test.pipeline import connect
+
+logger = logging.getLogger("test_outbound")
+logger.setLevel(logging.INFO)
+
+FILLER = P.construct_turn(Player(name='x' * 1000), 7)  # about 1 KB, not a board update
+
+
+def run():
+    check(test_broadcast_not_held_by_slow_player())
+    check(test_slow_consumer_disconnected())
+    check(test_superseded_boards_dropped())
+    check(test_close_writes_queued())
+
+
+def start_writer(max_bytes=O.MAX_BYTES, policy=O.DISCONNECT):
+    events = []
+    writer = WriterThread(events.append, max_bytes, policy)
+    writer.start()
+    return writer, events[0]
+
+
+def slow_player(writer: WriterThread):
+    """
+    Return: a tuple (Player with an outbound queue, the client's socket), over a connection with small buffers.
+    """
+    server_side, client_side = connect()
+    server_side.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+    client_side.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+
+    player = Player(connection=server_side)
+    writer.attach(player)
+    return player, client_side
+
+
+def fill(player: Player):
+    """
+    Tell the player FILLER until frames are queued, the client not reading.
+    Return: the number of messages told.
+    """
+    told = 0
+    while not player.outbound.frames and told < 100000:
+        player.tell(FILLER)
+        told += 1
+    return told
+
+
+def frames(connection: socket.socket, reader=None):
+    """
+    Return: the messages received on connection until the server closed it, or until it timed out.
+    """
+    reader, messages = reader or FrameReader(connection), []
+    try:
+        while True:
+            messages.append(reader.next_frame())
+    except (socket.error, ValueError):
+        return messages
+
+
+def read(connection: socket.socket, count: int, into: list, reader=None):
+    reader = reader or FrameReader(connection)
+    for _ in range(count):
+        into.append(reader.next_frame())
+
+
+def test_broadcast_not_held_by_slow_player():
+    start_test('test_broadcast_not_held_by_slow_player')
+
+    writer, terminal = start_writer()
+    slow, slow_client = slow_player(writer)
+    fast, fast_client = slow_player(writer)
+    messages = [P.construct_turn(Player(name=f'{index:04}' + 'x' * 500), index) for index in range(300)]
+
+    received = []
+    reading = Thread(target=read, args=(fast_client, len(messages), received), daemon=True)
+    reading.start()
+
+    for message in messages:
+        broadcast([slow, fast], message)
+    reading.join(5)
+    queued = slow.outbound.size
+
+    # the slow client is sent everything too, in order, once it reads
+    late = []
+    read(slow_client, len(messages), late)
+    terminal.set()
+    slow_client.close()
+    fast_client.close()
+    return received == messages and late == messages and queued > 0 and slow.outbound.size == 0
+
+
+def test_slow_consumer_disconnected():
+    start_test('test_slow_consumer_disconnected')
+
+    before = M.OUTBOUND_OVERFLOWS.collect().get((O.DISCONNECT,), 0)
+    writer, terminal = start_writer(max_bytes=16 * 1024)
+    player, client = slow_player(writer)
+
+    told = fill(player)
+    while not player.outbound.abandoned and told < 100000:
+        player.tell(FILLER)
+        told += 1
+
+    client.settimeout(1)
+    received = frames(client)
+    closed = player.listen() is None
+    terminal.set()
+    client.close()
+    return player.outbound.abandoned and closed and len(received) < told and \
+        M.OUTBOUND_OVERFLOWS.collect().get((O.DISCONNECT,), 0) == before + 1
+
+
+def test_superseded_boards_dropped():
+    start_test('test_superseded_boards_dropped')
+
+    before = M.OUTBOUND_DROPPED.collect().get((), 0)
+    writer, terminal = start_writer(max_bytes=8 * 1024, policy=O.DROP_BOARDS)
+    player, client = slow_player(writer)
+
+    told = fill(player)
+    boards = [P.construct_move(list(f'{index:03}') + ['*'] * 500) for index in range(30)]
+    for board in boards[:15]:
+        player.tell(board)
+    player.tell(P.YOUR_TURN)
+    for board in boards[15:]:
+        player.tell(board)
+
+    reader, received = FrameReader(client), []
+    read(client, told + 2, received, reader)  # at least the filler, YOUR_TURN and the last board
+    client.settimeout(0.2)
+    received.extend(frames(client, reader))
+    terminal.set()
+    client.close()
+
+    shown = [message for message in received if message.startswith(P.MOVE_MADE)]
+    return not player.outbound.abandoned and received[:told] == [FILLER] * told and P.YOUR_TURN in received and \
+        shown[-1] == boards[-1] and len(shown) < len(boards) and shown == [b for b in boards if b in shown] and \
+        M.OUTBOUND_DROPPED.collect().get((), 0) == before + len(boards) - len(shown)
+
+
+def test_close_writes_queued():
+    start_test('test_close_writes_queued')
+
+    writer, terminal = start_writer()
+    player, client = slow_player(writer)
+
+    told = fill(player)
+    player.tell(P.FORCE_DISCONNECT)
+    player.close()
+
+    received = frames(client)
+    terminal.set()
+    client.close()
+    return received == [FILLER] * told + [P.FORCE_DISCONNECT]
+
+
+def check(method: bool):
+    if method:
+        logger.warning("PASSED \n")
+    else:
+        logger.warning("FAILED \n")
+
+
+def start_test(name):
+    logger.warning(f"TESTING: {name}")
+
+
+if __name__ == "__main__":
+    run()
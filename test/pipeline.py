@@ -0,0 +1,231 @@
+import logging
+import socket
+import time
+from threading import Thread
+
+import model.metrics as M
+import model.protocol as P
+from model.clock import VirtualClock
+from model.codec import BinaryCodec
+from model.codec import TextCodec
+from model.frame_reader import FrameReader
+from model.player import Player
+from server.game import Game
+from server.game_state import GameStateMachine
+from server.lobby_registry import LobbyRegistry
+from server.threads.new_connection_thread import ConnectionHandler
+from test.bots import ScriptedBot
+from test.harness import drive
+from test.harness import finished
+from test.harness import set_up_game
+
+logger = logging.getLogger("test_pipeline")
+logger.setLevel(logging.INFO)
+
+
+def run():
+    check(test_pipelined_game_not_paced())
+    check(test_mixed_game_paced())
+    check(test_ready_skips_handshake_pause())
+    check(test_legacy_handshake_paced())
+    check(test_early_record_one_round_trip())
+    check(test_early_record_unfused())
+    check(test_early_record_unfused_binary())
+    check(test_late_record_kept())
+
+
+def play(engine, capabilities):
+    """
+    Play a game of two ScriptedBots on engine, with the players having agreed on capabilities.
+    :param capabilities: a list with the capabilities of each player, in order.
+    Return: a tuple (seconds paused in virtual time, the transcripts of the bots), or None if the game did not finish.
+    """
+    clock = VirtualClock()
+    game, bots = set_up_game(clock=clock, engine=engine, capabilities=dict(zip(('pascal', 'alina'), capabilities)),
+                             secret='ab', guesses='ab')
+
+    if engine is GameStateMachine:
+        drive(game)
+    else:
+        game.run()
+
+    if not all(finished(bot) for bot in bots):
+        return None
+    return clock.now(), [bot.transcript for bot in bots]
+
+
+def connect():
+    """
+    Return: a tuple (server side, client side) of a loopback TCP connection.
+    """
+    with socket.socket() as listener:
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(1)
+        client_side = socket.create_connection(listener.getsockname())
+        server_side, _ = listener.accept()
+    return server_side, client_side
+
+
+def handshake(bot_options=None, early=None, late=None):
+    """
+    Run a ConnectionHandler on the calling thread, against a ScriptedBot or a client that sends its player record
+    without waiting to be asked: early, before the server said anything, or late, right after WELCOME.
+    Return: a tuple (seconds taken, the handler, the client's socket or bot).
+    """
+    server_side, client_side = connect()
+
+    if early is not None:
+        client = client_side
+        client.sendall(P.write_frame(early))
+    elif late is not None:
+        client = client_side
+        reader = FrameReader(client)
+        Thread(target=lambda: reader.next_frame() and client.sendall(P.write_frame(late)), daemon=True).start()
+    else:
+        client = ScriptedBot(client_side, 'pascal', **(bot_options or {}))
+        client.start()
+
+    handler = ConnectionHandler(Player(connection=server_side), LobbyRegistry())
+    start = time.perf_counter()
+    handler.run()
+    return time.perf_counter() - start, handler, client
+
+
+def test_pipelined_game_not_paced():
+    start_test('test_pipelined_game_not_paced')
+
+    paced = play(Game, [(), ()])
+    results = [play(engine, [[P.PIPELINE], [P.PIPELINE]]) for engine in (Game, GameStateMachine)]
+
+    # the same messages, without the pause before the game and after each of the 2 moves
+    return paced[0] == 3 * P.TURN_DELAY and all(result == (0, paced[1]) for result in results)
+
+
+def test_mixed_game_paced():
+    start_test('test_mixed_game_paced')
+
+    results = [play(engine, [[P.PIPELINE], []]) for engine in (Game, GameStateMachine)]
+    return all(result is not None and result[0] == 3 * P.TURN_DELAY for result in results)
+
+
+def test_ready_skips_handshake_pause():
+    start_test('test_ready_skips_handshake_pause')
+
+    seconds, handler, bot = handshake({'pipeline': True})
+    bot.join(1)
+
+    return seconds < P.MESSAGE_DELAY and handler.player.capabilities == {P.PIPELINE} and \
+        bot.transcript == [P.construct_welcome(ConnectionHandler.CAPABILITIES), P.REQUEST_PLAYER, P.ADDING_TO_QUEUE]
+
+
+def test_legacy_handshake_paced():
+    start_test('test_legacy_handshake_paced')
+
+    seconds, handler, bot = handshake()
+    bot.join(1)
+
+    return seconds >= P.MESSAGE_DELAY and handler.player.capabilities == set() and \
+        bot.transcript[-1] == P.ADDING_TO_QUEUE
+
+
+def pipelined():
+    return M.HANDSHAKES.collect().get((ConnectionHandler.PIPELINED,), 0)
+
+
+def test_early_record_one_round_trip():
+    start_test('test_early_record_one_round_trip')
+
+    before = pipelined()
+    record = f'{P.PLAYER}{P.ASSIGNMENT}alina{P.LIST_DELIMITER}3{P.DELIM}' + \
+        P.construct_capabilities([P.FUSED, P.PIPELINE, 'unknown'])
+    seconds, handler, client = handshake(early=record)
+
+    reader = FrameReader(client)
+    frames = [reader.next_frame()]
+    client.settimeout(0.05)
+    try:
+        frames.append(reader.next_frame())
+    except socket.timeout:
+        pass
+    client.close()
+
+    # WELCOME, with the capabilities agreed on, and ADDING_TO_QUEUE in the one frame, without REQUEST_PLAYER
+    welcomed = [P.construct_bundle([P.construct_welcome([P.FUSED, P.PIPELINE]), P.ADDING_TO_QUEUE])]
+    return seconds < P.MESSAGE_DELAY and frames == welcomed and handler.player.name == 'alina' and \
+        handler.player.capabilities == {P.FUSED, P.PIPELINE} and pipelined() == before + 1
+
+
+def test_early_record_unfused():
+    start_test('test_early_record_unfused')
+
+    record = f'{P.PLAYER}{P.ASSIGNMENT}alina{P.LIST_DELIMITER}3{P.DELIM}' + P.construct_capabilities([P.PIPELINE])
+    seconds, handler, client = handshake(early=record)
+
+    reader = FrameReader(client)
+    frames = [reader.next_frame()]
+    client.settimeout(0.05)
+    try:
+        frames.append(reader.next_frame())
+    except socket.timeout:
+        pass
+    client.close()
+
+    # a client that does not unpack BUNDLE gets WELCOME and ADDING_TO_QUEUE as frames of their own
+    return seconds < P.MESSAGE_DELAY and frames == [P.construct_welcome([P.PIPELINE]), P.ADDING_TO_QUEUE] and \
+        handler.player.capabilities == {P.PIPELINE}
+
+
+def test_early_record_unfused_binary():
+    start_test('test_early_record_unfused_binary')
+
+    record = f'{P.PLAYER}{P.ASSIGNMENT}alina{P.LIST_DELIMITER}3{P.DELIM}' + \
+        P.construct_capabilities([P.BINARY, P.PIPELINE])
+    seconds, handler, client = handshake(early=record)
+
+    received = bytearray()
+    client.settimeout(0.05)
+    try:
+        while len(received) < 4096:
+            chunk = client.recv(4096)
+            if not chunk:
+                break
+            received.extend(chunk)
+    except socket.timeout:
+        pass
+    client.close()
+
+    # WELCOME is text, and what follows it is in the codec the client switches to on reading it
+    view = memoryview(received)
+    welcome, end = TextCodec.parse_frame(received, view, 0, len(received))
+    queued, rest = BinaryCodec.parse_frame(received, view, end, len(received))
+    view.release()
+    return seconds < P.MESSAGE_DELAY and welcome == P.construct_welcome([P.BINARY, P.PIPELINE]) and \
+        queued == P.ADDING_TO_QUEUE and rest == len(received) and handler.player.codec is BinaryCodec
+
+
+def test_late_record_kept():
+    start_test('test_late_record_kept')
+
+    before = pipelined()
+    record = f'{P.PLAYER}{P.ASSIGNMENT}alina{P.LIST_DELIMITER}3'
+    seconds, handler, client = handshake(late=record)
+    client.close()
+
+    # the record arrived in place of READY: it is read as the answer to REQUEST_PLAYER instead of being lost
+    return seconds < P.MESSAGE_DELAY and handler.player.name == 'alina' and handler.player.preferred_players == 3 and \
+        pipelined() == before + 1
+
+
+def check(method: bool):
+    if method:
+        logger.warning("PASSED \n")
+    else:
+        logger.warning("FAILED \n")
+
+
+def start_test(name):
+    logger.warning(f"TESTING: {name}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,70 @@
+import logging
+import time
+
+import model.protocol as P
+from model.clock import VirtualClock
+from test.harness import finished
+from test.harness import play_game
+
+logger = logging.getLogger("test_simulation")
+logger.setLevel(logging.INFO)
+
+GAMES = 1000
+
+
+def run():
+    check(test_game_plays_to_the_end())
+    check(test_pauses_in_virtual_time())
+    check(test_thousand_games())
+
+
+def test_game_plays_to_the_end():
+    start_test('test_game_plays_to_the_end')
+
+    game, (chooser, guesser) = play_game(secret='ab', guesses='ab')
+
+    return (game.thread_finished and finished(chooser) and finished(guesser)
+            and P.REQUEST_MAX_TRIES in chooser.transcript and P.won([0, 0]) in guesser.transcript)
+
+
+def test_pauses_in_virtual_time():
+    start_test('test_pauses_in_virtual_time')
+
+    clock = VirtualClock()
+    start = time.perf_counter()
+    play_game(clock=clock, secret='ab', guesses='ab')
+
+    # one pause before the game, and one after each of the 2 moves
+    return clock.now() == 3 * P.TURN_DELAY and time.perf_counter() - start < P.TURN_DELAY
+
+
+def test_thousand_games():
+    start_test('test_thousand_games')
+
+    logging.disable(logging.INFO)
+    start = time.perf_counter()
+    try:
+        games = [play_game(rounds=2) for _ in range(GAMES)]
+    finally:
+        logging.disable(logging.NOTSET)
+
+    logger.warning(f"Played {GAMES} games in {time.perf_counter() - start:.2f} s")
+    return all(game.thread_finished and all(finished(bot) for bot in bots) for game, bots in games)
+
+
+def check(method: bool):
+    global logger
+
+    if method:
+        logger.warning("PASSED \n")
+    else:
+        logger.warning("FAILED \n")
+
+
+def start_test(name):
+    global logger
+    logger.warning(f"TESTING: {name}")
+
+
+if __name__ == "__main__":
+    run()
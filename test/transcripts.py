@@ -0,0 +1,109 @@
+import json
+import logging
+import os
+import random
+import sys
+
+import model.protocol as P
+from server.game import Game
+from server.game_state import GameStateMachine
+from test.harness import drive
+from test.harness import finished
+from test.harness import set_up_game
+
+logger = logging.getLogger("test_transcripts")
+logger.setLevel(logging.INFO)
+
+GOLDEN = os.path.join(os.path.dirname(__file__), 'transcripts', 'golden.json')
+
+# name -> (the players, the seed for choosing the first guessing player, the options of every ScriptedBot)
+SCENARIOS = {
+    'two_players_win': (('pascal', 'alina'), 1, dict(secret='ab', guesses='ab')),
+    'three_players_two_rounds': (('pascal', 'alina', 'ada'), 2, dict(secret='hangman', guesses='hangmzq', rounds=2)),
+    'losses_and_scores': (('pascal', 'alina'), 3, dict(secret='xyz', guesses='abcdefghij', max_tries=6, rounds=3)),
+    'phrase_with_spaces': (('pascal', 'alina'), 4, dict(secret='to be', guesses='otbe')),
+    'invalid_max_tries': (('pascal', 'alina'), 5, dict(invalid=[P.REQUEST_MAX_TRIES])),
+    'invalid_secret': (('pascal', 'alina'), 6, dict(invalid=[P.YOUR_TURN])),
+    'invalid_guess': (('pascal', 'alina', 'ada'), 7, dict(invalid=[P.TURN])),
+}
+
+
+def run():
+    check(test_game_matches_golden())
+    check(test_state_machine_matches_golden())
+
+
+def test_game_matches_golden():
+    start_test('test_game_matches_golden')
+
+    golden = load()
+    return all(play(scenario) == (recorded['complete'], recorded['transcripts'])
+               for scenario, recorded in golden.items())
+
+
+def test_state_machine_matches_golden():
+    start_test('test_state_machine_matches_golden')
+
+    golden = load()
+    return all(play(scenario, GameStateMachine) == (recorded['complete'], recorded['transcripts'])
+               for scenario, recorded in golden.items())
+
+
+def load():
+    with open(GOLDEN) as file:
+        return json.load(file)
+
+
+def play(scenario: str, engine=Game):
+    """
+    Play a scenario on the calling thread.
+    :param engine: Game or GameStateMachine.
+    Return: a tuple (complete, transcripts): whether the game ran to the end without raising and with every player
+    disconnected, and the messages each player received, by name.
+    """
+    names, seed, bot_options = SCENARIOS[scenario]
+    game, bots = set_up_game(names, engine=engine, **bot_options)
+    random.seed(seed)
+
+    try:
+        if engine is GameStateMachine:
+            drive(game)
+        else:
+            game.run()
+        complete = all(finished(bot) for bot in bots)
+    except Exception:
+        complete = False
+    return complete, {bot.name: bot.transcript for bot in bots}
+
+
+def record():
+    """
+    Write the transcripts of every scenario to GOLDEN. Only to be run on a server known to behave correctly:
+    the tests hold every engine to these transcripts.
+    """
+    golden = {}
+    for scenario in SCENARIOS:
+        complete, transcripts = play(scenario)
+        golden[scenario] = {'complete': complete, 'transcripts': transcripts}
+
+    os.makedirs(os.path.dirname(GOLDEN), exist_ok=True)
+    with open(GOLDEN, 'w') as file:
+        file.write(json.dumps(golden, indent=1) + '\n')
+
+
+def check(method: bool):
+    if method:
+        logger.warning("PASSED \n")
+    else:
+        logger.warning("FAILED \n")
+
+
+def start_test(name):
+    logger.warning(f"TESTING: {name}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ['record']:
+        record()
+    else:
+        run()
@@ -1,4 +1,32 @@
+from test.admission import run as run_admission_tests
+from test.board import run as run_board_tests
+from test.bundle import run as run_bundle_tests
+from test.concurrency import run as run_concurrency_tests
+from test.deadlines import run as run_deadlines_tests
+from test.frame_reader import run as run_frame_reader_tests
 from test.game import run as run_game_tests
+from test.hangman import run as run_hangman_tests
+from test.liveness import run as run_liveness_tests
+from test.logger import run as run_logger_tests
+from test.metrics import run as run_metrics_tests
+from test.outbound import run as run_outbound_tests
+from test.pipeline import run as run_pipeline_tests
+from test.simulation import run as run_simulation_tests
+from test.transcripts import run as run_transcripts_tests
 
 if __name__ == "__main__":
+    run_frame_reader_tests()
+    run_concurrency_tests()
+    run_liveness_tests()
+    run_hangman_tests()
+    run_logger_tests()
+    run_metrics_tests()
+    run_simulation_tests()
     run_game_tests()
+    run_transcripts_tests()
+    run_deadlines_tests()
+    run_pipeline_tests()
+    run_board_tests()
+    run_bundle_tests()
+    run_admission_tests()
+    run_outbound_tests()